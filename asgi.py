@@ -0,0 +1,406 @@
+"""נקודת כניסה ASGI (לצד wsgi.py)
+
+    uvicorn asgi:app --workers 4
+
+נתיבי הקריאה החמים (API של הלוח והערעורים, /events) מטופלים ישירות בלולאת
+האירועים מתוך הזיכרון. עבודה כבדה - יצירת PDF ושיבוץ אוטומטי - נשלחת
+למאגר תהליכים חסום, כך שאף אחד מהם לא חוסם את הלולאה. כל שאר הנתיבים
+עוברים לאפליקציית Flask דרך WsgiToAsgi, שמריצה אותה ב-thread יחיד. גם
+הסנכרון מול המאגר המשותף (SQLite) והחלת השיבוץ האוטומטי - כל מה שמשנה את
+המערכת מחוץ ל-Flask, כולל אימות HTTP Basic ותחזוקת הרקע - רצים באותו thread
+(mutation_executor, run_on_flask_thread), כך שהשינויים במערכת מסודרים ואינם
+רצים במקביל זה לזה.
+"""
+import asyncio
+import json
+import os
+import re
+import time as timer
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs
+
+from asgiref.sync import SyncToAsync, sync_to_async
+from asgiref.wsgi import WsgiToAsgi
+from itsdangerous import BadSignature
+from werkzeug.http import parse_accept_header, parse_cookie, parse_etags
+
+import web_app
+from authorization import NO_GRANT, Grant, Permission
+from instrumentation import metrics
+from pdf_generator import render_schedule_pdf_bytes
+
+CPU_WORKERS = int(os.getenv('CPU_WORKERS', os.cpu_count() or 1))
+CPU_QUEUE = int(os.getenv('CPU_QUEUE', 64))  # משימות ממתינות לפני החזרת 503
+IO_WORKERS = int(os.getenv('IO_WORKERS', 4))
+
+
+class Overloaded(Exception):
+    """התור של ה-executor מלא"""
+
+
+class BoundedExecutor:
+    """executor עם תור חסום: מעבר לגבול הבקשה נדחית במקום להצטבר בזיכרון
+
+    המונה מתעדכן רק מתוך לולאת האירועים, ולכן אינו צריך נעילה.
+    """
+
+    def __init__(self, factory, max_pending: int):
+        self._factory = factory
+        self._executor = None
+        self.max_pending = max_pending
+        self.pending = 0
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise Overloaded()
+        self.pending += 1
+        try:
+            return await self._submit(partial(fn, *args))
+        finally:
+            self.pending -= 1
+
+    async def _submit(self, call):
+        if self._executor is None:
+            self._executor = self._factory()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class FlaskThreadExecutor(BoundedExecutor):
+    """הרצה ב-thread של אפליקציית Flask (sync_to_async עם thread_sensitive, כמו WsgiToAsgi)
+
+    מי שמשנה את המערכת רץ כאן, אחד אחרי השני ולא במקביל לנתיבי Flask.
+    """
+
+    def __init__(self, max_pending: int):
+        super().__init__(None, max_pending)
+
+    async def _submit(self, call):
+        return await sync_to_async(call, thread_sensitive=True)()
+
+
+def run_on_flask_thread(fn):
+    """הרצה ב-thread של Flask מתוך thread שאינו בלולאה (תחזוקת הרקע) והחזרת התוצאה
+
+    WsgiToAsgi ו-mutation_executor רצים ב-executor היחיד של asgiref
+    (thread_sensitive בלי הקשר חיצוני), ולכן גם זה נשלח אליו.
+    """
+    return SyncToAsync.single_thread_executor.submit(fn).result()
+
+
+cpu_executor = BoundedExecutor(lambda: ProcessPoolExecutor(CPU_WORKERS), CPU_QUEUE)
+io_executor = BoundedExecutor(lambda: ThreadPoolExecutor(IO_WORKERS, thread_name_prefix='storage'),
+                              max_pending=1024)
+mutation_executor = FlaskThreadExecutor(max_pending=1024)
+
+flask_app = WsgiToAsgi(web_app.app)
+web_app.maintenance.dispatch = run_on_flask_thread
+_session_serializer = web_app.app.session_interface.get_signing_serializer(web_app.app)
+
+
+class Request:
+    """הפרטים הדרושים מבקשת ASGI לנתיבים המטופלים ישירות"""
+    __slots__ = ('scope', 'path', 'method', 'args', 'headers', 'system', '_session', '_grant')
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.path = scope['path']
+        self.method = scope['method']
+        self.args = {key: values[-1] for key, values in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        self.system = None  # המערכת של האתר (נקבעת ב-resolve_system)
+        self._session = None
+        self._grant = None
+
+    @property
+    def session(self) -> dict:
+        """עוגיית הסשן של Flask, מפוענחת ונבדקת באותו מפתח"""
+        if self._session is None:
+            self._session = {}
+            cookie = parse_cookie(self.headers.get('cookie', '')).get(web_app.app.config['SESSION_COOKIE_NAME'])
+            if cookie:
+                max_age = int(web_app.app.permanent_session_lifetime.total_seconds())
+                try:
+                    self._session = _session_serializer.loads(cookie, max_age=max_age)
+                except BadSignature:
+                    pass
+        return self._session
+
+    @property
+    def grant(self) -> Grant:
+        """ההרשאה של המשתמש המחובר, פעם אחת לבקשה (אחרי refresh_system, כדי לראות שינויי תפקיד)"""
+        if self._grant is None:
+            username = self.session.get('username')
+            self._grant = self.system.grant(username) if username and self.system is not None else NO_GRANT
+        return self._grant
+
+    def int_arg(self, name: str, default: int = 0) -> int:
+        try:
+            return int(self.args.get(name, default))
+        except ValueError:
+            return default
+
+    async def json(self, receive) -> dict:
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+async def send_response(send, status: int, body: bytes = b'', content_type: str = 'application/json',
+                        headers: dict = None):
+    raw_headers = [(b'content-type', content_type.encode('latin-1')),
+                   (b'content-length', str(len(body)).encode('latin-1'))]
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode('latin-1'), value.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, status: int, data: dict, headers: dict = None):
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    await send_response(send, status, body, headers=headers)
+
+
+async def send_error(send, message: str, status: int):
+    await send_json(send, status, {'error': message})
+
+
+async def resolve_system(request: Request):
+    """המערכת של האתר לפי ה-Host; טעינת אתר שאינו בזיכרון רצה ב-thread"""
+    tenants = web_app.tenants
+    if tenants is None:
+        return web_app.system
+    tenant_id = tenants.tenant_from_host(request.headers.get('host', ''), web_app.DEFAULT_TENANT)
+    if tenant_id is None:
+        return None
+    if tenants.is_resident(tenant_id):
+        system = tenants.get(tenant_id)
+    else:
+        system = await io_executor.run(tenants.get, tenant_id)
+    if request.session.get('tenant', tenant_id) != tenant_id:
+        request._session = {}  # סשן של אתר אחר אינו תקף כאן
+    # פונקציות העזר של web_app ניגשות ל-web_app.system, שמצביע על המשתנה הזה
+    web_app.current_system.set(system)
+    return system
+
+
+async def basic_auth(request: Request, send) -> bool:
+    """Authorization: Basic ללקוחות בלי עוגייה (ראו web_app.basic_auth); False אם נשלחה שגיאה
+
+    הבדיקה רצה ב-thread של Flask, כמו טופס ההתחברות: היא יכולה לשנות את
+    המערכת (גיבוב מחדש של סיסמה ישנה, משתמש שנקרא מהמאגר). אימות שהצליח
+    לאחרונה נלקח מהמטמון, כך שרק הבקשה הראשונה של לקוח מחשבת גיבוב.
+    """
+    if 'username' in request.session or 'authorization' not in request.headers:
+        return True
+    username, password = web_app.basic_credentials(request.headers['authorization'])
+    if username is None:
+        return True
+    client = (request.scope.get('client') or ('',))[0]
+    identity, wait = await mutation_executor.run(web_app.check_credentials, request.system, username, password,
+                                                 client)
+    if wait:
+        await send_error(send, 'יותר מדי ניסיונות התחברות', 429)
+        return False
+    if identity is None:
+        await send_json(send, 401, {'error': 'שם משתמש או סיסמה שגויים'},
+                        headers={'WWW-Authenticate': 'Basic realm="shifts"'})
+        return False
+    request._session = identity
+    return True
+
+
+async def refresh_system(request: Request):
+    """סנכרון מול המאגר המשותף ב-thread של Flask (קריאת SQLite חוסמת ומשנה את המערכת)"""
+    if request.system.storage is not None:
+        await mutation_executor.run(request.system.refresh)
+
+
+async def send_cached(request: Request, send, entry):
+    """כמו web_app._api_response: ETag, 304 ו-gzip"""
+    headers = web_app.api_headers(entry)
+    if parse_etags(request.headers.get('if-none-match')).contains(entry.etag):
+        raw_headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()]
+        await send({'type': 'http.response.start', 'status': 304, 'headers': raw_headers})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    if entry.gzipped is not None and 'gzip' in parse_accept_header(request.headers.get('accept-encoding')):
+        headers['Content-Encoding'] = 'gzip'
+        await send_response(send, 200, entry.gzipped, headers=headers)
+        return
+    await send_response(send, 200, entry.body, headers=headers)
+
+
+# ---- נתיבים ----
+
+async def schedule_api(request: Request, receive, send, period: str, employee: str = None):
+    session = request.session
+    if 'username' not in session:
+        return await send_error(send, 'נדרשת התחברות', 401)
+    await refresh_system(request)
+    if employee is not None and not request.system.can_view_employee(session['username'], employee):
+        return await send_error(send, 'אין הרשאה', 403)
+    await send_cached(request, send, web_app.schedule_body(period, request.int_arg('offset'), employee))
+
+
+async def employee_schedule_api(request: Request, receive, send, employee: str, period: str):
+    await schedule_api(request, receive, send, period, employee)
+
+
+async def appeals_api(request: Request, receive, send, employee: str = None):
+    session = request.session
+    if 'username' not in session:
+        return await send_error(send, 'נדרשת התחברות', 401)
+    await refresh_system(request)
+    if employee is not None and not request.system.can_view_employee(session['username'], employee):
+        return await send_error(send, 'אין הרשאה', 403)
+    if employee is None:
+        entry = web_app.appeals_body(session['username'], request.grant, request.args.get('status', 'pending'))
+    else:
+        entry = web_app.appeals_body(employee)
+    await send_cached(request, send, entry)
+
+
+async def download_user_schedule(request: Request, receive, send):
+    """PDF אישי; הציור עצמו רץ במאגר התהליכים"""
+    session = request.session
+    if 'username' not in session:
+        return await send_response(send, 302, content_type='text/plain', headers={'Location': '/login'})
+    await refresh_system(request)
+    username = session['username']
+    schedule, title = web_app.user_schedule_for_pdf(username, request.args.get('view', 'week'),
+                                                    request.int_arg('week_offset'))
+    pdf = await cpu_executor.run(render_schedule_pdf_bytes, schedule, title, username)
+    await send_response(send, 200, pdf, content_type='application/pdf', headers={
+        'Content-Disposition': f'attachment; filename=schedule_{username}.pdf',
+    })
+
+
+async def auto_schedule(request: Request, receive, send):
+    """שיבוץ אוטומטי: בניית הבעיה בלולאה, הפתרון במאגר התהליכים, ההחלה ב-thread של Flask"""
+    session = request.session
+    if 'username' not in session:
+        return await send_error(send, 'נדרשת התחברות', 401)
+    await refresh_system(request)
+    if not request.grant.has(Permission.EDIT_SCHEDULE):
+        return await send_error(send, 'אין הרשאה', 403)
+    try:
+        scheduler, day_keys = web_app.plan_auto_schedule(await request.json(receive))
+    except (TypeError, ValueError, AttributeError):
+        return await send_error(send, 'בקשה לא תקינה', 400)
+    result = await cpu_executor.run(scheduler.solve)
+    success, errors = await mutation_executor.run(web_app.apply_week, request.system, session['username'],
+                                                  scheduler, day_keys, result)
+    await send_json(send, 200 if success else 409, web_app.auto_schedule_payload(result, success, errors))
+
+
+async def wait_disconnect(receive):
+    """המתנה לניתוק הלקוח (אחרי קריאת גוף הבקשה, אם יש)"""
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def events(request: Request, receive, send):
+    """כמו web_app.events, אבל כל חיבור פתוח הוא coroutine ולא thread"""
+    session = request.session
+    if 'username' not in session:
+        return await send_error(send, 'נדרשת התחברות', 401)
+
+    username = session['username']
+    is_admin = request.grant.has(Permission.EDIT_SCHEDULE)
+    feed = request.system.feed
+    seq, missed = feed.resume(request.headers.get('last-event-id') or request.args.get('last_event_id'))
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream; charset=utf-8'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+    ]})
+    await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        if missed:
+            chunk = f"id: {feed.event_id(seq)}\nevent: reset\ndata: {{}}\n\n"
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+        while True:
+            waiter = asyncio.ensure_future(
+                feed.wait_async(seq, username, is_admin, timeout=web_app.EVENTS_KEEPALIVE))
+            await asyncio.wait({waiter, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                waiter.cancel()
+                return
+            pending, seq, missed = waiter.result()
+            if missed:
+                chunk = f"id: {feed.event_id(seq)}\nevent: reset\ndata: {{}}\n\n"
+            elif not pending:
+                chunk = ": keepalive\n\n"
+            else:
+                chunk = ''.join(web_app.format_event(feed, event) for event in pending)
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+    finally:
+        disconnected.cancel()
+
+
+# (שיטה, תבנית, מטפל, שם הנתיב במדדים - כמו ב-Flask)
+ROUTES = [
+    ('GET', re.compile(r'^/api/schedule/(week|month)$'), schedule_api, '/api/schedule/<period>'),
+    ('GET', re.compile(r'^/api/employees/([^/]+)/schedule/(week|month)$'), employee_schedule_api,
+     '/api/employees/<username>/schedule/<period>'),
+    ('GET', re.compile(r'^/api/appeals$'), appeals_api, '/api/appeals'),
+    ('GET', re.compile(r'^/api/employees/([^/]+)/appeals$'), appeals_api, '/api/employees/<username>/appeals'),
+    ('GET', re.compile(r'^/download_user_schedule$'), download_user_schedule, '/download_user_schedule'),
+    ('POST', re.compile(r'^/api/schedule/auto$'), auto_schedule, '/api/schedule/auto'),
+    ('GET', re.compile(r'^/events$'), events, '/events'),
+]
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            cpu_executor.shutdown()
+            io_executor.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http':
+        for method, pattern, handler, route in ROUTES:
+            match = pattern.match(scope['path'])
+            if match and scope['method'] == method:
+                start = timer.perf_counter()
+                try:
+                    request = Request(scope)
+                    request.system = await resolve_system(request)
+                    if request.system is None:
+                        break  # אתר לא מוכר או מערכת שלא אותחלה - Flask יחזיר את השגיאה
+                    if not await basic_auth(request, send):
+                        return
+                    return await handler(request, receive, send, *match.groups())
+                except Overloaded:
+                    metrics.inc('asgi_overloaded_total', route=route)
+                    return await send_json(send, 503, {'error': 'השרת עמוס, נסו שוב'},
+                                           headers={'Retry-After': '1'})
+                finally:
+                    metrics.observe('http_request_duration_seconds', timer.perf_counter() - start,
+                                    route=route, method=method)
+    return await flask_app(scope, receive, send)
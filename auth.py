@@ -0,0 +1,193 @@
+"""אימות משתמשים: גיבוב סיסמאות, מטמון אימותים והגבלת ניסיונות התחברות
+
+סיסמאות נשמרות כגיבוב PBKDF2-SHA256 עם salt אקראי לכל משתמש, בפורמט
+pbkdf2_sha256$<iterations>$<salt>$<hash>. מספר האיטרציות (העלות) נשמר
+בגיבוב עצמו, כך שאפשר להעלות את העלות (PASSWORD_HASH_ITERATIONS)
+בלי לפסול סיסמאות קיימות - הן מגובבות מחדש בהתחברות המוצלחת הבאה.
+סיסמאות ישנות שנשמרו כטקסט גלוי עדיין מתקבלות, ומגובבות באותו אופן.
+
+בדיקת גיבוב אורכת במכוון עשיריות שנייה, ולכן:
+    VerifiedCredentialsCache - זוכר לזמן קצר צירופי משתמש/סיסמה שכבר
+        אומתו (למשל ב-HTTP Basic בכל בקשת API), בלי לשמור את הסיסמה עצמה
+    LoginRateLimiter - חוסם שם משתמש או כתובת אחרי ריבוי כישלונות
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time as timer
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+ALGORITHM = 'pbkdf2_sha256'
+# המלצת OWASP ל-PBKDF2-SHA256; כ-0.3 שניות לבדיקה במעבד טיפוסי
+DEFAULT_ITERATIONS = 600_000
+SALT_BYTES = 16
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+def default_iterations() -> int:
+    return int(os.getenv('PASSWORD_HASH_ITERATIONS', DEFAULT_ITERATIONS))
+
+
+def is_password_hash(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith(ALGORITHM + '$')
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    """גיבוב סיסמה עם salt חדש"""
+    iterations = iterations or default_iterations()
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password: str, stored: Optional[str]) -> bool:
+    """בדיקת סיסמה מול הערך השמור (גיבוב, או טקסט גלוי ממערכות ישנות)"""
+    if not stored or password is None:
+        return False
+    if not is_password_hash(stored):
+        return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+    try:
+        _, iterations, salt, digest = stored.split('$')
+        expected = _unb64(digest)
+        actual = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), _unb64(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+_dummy_hash = None
+
+
+def dummy_verify(password: str) -> bool:
+    """בדיקה מול גיבוב קבוע, לשם זמן תגובה זהה כשהמשתמש אינו קיים"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(secrets.token_hex(16))
+    return verify_password(password, _dummy_hash)
+
+
+def needs_rehash(stored: Optional[str], iterations: Optional[int] = None) -> bool:
+    """האם הערך השמור הוא טקסט גלוי או גיבוב בעלות שונה מהנוכחית"""
+    if not is_password_hash(stored):
+        return True
+    try:
+        return int(stored.split('$')[1]) != (iterations or default_iterations())
+    except (IndexError, ValueError):
+        return True
+
+
+class VerifiedCredentialsCache:
+    """מטמון חסום (LRU) של צירופי משתמש/סיסמה שאומתו לאחרונה
+
+    המפתח הוא HMAC של המשתמש והסיסמה עם מפתח אקראי של התהליך, כך
+    שהסיסמה לא נשמרת בזיכרון. הרשומה כוללת את הגיבוב השמור בזמן האימות:
+    שינוי סיסמה פוסל אותה מיד, גם לפני תום ttl.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0, clock=timer.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._key = secrets.token_bytes(32)
+        self._entries = OrderedDict()  # key -> (stored_hash, expires)
+        self._lock = threading.Lock()
+
+    def _entry_key(self, username: str, password: str) -> bytes:
+        message = username.encode('utf-8') + b'\0' + password.encode('utf-8')
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def check(self, username: str, password: str, stored: Optional[str]) -> bool:
+        """האם הצירוף אומת לאחרונה מול אותו ערך שמור"""
+        key = self._entry_key(username, password)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stored and entry[1] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False
+
+    def add(self, username: str, password: str, stored: str):
+        key = self._entry_key(username, password)
+        with self._lock:
+            self._entries[key] = (stored, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LoginRateLimiter:
+    """חלון זמן נע של כישלונות לכל מפתח (שם משתמש, כתובת IP)
+
+    אחרי max_failures כישלונות בתוך window שניות המפתח חסום עד שהכישלון
+    הישן ביותר יוצא מהחלון. התחברות מוצלחת מאפסת את המפתח. המונים
+    נשמרים בזיכרון התהליך - עם כמה workers כל אחד סופר בנפרד.
+    """
+
+    def __init__(self, max_failures: int = 5, window: float = 300.0, max_keys: int = 100_000,
+                 clock=timer.monotonic):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        self._failures: Dict[str, deque] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _recent(self, key: str, now: float) -> Optional[deque]:
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def retry_after(self, key: str) -> float:
+        """שניות עד שמותר לנסות שוב (0 = מותר עכשיו)"""
+        now = self.clock()
+        with self._lock:
+            failures = self._recent(key, now)
+            if failures is None or len(failures) < self.max_failures:
+                return 0.0
+            return failures[-self.max_failures] + self.window - now
+
+    def failure(self, key: str):
+        now = self.clock()
+        with self._lock:
+            failures = self._recent(key, now)
+            if failures is None:
+                failures = self._failures[key] = deque(maxlen=self.max_failures)
+            failures.append(now)
+            self._failures.move_to_end(key)
+            # חסימת גודל: מפתחות ישנים נשכחים ראשונים
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+
+    def success(self, key: str):
+        with self._lock:
+            self._failures.pop(key, None)
@@ -0,0 +1,135 @@
+"""הרשאות: תפקידים כמסכות ביטים, הרשאה אפקטיבית לכל משתמש ודקורטור לאכיפה
+
+כל תפקיד ב-ROLES הוא צירוף של ביטי Permission:
+    VIEW_SCHEDULE     צפייה בלוח (כל משתמש)
+    EDIT_SCHEDULE     שיבוץ, הסרה ושינוי שעות; צפייה בלוחות ובערעורים של עובדים
+    MANAGE_EMPLOYEES  הוספת עובדים, קביעת סיסמאות ודוחות שעות
+    ADMIN             תוכנית המשמרות ותפקידי המשתמשים
+
+מנהל משמרות (manager) יכול להיות מוגבל לימים בשבוע (0 = ראשון) ולצוותים:
+User.scope = {'days': [5, 6], 'teams': ['kitchen']}. רשימה ריקה או חסרה =
+ללא הגבלה באותו ממד. למשתמש עם ADMIN אין הגבלות.
+
+ההרשאה האפקטיבית (Grant) מחושבת פעם אחת לכל משתמש ונשמרת ב-GrantCache;
+הבדיקה עצמה היא בדיקת ביטים על מספר שלם.
+"""
+from datetime import date
+from functools import wraps
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+
+from shift_templates import weekday_index
+
+
+class Permission:
+    VIEW_SCHEDULE = 1
+    EDIT_SCHEDULE = 2
+    MANAGE_EMPLOYEES = 4
+    ADMIN = 8
+
+class Role:
+    def __init__(self, name, permissions):
+        self.name = name
+        self.permissions = permissions
+
+ROLES = {
+    'viewer': Role('viewer', Permission.VIEW_SCHEDULE),
+    'manager': Role('manager', Permission.VIEW_SCHEDULE | Permission.EDIT_SCHEDULE),
+    'admin': Role('admin', Permission.VIEW_SCHEDULE | Permission.EDIT_SCHEDULE |
+                          Permission.MANAGE_EMPLOYEES | Permission.ADMIN)
+}
+
+
+class Grant:
+    """ההרשאה האפקטיבית של משתמש: מסכה, ותחום (ימים/צוותים) או None ללא הגבלה"""
+    __slots__ = ('username', 'mask', 'days', 'teams')
+
+    def __init__(self, username: str, mask: int, days: Optional[FrozenSet[int]] = None,
+                 teams: Optional[FrozenSet[str]] = None):
+        self.username = username
+        self.mask = mask
+        self.days = days
+        self.teams = teams
+
+    def has(self, permission: int) -> bool:
+        return self.mask & permission == permission
+
+    @property
+    def scoped(self) -> bool:
+        return self.days is not None or self.teams is not None
+
+    def covers_day(self, day: date) -> bool:
+        return self.days is None or weekday_index(day) in self.days
+
+    def covers_team(self, team: str) -> bool:
+        return self.teams is None or team in self.teams
+
+    def can_view_employee(self, employee: str, team: str) -> bool:
+        """המשתמש עצמו, או בעל הרשאת עריכה שהעובד בצוות שבתחומו"""
+        return employee == self.username or (self.has(Permission.EDIT_SCHEDULE) and self.covers_team(team))
+
+
+NO_GRANT = Grant('', 0)
+
+
+def resolve_grant(user) -> Grant:
+    """חישוב ההרשאה מהתפקיד, מדגל is_admin ומהתחום של המשתמש"""
+    if user is None:
+        return NO_GRANT
+    role = ROLES.get(user.role) or ROLES['admin' if user.is_admin else 'viewer']
+    mask = role.permissions
+    if user.is_admin:
+        mask |= ROLES['admin'].permissions
+    if mask & Permission.ADMIN:
+        return Grant(user.username, mask)
+    scope = user.scope or {}
+    days = frozenset(int(day) for day in scope['days']) if scope.get('days') else None
+    teams = frozenset(scope['teams']) if scope.get('teams') else None
+    return Grant(user.username, mask, days, teams)
+
+
+class GrantCache:
+    """הרשאה אפקטיבית לכל משתמש, מחושבת פעם אחת
+
+    הרשומה תקפה כל עוד אובייקט המשתמש הוא אותו אובייקט: טעינה מחדש של
+    המשתמשים (מקובץ או מהמאגר) פוסלת אותה מעצמה. שינוי תפקיד במקום
+    מחייב invalidate.
+    """
+
+    def __init__(self, lookup: Callable):
+        self._lookup = lookup  # username -> User או None
+        self._grants: Dict[str, Tuple[object, Grant]] = {}
+
+    def get(self, username: Optional[str]) -> Grant:
+        user = self._lookup(username) if username else None
+        if user is None:
+            return NO_GRANT
+        entry = self._grants.get(username)
+        if entry is not None and entry[0] is user:
+            return entry[1]
+        grant = resolve_grant(user)
+        self._grants[username] = (user, grant)
+        return grant
+
+    def invalidate(self, username: Optional[str] = None):
+        if username is None:
+            self._grants.clear()
+        else:
+            self._grants.pop(username, None)
+
+
+def requires(permission: int, denied=False):
+    """דקורטור למתודות של המערכת שהארגומנט הראשון שלהן הוא המשתמש המבצע
+
+    בלי ההרשאה המתודה לא רצה ומוחזר denied (או denied() אם הוא פונקציה,
+    כדי לא לשתף רשימות בין קריאות). בדיקות תחום (יום/צוות) שתלויות
+    בארגומנטים נעשות בתוך המתודה.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, actor, *args, **kwargs):
+            if not self.grant(actor).has(permission):
+                return denied() if callable(denied) else denied
+            return method(self, actor, *args, **kwargs)
+        wrapper.permission = permission
+        return wrapper
+    return decorator
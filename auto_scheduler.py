@@ -0,0 +1,304 @@
+"""שיבוץ אוטומטי של עובדים למשמרות לפי אילוצים
+
+האלגוריתם בנוי משני שלבים:
+1. בנייה חמדנית - המשמרות עוברות לפי סדר כרונולוגי, ולכל משמרת נבחרים
+   העובדים הכשירים שהכי רחוקים מיעד השעות שלהם.
+2. חיפוש מקומי - העברת משמרות מעובדים שעברו את היעד לעובדים שמתחתיו,
+   כל עוד ההעברה חוקית ומשפרת את הציון. הציון מחושב באופן מצטבר, כך
+   שכל מהלך נבדק ב-O(1).
+
+אילוצים: זמינות עובדים, משמרת אחת ביום, מקסימום שעות לשבוע (שבוע
+ישראלי), מנוחה מינימלית בין סוף משמרת לתחילת הבאה (כולל משמרות שחוצות
+חצות) ויעדי שעות להוגנות.
+"""
+import heapq
+import time as timer
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from authorization import Permission
+from conflicts import MAX_SHIFT_MINUTES, IntervalIndex, shift_interval
+from shift_management_system import ShiftManagementSystem, parse_day_key, week_start
+
+SlotKey = Tuple[date, int]
+
+
+class ShiftSlot:
+    """משמרת קונקרטית שצריך לאייש"""
+    def __init__(self, day: date, shift_index: int, start_time: time, end_time: time, required: int):
+        self.day = day
+        self.shift_index = shift_index
+        self.required = required
+        self.start = datetime.combine(day, start_time)
+        self.end = datetime.combine(day, end_time)
+        if self.end <= self.start:
+            # משמרת שחוצה את חצות
+            self.end += timedelta(days=1)
+        self.hours = (self.end - self.start).total_seconds() / 3600
+        self.week = week_start(day)
+        # קטע הזמן המוחלט, לבדיקה מול משמרות קיימות (ראו conflicts.py)
+        self.interval = shift_interval(day, start_time.hour * 60 + start_time.minute,
+                                       end_time.hour * 60 + end_time.minute)
+
+    @property
+    def key(self) -> SlotKey:
+        return (self.day, self.shift_index)
+
+
+class ScheduleResult:
+    """תוצאת השיבוץ"""
+    def __init__(self, assignments: Dict[SlotKey, List[str]], unfilled: Dict[SlotKey, int],
+                 hours: Dict[str, float], score: float, moves: int):
+        self.assignments = assignments  # (תאריך, מספר משמרת) -> עובדים
+        self.unfilled = unfilled  # (תאריך, מספר משמרת) -> מספר מקומות חסרים
+        self.hours = hours  # עובד -> סך שעות
+        self.score = score
+        self.moves = moves  # מספר מהלכי חיפוש מקומי שבוצעו
+
+
+class AutoScheduler:
+    """פותר שיבוץ מבוסס אילוצים"""
+
+    UNFILLED_PENALTY = 1_000_000.0
+
+    def __init__(self, employees: Iterable[str], slots: Iterable[ShiftSlot],
+                 max_hours_per_week: float = 42.0, min_rest_hours: float = 8.0,
+                 unavailable: Optional[Dict[str, Set[Union[date, SlotKey]]]] = None,
+                 target_hours: Optional[Dict[str, float]] = None,
+                 fixed: Optional[Dict[SlotKey, List[str]]] = None,
+                 busy: Optional[IntervalIndex] = None,
+                 time_limit: float = 5.0):
+        self.employees = list(employees)
+        self.slots = sorted(slots, key=lambda slot: (slot.start, slot.shift_index))
+        self.slot_by_key = {slot.key: slot for slot in self.slots}
+        self.max_hours_per_week = max_hours_per_week
+        self.min_rest = timedelta(hours=min_rest_hours)
+        self.min_rest_minutes = int(min_rest_hours * 60)
+        self.unavailable = unavailable or {}
+        self.fixed = fixed or {}
+        self.busy = busy  # משמרות קיימות של העובדים מחוץ לבעיה (למשל השבוע הקודם)
+        self.time_limit = time_limit
+
+        if target_hours is None:
+            # ברירת מחדל: חלוקה שווה של כל שעות העבודה הנדרשות
+            total = sum(slot.hours * slot.required for slot in self.slots)
+            share = total / len(self.employees) if self.employees else 0.0
+            target_hours = {employee: share for employee in self.employees}
+        self.target = {employee: target_hours.get(employee, 0.0) for employee in self.employees}
+
+        # מצב השיבוץ
+        self.assigned: Dict[SlotKey, List[str]] = {slot.key: [] for slot in self.slots}
+        self.by_day: Dict[str, Dict[date, ShiftSlot]] = {employee: {} for employee in self.employees}
+        self.hours: Dict[str, float] = {employee: 0.0 for employee in self.employees}
+        self.week_hours: Dict[Tuple[str, date], float] = {}
+
+    # ---- אילוצים ----
+
+    def can_assign(self, employee: str, slot: ShiftSlot) -> bool:
+        """בדיקה האם ניתן לשבץ את העובד למשמרת מבלי להפר אילוץ"""
+        days = self.by_day[employee]
+        if slot.day in days:
+            return False
+
+        blocked = self.unavailable.get(employee)
+        if blocked and (slot.day in blocked or slot.key in blocked):
+            return False
+
+        if self.week_hours.get((employee, slot.week), 0.0) + slot.hours > self.max_hours_per_week:
+            return False
+
+        previous = days.get(slot.day - timedelta(days=1))
+        if previous is not None and slot.start - previous.end < self.min_rest:
+            return False
+        following = days.get(slot.day + timedelta(days=1))
+        if following is not None and following.start - slot.end < self.min_rest:
+            return False
+        if self.busy is not None and self.busy.conflict(employee, slot.interval, self.min_rest_minutes):
+            return False
+        return True
+
+    def _assign(self, employee: str, slot: ShiftSlot):
+        self.assigned[slot.key].append(employee)
+        self.by_day[employee][slot.day] = slot
+        self.hours[employee] += slot.hours
+        week_key = (employee, slot.week)
+        self.week_hours[week_key] = self.week_hours.get(week_key, 0.0) + slot.hours
+
+    def _unassign(self, employee: str, slot: ShiftSlot):
+        self.assigned[slot.key].remove(employee)
+        del self.by_day[employee][slot.day]
+        self.hours[employee] -= slot.hours
+        self.week_hours[(employee, slot.week)] -= slot.hours
+
+    # ---- ציון ----
+
+    def _deviation(self, employee: str, hours: float) -> float:
+        return (hours - self.target[employee]) ** 2
+
+    def score(self) -> float:
+        """ציון כולל (נמוך = טוב): סטייה ריבועית מיעד השעות + קנס על מקומות חסרים"""
+        fairness = sum(self._deviation(employee, hours) for employee, hours in self.hours.items())
+        missing = sum(slot.required - len(self.assigned[slot.key]) for slot in self.slots)
+        return fairness + missing * self.UNFILLED_PENALTY
+
+    def _move_delta(self, donor: str, receiver: str, slot: ShiftSlot) -> float:
+        """שינוי הציון בהעברת משמרת מעובד לעובד - O(1)"""
+        donor_hours = self.hours[donor]
+        receiver_hours = self.hours[receiver]
+        return (self._deviation(donor, donor_hours - slot.hours)
+                - self._deviation(donor, donor_hours)
+                + self._deviation(receiver, receiver_hours + slot.hours)
+                - self._deviation(receiver, receiver_hours))
+
+    # ---- פתרון ----
+
+    def solve(self) -> ScheduleResult:
+        """הרצת הבנייה החמדנית והחיפוש המקומי"""
+        deadline = timer.perf_counter() + self.time_limit
+
+        for key, employees in self.fixed.items():
+            slot = self.slot_by_key.get(key)
+            if slot is None:
+                continue
+            for employee in employees:
+                if employee in self.hours and employee not in self.assigned[key]:
+                    self._assign(employee, slot)
+
+        self._construct()
+        moves = self._improve(deadline)
+
+        unfilled = {
+            slot.key: slot.required - len(self.assigned[slot.key])
+            for slot in self.slots if len(self.assigned[slot.key]) < slot.required
+        }
+        return ScheduleResult(
+            assignments={key: list(employees) for key, employees in self.assigned.items()},
+            unfilled=unfilled,
+            hours=dict(self.hours),
+            score=self.score(),
+            moves=moves,
+        )
+
+    def _construct(self):
+        """בנייה חמדנית: לכל משמרת, העובדים הכשירים עם הגירעון הגדול ביותר"""
+        for slot in self.slots:
+            missing = slot.required - len(self.assigned[slot.key])
+            if missing <= 0:
+                continue
+            candidates = (employee for employee in self.employees if self.can_assign(employee, slot))
+            chosen = heapq.nsmallest(
+                missing, candidates, key=lambda employee: self.hours[employee] - self.target[employee]
+            )
+            for employee in chosen:
+                self._assign(employee, slot)
+
+    def _improve(self, deadline: float) -> int:
+        """חיפוש מקומי: העברת משמרות מעובדים מעל היעד לעובדים מתחתיו"""
+        moves = 0
+        fixed_pairs = {(employee, key) for key, employees in self.fixed.items() for employee in employees}
+        improved = True
+        while improved and timer.perf_counter() < deadline:
+            improved = False
+            surplus = sorted(self.employees, key=lambda e: self.target[e] - self.hours[e])
+            receivers = [e for e in reversed(surplus) if self.hours[e] < self.target[e]]
+            for donor in surplus:
+                if self.hours[donor] <= self.target[donor] or timer.perf_counter() >= deadline:
+                    break
+                for slot in list(self.by_day[donor].values()):
+                    if (donor, slot.key) in fixed_pairs:
+                        continue
+                    receiver = self._best_receiver(donor, slot, receivers)
+                    if receiver is None:
+                        continue
+                    self._unassign(donor, slot)
+                    self._assign(receiver, slot)
+                    moves += 1
+                    improved = True
+                    break
+        return moves
+
+    def _best_receiver(self, donor: str, slot: ShiftSlot, receivers: List[str]) -> Optional[str]:
+        """העובד הראשון (לפי גירעון) שיכול לקבל את המשמרת ומשפר את הציון"""
+        for receiver in receivers:
+            if self.hours[receiver] >= self.target[receiver]:
+                continue
+            if self._move_delta(donor, receiver, slot) >= 0:
+                continue
+            if self.can_assign(receiver, slot):
+                return receiver
+        return None
+
+
+def build_slots(days: Iterable[date], shift_hours: List[Tuple[time, time]],
+                requirements: Union[Dict[int, int], Callable[[date, int], int]]) -> List[ShiftSlot]:
+    """יצירת משמרות לפי תבנית שעות ודרישות איוש (לפי מספר משמרת או פונקציה)"""
+    slots = []
+    for day in days:
+        for index, (start, end) in enumerate(shift_hours):
+            required = requirements(day, index) if callable(requirements) else requirements.get(index, 0)
+            slots.append(ShiftSlot(day, index, start, end, required))
+    return slots
+
+
+def plan_week(system: ShiftManagementSystem,
+              requirements: Union[Dict[int, int], Callable[[date, int], int]],
+              employees: Optional[Iterable[str]] = None,
+              **constraints) -> Tuple[AutoScheduler, Dict[date, str]]:
+    """בניית בעיית השיבוץ לשבוע הנוכחי, בלי לשנות את המערכת
+
+    מחזיר את הפותר (אפשר להריץ את solve בתהליך נפרד) ומיפוי תאריך -> מפתח יום.
+    שיבוצים קיימים נשמרים כשיבוצים קבועים. ברירת המחדל לעובדים היא מי שאינו
+    עורך את הלוח, ולמנוחה המינימלית - זו של המערכת. משמרות קיימות סביב השבוע
+    (למשל משמרת לילה במוצאי שבת הקודמת) מועברות לפותר, כדי שהשיבוץ לא
+    ייפסל בהחלה (assign_shifts) בגלל מנוחה או חפיפה.
+    """
+    if employees is None:
+        employees = [username for username in system.users
+                     if not system.grant(username).has(Permission.EDIT_SCHEDULE)]
+    constraints.setdefault('min_rest_hours', system.min_rest_minutes / 60)
+
+    slots = []
+    fixed = {}
+    day_keys = {}
+    for day_key, shifts in system.week_shifts().items():
+        day = parse_day_key(day_key)
+        day_keys[day] = day_key
+        for index, shift in enumerate(shifts):
+            required = requirements(day, index) if callable(requirements) else requirements.get(index, 0)
+            slots.append(ShiftSlot(day, index, shift.start_time, shift.end_time,
+                                   max(required, len(shift.employees))))
+            if shift.employees:
+                fixed[(day, index)] = list(shift.employees)
+
+    if slots and 'busy' not in constraints:
+        reach = MAX_SHIFT_MINUTES + int(constraints['min_rest_hours'] * 60)
+        constraints['busy'] = system.conflict_index().window(
+            min(slot.interval[0] for slot in slots) - reach, max(slot.interval[1] for slot in slots) + reach)
+    return AutoScheduler(employees, slots, fixed=fixed, **constraints), day_keys
+
+
+def apply_week(system: ShiftManagementSystem, admin_username: str, scheduler: AutoScheduler,
+               day_keys: Dict[date, str], result: ScheduleResult) -> Tuple[bool, list]:
+    """החלת תוצאת השיבוץ על המערכת (רק שיבוצים חדשים, באצווה אחת)"""
+    fixed = scheduler.fixed
+    return system.assign_shifts(admin_username, [
+        {'day': day_keys[day], 'shift_index': index, 'employee': employee}
+        for (day, index), assigned in result.assignments.items()
+        for employee in assigned if employee not in fixed.get((day, index), [])
+    ])
+
+
+def schedule_week(system: ShiftManagementSystem, admin_username: str,
+                  requirements: Union[Dict[int, int], Callable[[date, int], int]],
+                  employees: Optional[Iterable[str]] = None,
+                  **constraints) -> Tuple[ScheduleResult, bool, list]:
+    """שיבוץ אוטומטי של משמרות השבוע הנוכחי והחלתו על המערכת
+
+    שיבוצים קיימים נשמרים כשיבוצים קבועים. constraints מועברים ל-AutoScheduler.
+    מחזיר (תוצאה, הצלחה, שגיאות) - ההצלחה והשגיאות מ-apply_week; כשההחלה
+    נכשלת (למשל אין הרשאה או התנגשות) שום שיבוץ לא נשמר.
+    """
+    scheduler, day_keys = plan_week(system, requirements, employees, **constraints)
+    result = scheduler.solve()
+    success, errors = apply_week(system, admin_username, scheduler, day_keys, result)
+    return result, success, errors
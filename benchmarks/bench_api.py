@@ -0,0 +1,58 @@
+"""מדידת תפוקת ה-API (בקשות לשנייה) עם לקוח הבדיקה של Flask
+
+שלושה מסלולים: תשובה מלאה, תשובה דחוסה ובקשה מותנית שמחזירה 304.
+"""
+import logging
+import os
+import sys
+import time as timer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import web_app
+from generators import fill_current_week, make_system
+from shift_management_system import ShiftManagementSystem
+
+EMPLOYEES = 300
+REQUESTS = 2_000
+
+
+def build_system() -> ShiftManagementSystem:
+    """מערכת עם שבוע מאויש במלואו"""
+    return fill_current_week(make_system(EMPLOYEES))
+
+
+def measure(client, label: str, headers: dict, expected: int):
+    response = client.get('/api/schedule/week', headers=headers)
+    assert response.status_code == expected, response.status_code
+    start = timer.perf_counter()
+    for _ in range(REQUESTS):
+        client.get('/api/schedule/week', headers=headers)
+    elapsed = timer.perf_counter() - start
+    print(f"{label:<14} {REQUESTS / elapsed:8.0f} req/s  ({len(response.data)} bytes)")
+    return response
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    web_app.system = build_system()
+    client = web_app.app.test_client()
+    with client.session_transaction() as session:
+        session['username'] = 'admin'
+        session['is_admin'] = True
+
+    full = measure(client, "200 identity", {}, 200)
+    measure(client, "200 gzip", {'Accept-Encoding': 'gzip'}, 200)
+    measure(client, "304 not mod.", {'If-None-Match': full.headers['ETag']}, 304)
+
+    # מדידה ללא מטמון: כל בקשה אחרי שינוי מצב
+    start = timer.perf_counter()
+    for _ in range(200):
+        web_app.system.version += 1
+        client.get('/api/schedule/week')
+    elapsed = timer.perf_counter() - start
+    print(f"{'200 rebuild':<14} {200 / elapsed:8.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""מדידת זמן חיפוש ערעורים כתלות במספר הערעורים במאגר"""
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shift_management_system import AppealStore, ShiftAppeal, ShiftManagementSystem
+
+DAYS = ['ראשון', 'שני', 'שלישי', 'רביעי', 'חמישי', 'שישי', 'שבת']
+
+
+def day_key(index: int) -> str:
+    """מפתח יום בפורמט של weekly_shifts"""
+    current = date(2020, 1, 5) + timedelta(days=index)
+    return f"{DAYS[(current.weekday() + 1) % 7]} {current.strftime('%d/%m/%Y')}"
+
+
+def build_system(appeal_count: int, employee_count: int = 500) -> ShiftManagementSystem:
+    """יצירת מערכת עם מאגר ערעורים סינתטי"""
+    system = ShiftManagementSystem()
+    store = AppealStore()
+    for i in range(appeal_count):
+        appeal = ShiftAppeal(f"emp{i % employee_count}", day_key(i // employee_count), i % 2, "סיבה")
+        store.add(appeal)
+        if i % 3 == 0:
+            store.set_status(appeal.appeal_id, 'rejected', 'לא')
+    system.appeals = store
+    return system
+
+
+def main():
+    print(f"{'appeals':>10} {'has_active_appeal us':>21} {'get by id us':>13}")
+    number = 10_000
+    for count in (1_000, 10_000, 100_000, 1_000_000):
+        system = build_system(count)
+        day = day_key(count // 500 // 2)
+        active = timeit.timeit(lambda: system.has_active_appeal('emp7', day, 1), number=number)
+        by_id = timeit.timeit(lambda: system.appeals.get(count // 2), number=number)
+        print(f"{count:>10} {active / number * 1e6:>21.3f} {by_id / number * 1e6:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""השוואת השהיה (p50/p99) בין מצב WSGI (gunicorn sync) למצב ASGI (uvicorn)
+
+500 לקוחות מקבילים שולחים בקשות API ללוח השבועי, וחלק קטן מהם מוריד PDF
+אישי. שני השרתים רצים עם אותו מספר workers ואותו מאגר SQLite.
+
+    python benchmarks/bench_asgi.py [--clients 500] [--duration 15] [--workers 2]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time as timer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SECRET_KEY = 'bench-secret'
+EMPLOYEES = 300
+PDF_SHARE = 0.05
+
+SERVERS = {
+    'wsgi': lambda port, workers: ['gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+                                   '--log-level', 'warning', 'wsgi:app'],
+    'asgi': lambda port, workers: ['uvicorn', 'asgi:app', '--workers', str(workers), '--port', str(port),
+                                   '--log-level', 'warning', '--no-access-log'],
+}
+
+
+def build_database(path: str):
+    """מאגר עם שבוע מאויש במלואו"""
+    from generators import employee_names, fill_current_week, make_system
+    from storage import SQLiteStorage
+
+    system = fill_current_week(make_system(EMPLOYEES))
+    system.attach_storage(SQLiteStorage(path))
+    return employee_names(EMPLOYEES)
+
+
+def session_cookie(username: str) -> str:
+    os.environ['SECRET_KEY'] = SECRET_KEY
+    import web_app
+    return web_app.app.session_interface.get_signing_serializer(web_app.app).dumps({'username': username})
+
+
+async def request(port: int, path: str, cookie: str) -> int:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nCookie: session={cookie}\r\n"
+                     f"Connection: close\r\n\r\n".encode('latin-1'))
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def client(port: int, cookies: list, deadline: float, latencies: list, errors: list):
+    rng = random.Random()
+    while timer.perf_counter() < deadline:
+        if rng.random() < PDF_SHARE:
+            path = '/download_user_schedule'
+        else:
+            path = '/api/schedule/week'
+        start = timer.perf_counter()
+        try:
+            status = await request(port, path, rng.choice(cookies))
+        except OSError:
+            status = None
+        if status == 200:
+            latencies.append(timer.perf_counter() - start)
+        else:
+            errors.append(status)
+
+
+async def load(port: int, clients: int, duration: float, cookies: list):
+    latencies, errors = [], []
+    deadline = timer.perf_counter() + duration
+    await asyncio.gather(*(client(port, cookies, deadline, latencies, errors) for _ in range(clients)))
+    return latencies, errors
+
+
+def wait_ready(port: int, timeout: float = 20.0):
+    deadline = timer.perf_counter() + timeout
+    while timer.perf_counter() < deadline:
+        try:
+            status = asyncio.run(request(port, '/login', ''))
+            if status == 200:
+                return
+        except OSError:
+            pass
+        timer.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    directory = tempfile.mkdtemp()
+    database = os.path.join(directory, 'bench.db')
+    employees = build_database(database)
+    cookies = [session_cookie(employee) for employee in employees[:50]]
+    env = dict(os.environ, SECRET_KEY=SECRET_KEY, DATABASE_PATH=database)
+
+    try:
+        for port, (mode, command) in enumerate(SERVERS.items(), start=8311):
+            if shutil.which(command(port, 1)[0]) is None:
+                print(f"{mode}: {command(port, 1)[0]} is not installed, skipping")
+                continue
+            server = subprocess.Popen(command(port, args.workers), cwd=ROOT, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_ready(port)
+                latencies, errors = asyncio.run(load(port, args.clients, args.duration, cookies))
+            finally:
+                server.terminate()
+                server.wait()
+            latencies.sort()
+            if not latencies:
+                print(f"{mode}: no successful requests ({len(errors)} errors)")
+                continue
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{mode}: {len(latencies) / args.duration:7.0f} req/s  "
+                  f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms  "
+                  f"errors {len(errors)}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""מדידת זמן ריצה ואיכות של השיבוץ האוטומטי על רוסטרים סינתטיים"""
+import os
+import random
+import sys
+import time as timer
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auto_scheduler import AutoScheduler, build_slots
+
+TWO_SHIFTS = [(time(8, 0), time(16, 0)), (time(16, 0), time(23, 0))]
+THREE_SHIFTS = [(time(7, 0), time(15, 0)), (time(15, 0), time(23, 0)), (time(23, 0), time(7, 0))]
+
+
+def run(name: str, employee_count: int, days: int, shift_hours, per_shift: int,
+        unavailable_ratio: float, seed: int = 1):
+    """הרצת תרחיש אחד והדפסת זמן, מקומות חסרים ופיזור שעות"""
+    rng = random.Random(seed)
+    employees = [f"emp{i}" for i in range(employee_count)]
+    first = date(2026, 11, 1)
+    dates = [first + timedelta(days=i) for i in range(days)]
+    slots = build_slots(dates, shift_hours, {i: per_shift for i in range(len(shift_hours))})
+    unavailable = {
+        employee: {day for day in dates if rng.random() < unavailable_ratio}
+        for employee in employees
+    }
+
+    start = timer.perf_counter()
+    result = AutoScheduler(employees, slots, unavailable=unavailable, time_limit=10).solve()
+    elapsed = timer.perf_counter() - start
+
+    hours = sorted(result.hours.values())
+    print(f"{name:<28} {elapsed:>7.2f}s  unfilled={sum(result.unfilled.values()):<5} "
+          f"hours min/max={hours[0]:.0f}/{hours[-1]:.0f}  moves={result.moves}")
+
+
+def main():
+    run("50 emp, 7 days, 2 shifts", 50, 7, TWO_SHIFTS, 10, 0.1)
+    run("500 emp, 31 days, 2 shifts", 500, 31, TWO_SHIFTS, 100, 0.1)
+    run("500 emp, 31 days, 3 shifts", 500, 31, THREE_SHIFTS, 60, 0.15)
+    run("1000 emp, 31 days, 3 shifts", 1000, 31, THREE_SHIFTS, 120, 0.15)
+
+
+if __name__ == "__main__":
+    main()
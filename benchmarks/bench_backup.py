@@ -0,0 +1,66 @@
+"""גיבוי מצטבר לעומת גיבוי מלא, על היסטוריה רב-שנתית
+
+נמדדים: הגיבוי הראשון (כל הקטעים), גיבוי אחרי שינוי אחד בשבוע הנוכחי
+(רק הליבה נכתבת מחדש), סבב בלי שינוי (לא נכתב דבר), וגיבוי מלא דחוס
+אחד של קובץ JSON לשם השוואה. זה הזמן שה-thread של התחזוקה עובד, לא זמן בקשה.
+
+    python benchmarks/bench_backup.py [--employees 300] [--years 3]
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time as timer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--employees', type=int, default=300)
+    parser.add_argument('--years', type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    from generators import ADMIN, fill_current_week, fill_history, make_system
+    from maintenance import write_backup
+
+    system = fill_current_week(fill_history(make_system(args.employees), args.years, per_shift=args.employees // 10))
+    directory = tempfile.mkdtemp()
+    try:
+        backups = os.path.join(directory, 'backups')
+
+        def timed_backup(label: str):
+            start = timer.perf_counter()
+            before = directory_size(backups) if os.path.isdir(backups) else 0
+            path = write_backup(backups, system.backup_data(), system.get_israel_time())
+            elapsed = timer.perf_counter() - start
+            written = directory_size(backups) - before
+            print(f"{label:<24} {elapsed * 1000:9.1f} ms  {written / 1024:9.1f} KiB written"
+                  f"{'' if path else '  (skipped)'}")
+
+        timed_backup('first backup')
+        day = next(iter(system.weekly_shifts))
+        system.remove_from_shift(ADMIN, day, 0, system.weekly_shifts[day][0].employees[0])
+        timed_backup('after one change')
+        timed_backup('no change')
+
+        start = timer.perf_counter()
+        full = gzip.compress(json.dumps(system.backup_data(), ensure_ascii=False).encode('utf-8'), 6)
+        print(f"{'full gzip snapshot':<24} {(timer.perf_counter() - start) * 1000:9.1f} ms"
+              f"  {len(full) / 1024:9.1f} KiB written")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
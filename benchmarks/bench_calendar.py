@@ -0,0 +1,113 @@
+"""עלות חישובי הזמן והתאריכים בבניית לוח, לפני ואחרי israel_calendar
+
+נמדדים בנפרד: השעה בישראל, תווית יום, תחילת שבוע ותאריך עברי - המימוש
+הקודם (ייבוא ובניית אזור הזמן, strftime וניסיון ייבוא בכל קריאה) לעומת
+הנוכחי - ובניית לוח חודשי מלא בלי מטמון התצוגות, בשני המימושים.
+
+    python benchmarks/bench_calendar.py [--calls 100000]
+"""
+import argparse
+import logging
+import os
+import sys
+import time as timer
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MONTH_BUILDS = 200
+
+
+def old_israel_time():
+    try:
+        import pytz
+        return datetime.now(pytz.timezone('Asia/Jerusalem'))
+    except ImportError:
+        return datetime.now()
+
+
+def old_day_label(day: date, with_year: bool = True) -> str:
+    from israel_calendar import HEBREW_DAYS
+    return f"{HEBREW_DAYS[(day.weekday() + 1) % 7]} {day.strftime('%d/%m/%Y' if with_year else '%d/%m')}"
+
+
+def old_week_start(day: date) -> date:
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+
+def old_hebrew_date(day: date) -> str:
+    try:
+        from hebrew_dates import GregorianDate, HebrewDate
+        return HebrewDate.from_gregorian(GregorianDate(day.year, day.month, day.day)).hebrew_date_string()
+    except ImportError:
+        return day.strftime('%d/%m/%Y')
+
+
+def per_call(fn, args: list, calls: int) -> float:
+    """זמן ממוצע לקריאה במיקרו-שניות"""
+    count = len(args)
+    start = timer.perf_counter()
+    for number in range(calls):
+        fn(args[number % count])
+    return (timer.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=100_000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    import israel_calendar
+    import shift_management_system
+    from generators import fill_current_week, make_system
+    from shift_templates import hebrew_holiday
+
+    today = israel_calendar.israel_now().date()
+    days = [today + timedelta(days=offset) for offset in range(-60, 60)]
+    israel_calendar.day_window()  # בניית החלון אינה חלק מהמדידה
+    print(f"{'':<14} {'before':>9} {'after':>9}   (us per call)")
+    rows = (
+        ('israel time', old_israel_time, israel_calendar.israel_now, [None]),
+        ('day label', old_day_label, israel_calendar.day_label, days),
+        ('week start', old_week_start, israel_calendar.week_start, days),
+        ('hebrew date', old_hebrew_date, israel_calendar.hebrew_date, days),
+    )
+    for label, old, new, values in rows:
+        if values == [None]:
+            before = per_call(lambda _: old(), values, args.calls)
+            after = per_call(lambda _: new(), values, args.calls)
+        else:
+            before = per_call(old, values, args.calls)
+            after = per_call(new, values, args.calls)
+        print(f"{label:<14} {before:9.3f} {after:9.3f}")
+
+    system = fill_current_week(make_system(300))
+
+    def build_months() -> float:
+        start = timer.perf_counter()
+        for number in range(MONTH_BUILDS):
+            system.view_cache.clear()
+            system.get_monthly_schedule(number % 3)
+        return (timer.perf_counter() - start) / MONTH_BUILDS * 1000
+
+    after = build_months()
+    new_label, new_week_start = shift_management_system.format_day_label, shift_management_system.week_start
+    shift_management_system.format_day_label = old_day_label
+    shift_management_system.week_start = old_week_start
+    system.clock = old_israel_time
+    system.is_holiday = lambda day: (day in system.shift_plan.holidays
+                                     or hebrew_holiday(old_hebrew_date(day)) is not None)
+    try:
+        before = build_months()
+    finally:
+        shift_management_system.format_day_label = new_label
+        shift_management_system.week_start = new_week_start
+        system.clock = None
+        del system.is_holiday
+    print(f"{'month view':<14} {before * 1000:9.1f} {after * 1000:9.1f}   (us per uncached build)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""השוואת זמן עלייה (cold start) בין קובץ JSON לתמונת מצב בינארית (.snap)
+
+לכל פורמט נמדדים: טעינת הקובץ והצגת הלוח השבועי הראשון (מה שעובד
+מחכה לו עד הבקשה הראשונה), ובנפרד גישה מלאה להיסטוריה ולערעורים -
+העבודה שהפורמט הבינארי דוחה עד שהיא באמת נדרשת. כל מדידה רצה בתהליך
+חדש כדי שמטמוני הזיכרון של המדידה הקודמת לא ישפיעו עליה.
+
+    python benchmarks/bench_cold_start.py [--employees 300] [--years 3] [--appeals 5000]
+"""
+import argparse
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPEAT = 5
+
+MEASURE = '''
+import logging, sys, time
+sys.path.insert(0, {root!r})
+logging.disable(logging.CRITICAL)
+from shift_management_system import ShiftManagementSystem
+start = time.perf_counter()
+system = ShiftManagementSystem()
+system.load_from_file({path!r})
+system.get_weekly_schedule()
+ready = time.perf_counter()
+for day, shifts in system.shifts_history.items():
+    pass
+system.get_pending_appeals()
+print(ready - start, time.perf_counter() - ready)
+'''
+
+
+def measure(path: str) -> tuple:
+    """החציון של (זמן עד לוח ראשון, זמן גישה מלאה) על פני REPEAT תהליכים"""
+    ready, full = [], []
+    for _ in range(REPEAT):
+        output = subprocess.run([sys.executable, '-c', MEASURE.format(root=ROOT, path=path)],
+                                capture_output=True, text=True, check=True).stdout
+        first, rest = map(float, output.split())
+        ready.append(first)
+        full.append(rest)
+    return sorted(ready)[REPEAT // 2], sorted(full)[REPEAT // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--employees', type=int, default=300)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--appeals', type=int, default=5_000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    from generators import realistic_system
+    system = realistic_system(args.employees, args.years, args.appeals)
+    directory = tempfile.mkdtemp()
+    try:
+        paths = {'json': os.path.join(directory, 'schedule.json'),
+                 'snap': os.path.join(directory, 'schedule.snap')}
+        for path in paths.values():
+            system.save_to_file(path)
+
+        print(f"{'format':<6} {'size':>10} {'first view':>12} {'full access':>12}")
+        for label, path in paths.items():
+            ready, full = measure(path)
+            print(f"{label:<6} {os.path.getsize(path) / 1024:8.0f} KB {ready * 1000:9.1f} ms "
+                  f"{full * 1000:9.1f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
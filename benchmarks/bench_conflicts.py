@@ -0,0 +1,76 @@
+"""בדיקת התנגשויות בשיבוץ וביקורת היסטוריה מלאה
+
+נמדדים: בניית אינדקס הקטעים (פעם אחת, בשיבוץ הראשון), בדיקת התנגשות
+בודדת מול האינדקס לעומת מעבר על כל משמרות העובד, שיבוץ והסרה כולל
+הבדיקה, וביקורת כל ההיסטוריה במעבר אחד.
+
+    python benchmarks/bench_conflicts.py [--employees 300] [--years 3]
+"""
+import argparse
+import logging
+import os
+import sys
+import time as timer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CHECKS = 10_000
+
+
+def naive_conflict(system, employee: str, interval) -> bool:
+    """אותה בדיקה במעבר על כל המשמרות, בלי אינדקס"""
+    from conflicts import classify, shift_interval
+    for current_date, start, end, employees in system._all_shifts():
+        if employee in employees:
+            existing = shift_interval(current_date, start, end)
+            first, second = sorted((existing, interval))
+            if classify(first, second, system.min_rest_minutes) is not None:
+                return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--employees', type=int, default=300)
+    parser.add_argument('--years', type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    from conflicts import shift_interval
+    from generators import ADMIN, fill_history, make_system
+    from shift_management_system import parse_day_key
+
+    system = fill_history(make_system(args.employees), args.years, per_shift=args.employees // 10)
+    days = list(system.weekly_shifts)
+
+    start = timer.perf_counter()
+    index = system.conflict_index()
+    print(f"build index          {(timer.perf_counter() - start) * 1000:9.1f} ms ({len(index)} intervals)")
+
+    shift = system.weekly_shifts[days[0]][0]
+    interval = shift_interval(parse_day_key(days[0]), shift.start_minutes, shift.end_minutes)
+    start = timer.perf_counter()
+    for number in range(CHECKS):
+        index.conflict(f"emp{number % args.employees}", interval, system.min_rest_minutes)
+    indexed = (timer.perf_counter() - start) / CHECKS
+    start = timer.perf_counter()
+    naive_conflict(system, 'emp0', interval)
+    naive = timer.perf_counter() - start
+    print(f"conflict check       {indexed * 1e6:9.2f} us   full scan {naive * 1000:9.1f} ms")
+
+    start = timer.perf_counter()
+    for number in range(CHECKS):
+        day = days[number % len(days)]
+        employee = f"emp{number % args.employees}"
+        if not system.assign_shift(ADMIN, day, number % 2, employee):
+            system.remove_from_shift(ADMIN, day, number % 2, employee)
+    print(f"assign/remove        {(timer.perf_counter() - start) / CHECKS * 1e6:9.2f} us per change")
+
+    start = timer.perf_counter()
+    conflicts = system.audit_conflicts()
+    print(f"audit all history    {(timer.perf_counter() - start) * 1000:9.1f} ms ({len(conflicts)} conflicts)")
+
+
+if __name__ == "__main__":
+    main()
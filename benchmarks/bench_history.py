@@ -0,0 +1,41 @@
+"""מדידת זמן בניית תצוגה שבועית/חודשית מעל היסטוריה רב-שנתית"""
+import os
+import sys
+import timeit
+from datetime import time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shift_management_system import Shift, ShiftHistory, ShiftManagementSystem
+
+
+def build_system(years: int, employee_count: int = 200) -> ShiftManagementSystem:
+    """מערכת עם היסטוריה סינתטית של מספר שנים אחורה מהיום"""
+    system = ShiftManagementSystem()
+    today = system.get_israel_time().date()
+    history = ShiftHistory()
+    for offset in range(years * 365, 0, -1):
+        day = today - timedelta(days=offset)
+        shifts = [Shift(time(8, 0), time(16, 0)), Shift(time(16, 0), time(23, 0))]
+        for index, shift in enumerate(shifts):
+            shift.employees = [f"emp{(offset * 7 + index * 3 + i) % employee_count}" for i in range(5)]
+        history[day] = shifts
+    system.shifts_history = history
+    return system
+
+
+def main():
+    number = 2_000
+    print(f"{'years':>5} {'week us':>9} {'old week us':>12} {'month us':>9} {'old month us':>13}")
+    for years in (1, 3, 5, 10):
+        system = build_system(years)
+        week = timeit.timeit(lambda: system.get_weekly_schedule(1), number=number)
+        old_week = timeit.timeit(lambda: system.get_weekly_schedule(years * 52 - 2), number=number)
+        month = timeit.timeit(lambda: system.get_monthly_schedule(1), number=number)
+        old_month = timeit.timeit(lambda: system.get_monthly_schedule(years * 12 - 2), number=number)
+        print(f"{years:>5} {week / number * 1e6:>9.1f} {old_week / number * 1e6:>12.1f} "
+              f"{month / number * 1e6:>9.1f} {old_month / number * 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
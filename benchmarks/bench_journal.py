@@ -0,0 +1,50 @@
+"""מדידת זמן כתיבה לשינוי בודד: שמירת קובץ מלא מול מצב יומן"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shift_management_system import ShiftAppeal, ShiftManagementSystem, User
+
+
+def build_system(appeal_count: int) -> ShiftManagementSystem:
+    """מערכת עם מנהל, עובד משובץ ומספר נתון של ערעורים היסטוריים"""
+    system = ShiftManagementSystem()
+    system.users['admin'] = User('admin', is_admin=True)
+    system.users['emp'] = User('emp')
+    for i in range(appeal_count):
+        appeal = ShiftAppeal(f"emp{i % 500}", f"יום {i}", i % 2, "סיבה")
+        appeal.status = 'approved'
+        system.appeals.add(appeal)
+    return system
+
+
+def measure(system: ShiftManagementSystem, mutations: int) -> float:
+    """זמן ממוצע (מילישניות) לשינוי בודד"""
+    days = list(system.weekly_shifts)
+    start = time.perf_counter()
+    for i in range(mutations):
+        day = days[i % len(days)]
+        system.assign_shift('admin', day, 0, 'emp')
+        system.remove_from_shift('admin', day, 0, 'emp')
+        if system.journal is None:
+            system.save_to_file('schedule.json')
+            system.save_to_file('schedule.json')
+    return (time.perf_counter() - start) / (mutations * 2) * 1000
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())
+    print(f"{'appeals':>8} {'full save ms':>13} {'journal ms':>11}")
+    for count in (10_000, 100_000):
+        full = measure(build_system(count), 20)
+        journaled = build_system(count)
+        journaled.enable_journal('journal_schedule.json', compact_every=0)
+        journal = measure(journaled, 2_000)
+        print(f"{count:>8} {full:>13.3f} {journal:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
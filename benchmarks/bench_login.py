@@ -0,0 +1,88 @@
+"""קצב התחברות בעלות הגיבוב שנבחרה, ותועלת מטמון האימותים
+
+נמדדים: זמן גיבוב/בדיקה בודדת, התחברויות בשנייה דרך /login (כל אחת
+בודקת גיבוב מלא; hashlib משחרר את ה-GIL, כך שב---threads הקצב גדל עם
+מספר הליבות), ובקשות API עם HTTP Basic - הראשונה מחשבת גיבוב, הבאות
+נענות ממטמון האימותים - לעומת אותן בקשות בלי מטמון.
+
+    python benchmarks/bench_login.py [--iterations 600000] [--logins 20] [--threads 1]
+"""
+import argparse
+import base64
+import logging
+import os
+import sys
+import time as timer
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+EMPLOYEES = 300
+PASSWORD = 'correct horse'
+API_REQUESTS = 200
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=None, help="ברירת מחדל: auth.DEFAULT_ITERATIONS")
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    if args.iterations:
+        os.environ['PASSWORD_HASH_ITERATIONS'] = str(args.iterations)
+
+    import web_app
+    from auth import VerifiedCredentialsCache, default_iterations, hash_password, verify_password
+    from generators import employee_names
+
+    iterations = default_iterations()
+    start = timer.perf_counter()
+    stored = hash_password(PASSWORD)
+    hash_time = timer.perf_counter() - start
+    start = timer.perf_counter()
+    verify_password(PASSWORD, stored)
+    verify_time = timer.perf_counter() - start
+    print(f"iterations {iterations}: hash {hash_time * 1000:.1f} ms, verify {verify_time * 1000:.1f} ms")
+
+    system = web_app.system
+    names = employee_names(EMPLOYEES)
+    for name in names:
+        system.add_user(web_app.ADMIN_USERNAME, name)
+        system.users[name].password = stored  # אותו גיבוב לכולם - ההכנה לא נמדדת
+    # כל התחברות מכתובת אחרת, כדי שההגבלה לכתובת לא תחסום את המדידה
+    web_app.ip_login_limiter.max_failures = web_app.user_login_limiter.max_failures = 10 ** 9
+
+    def login(number: int) -> int:
+        client = web_app.app.test_client()
+        response = client.post('/login', data={'username': names[number % EMPLOYEES], 'password': PASSWORD},
+                               environ_base={'REMOTE_ADDR': f"10.0.{number // 256 % 256}.{number % 256}"})
+        return response.status_code
+
+    start = timer.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        statuses = list(pool.map(login, range(args.logins)))
+    elapsed = timer.perf_counter() - start
+    assert all(status == 302 for status in statuses), statuses
+    print(f"/login: {args.logins / elapsed:.1f} logins/s with {args.threads} thread(s) "
+          f"({elapsed / args.logins * 1000:.1f} ms each)")
+
+    client = web_app.app.test_client()
+    headers = {'Authorization': 'Basic ' + base64.b64encode(f"{names[0]}:{PASSWORD}".encode()).decode()}
+    for label, cache in (('cached', VerifiedCredentialsCache()), ('no cache', VerifiedCredentialsCache(max_entries=0))):
+        system.credentials_cache = cache
+        requests = API_REQUESTS if label == 'cached' else max(5, args.logins // 4)
+        timings = []
+        for _ in range(requests):
+            start = timer.perf_counter()
+            response = client.get('/api/schedule/week', headers=headers)
+            timings.append(timer.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+        rest = timings[1:]
+        print(f"Basic auth API ({label:>8}): first {timings[0] * 1000:8.2f} ms, "
+              f"then {sum(rest) / len(rest) * 1000:8.2f} ms per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""השוואת צריכת זיכרון (tracemalloc) בין מודל הנתונים הישן למודל הקומפקטי
+
+מערך נתונים סינתטי של 5 שנים: 2 משמרות ביום, 8 עובדים במשמרת, וערעור
+על כ-2% מהשיבוצים. המחלקות Legacy* משחזרות את המבנה הקודם (אובייקטים
+מבוססי dict, רשימת עובדים, שעות כאובייקטי time).
+"""
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import date, datetime, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shift_management_system import Shift, ShiftAppeal, format_day_label
+
+YEARS = 5
+EMPLOYEES = 300
+PER_SHIFT = 8
+
+
+class LegacyShift:
+    def __init__(self, start_time: time, end_time: time):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.employees = []
+
+
+class LegacyAppeal:
+    def __init__(self, employee: str, day: str, shift_index: int, reason: str):
+        self.appeal_id = None
+        self.employee = employee
+        self.day = day
+        self.shift_index = shift_index
+        self.reason = reason
+        self.status = 'pending'
+        self.admin_response = ''
+        self.created_at = datetime.now()
+
+
+def build(shift_cls, appeal_cls):
+    """בניית היסטוריה וערעורים; שמות עובדים ומפתחות ימים נבנים מחדש כמו בטעינה מקובץ"""
+    history = {}
+    appeals = []
+    first = date(2021, 1, 3)
+    counter = 0
+    for offset in range(YEARS * 365):
+        day = first + timedelta(days=offset)
+        shifts = [shift_cls(time(8, 0), time(16, 0)), shift_cls(time(16, 0), time(23, 0))]
+        for index, shift in enumerate(shifts):
+            employees = [f"emp{(offset * 13 + index * 7 + i) % EMPLOYEES}" for i in range(PER_SHIFT)]
+            shift.employees = employees
+            for employee in employees:
+                counter += 1
+                if counter % 50 == 0:
+                    appeals.append(appeal_cls(f"{employee}", format_day_label(day), index, "סיבה"))
+        history[day] = shifts
+    return history, appeals
+
+
+def measure(shift_cls, appeal_cls) -> int:
+    gc.collect()
+    tracemalloc.start()
+    data = build(shift_cls, appeal_cls)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def main():
+    legacy = measure(LegacyShift, LegacyAppeal)
+    compact = measure(Shift, ShiftAppeal)
+    print(f"{YEARS}-year dataset, {EMPLOYEES} employees, {PER_SHIFT} per shift")
+    print(f"legacy model : {legacy / 1024 / 1024:8.1f} MiB")
+    print(f"compact model: {compact / 1024 / 1024:8.1f} MiB ({compact / legacy:.0%})")
+
+
+if __name__ == "__main__":
+    main()
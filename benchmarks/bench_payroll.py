@@ -0,0 +1,84 @@
+"""דוח שעות שנתי ל-500 עובדים: סיכומים מוכנים מול מעבר על כל המשמרות
+
+נמדדים: בניית הסיכומים (פעם אחת, בבקשה הראשונה), דוח שנתי וחודשי מהסיכומים,
+אותו דוח במעבר ישיר על כל המשמרות (מה שהיה נדרש בלי המודול), עדכון
+הסיכומים בשיבוץ והסרה, וייצוא CSV של הדוח השנתי.
+
+    python benchmarks/bench_payroll.py [--employees 500] [--years 1]
+"""
+import argparse
+import logging
+import os
+import sys
+import time as timer
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPEAT = 5
+UPDATES = 1_000
+
+
+def best_of(function, repeat: int = REPEAT) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = timer.perf_counter()
+        function()
+        best = min(best, timer.perf_counter() - start)
+    return best
+
+
+def naive_report(system, start, end) -> list:
+    """אותו דוח במעבר על כל המשמרות בטווח, בלי סיכומים שמורים"""
+    from reports import HoursLedger
+    ledger = HoursLedger(system.is_holiday)
+    for current_date, shift_start, shift_end, employees in system._all_shifts():
+        if start <= current_date <= end:
+            ledger.add_shift(current_date, shift_start, shift_end, employees)
+    return list(ledger.report(start, end))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--years', type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    from generators import ADMIN, fill_current_week, fill_history, make_system
+    from reports import iter_csv
+
+    system = fill_current_week(fill_history(make_system(args.employees), args.years,
+                                            per_shift=args.employees // 4))
+    today = system.get_israel_time().date()
+    year_start, month_start = today - timedelta(days=365), today.replace(day=1)
+
+    start = timer.perf_counter()
+    system.hours_ledger()
+    print(f"build rollups            {(timer.perf_counter() - start) * 1000:9.1f} ms")
+
+    for label, start_date in (('yearly', year_start), ('monthly', month_start)):
+        fast = best_of(lambda: list(system.hours_report(start_date, today)))
+        slow = best_of(lambda: naive_report(system, start_date, today))
+        print(f"{label:<8} report (rollups)  {fast * 1000:9.1f} ms   full scan {slow * 1000:9.1f} ms")
+
+    rows = list(system.hours_report(year_start, today))
+    assert [row for row in rows if row['hours']] == naive_report(system, year_start, today), \
+        "rollups disagree with full scan"
+
+    day = next(iter(system.weekly_shifts))
+    start = timer.perf_counter()
+    for number in range(UPDATES):
+        employee = f"emp{number % args.employees}"
+        if not system.assign_shift(ADMIN, day, 0, employee):
+            system.remove_from_shift(ADMIN, day, 0, employee)
+    elapsed = timer.perf_counter() - start
+    print(f"assign/remove            {elapsed / UPDATES * 1e6:9.1f} us per change (including rollups)")
+
+    export = best_of(lambda: sum(len(chunk) for chunk in iter_csv(system.hours_report(year_start, today))))
+    print(f"yearly CSV export        {export * 1000:9.1f} ms ({len(rows)} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""מדידת תפוקת יצירת PDF אישיים (מסמכים לשנייה): ברצף ובמאגר תהליכים"""
+import os
+import sys
+import time as timer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generators import employee_names, fill_current_week, make_system
+from pdf_generator import generate_employee_pdfs, render_schedule_pdf
+
+EMPLOYEES = 1_000
+
+
+def build_schedule() -> dict:
+    """לוח חודשי סינתטי שבו כל עובד משובץ למספר משמרות"""
+    system = fill_current_week(make_system(EMPLOYEES))
+    return system.get_weekly_schedule(), employee_names(EMPLOYEES)
+
+
+def main():
+    schedule, employees = build_schedule()
+
+    # חימום: רישום פונט ובניית התבנית לא נספרים
+    render_schedule_pdf(schedule, employee=employees[0])
+
+    start = timer.perf_counter()
+    for employee in employees[:200]:
+        render_schedule_pdf(schedule, employee=employee)
+    sequential = (timer.perf_counter() - start) / 200
+    print(f"sequential: {sequential * 1000:.2f} ms/pdf, {1 / sequential:.0f} docs/sec")
+
+    start = timer.perf_counter()
+    results = generate_employee_pdfs(schedule, employees)
+    elapsed = timer.perf_counter() - start
+    print(f"process pool ({os.cpu_count()} cpus): {elapsed:.1f}s for {len(results)} "
+          f"({len(results) / elapsed:.0f} pdf/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""עלות בדיקת הרשאה לפי מספר המשתמשים
+
+נמדדים: בדיקת מסכה על Grant מוכן, system.grant(u).has(p) מהמטמון (כמו
+בכל מתודה עם @requires), חישוב Grant מאפס, והבדיקה הישנה מול מילון
+המשתמשים. כל הבדיקות אמורות להישאר קבועות כשמספר המשתמשים גדל.
+
+    python benchmarks/bench_permissions.py [--checks 200000]
+"""
+import argparse
+import logging
+import os
+import sys
+import time as timer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIZES = (10, 1_000, 100_000)
+
+
+def per_check(fn, usernames, checks: int) -> float:
+    """זמן ממוצע לבדיקה בננו-שניות, על משתמשים לסירוגין"""
+    count = len(usernames)
+    start = timer.perf_counter()
+    for number in range(checks):
+        fn(usernames[number % count])
+    return (timer.perf_counter() - start) / checks * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checks', type=int, default=200_000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    from authorization import Permission, resolve_grant
+    from shift_management_system import ShiftManagementSystem, User
+
+    print(f"{'users':>8} {'mask':>9} {'cached':>9} {'resolve':>9} {'old check':>10}   (ns per check)")
+    for size in SIZES:
+        system = ShiftManagementSystem()
+        for number in range(size):
+            role = ('viewer', 'manager', 'admin')[number % 3]
+            system.users[f"user{number}"] = User(f"user{number}", role=role,
+                                                 scope={'days': [0, 1]} if role == 'manager' else None)
+        usernames = [f"user{number}" for number in range(0, size, max(1, size // 1000))]
+        users = system.users
+        for username in usernames:
+            system.grant(username)  # חימום המטמון - החישוב הראשון נמדד בנפרד
+        grant = system.grant(usernames[-1])
+
+        mask = per_check(lambda _: grant.has(Permission.EDIT_SCHEDULE), usernames, args.checks)
+        cached = per_check(lambda u: system.grant(u).has(Permission.EDIT_SCHEDULE), usernames, args.checks)
+        resolve = per_check(lambda u: resolve_grant(users[u]).has(Permission.EDIT_SCHEDULE), usernames, args.checks)
+        old = per_check(lambda u: u in users and users[u].is_admin, usernames, args.checks)
+        print(f"{size:>8} {mask:>9.0f} {cached:>9.0f} {resolve:>9.0f} {old:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
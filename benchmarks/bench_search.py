@@ -0,0 +1,118 @@
+"""חיפוש עובדים באינדקס לעומת מעבר על כל המשתמשים
+
+נבנים employees משתמשים עם שמות בעברית ובאנגלית, טלפון, ת"ז ומספר עובד.
+נמדדים: בניית האינדקס, חיפוש בקידומת קצרה, בתת-מחרוזת, במזהה מדויק,
+דף ראשון בלי שאילתה, ועריכת עובד אחד (עדכון האינדקס) - מול סריקה של
+system.users והשוואת מחרוזות, כמו בדף העובדים עד עכשיו.
+
+    python benchmarks/bench_search.py [--employees 50000] [--queries 200]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time as timer
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIRST_NAMES = ['דוד', 'יוסי', 'משה', 'רונית', 'מיכל', 'שרה', 'אברהם', 'נועה', 'איתי', 'תמר',
+               'David', 'Daniel', 'Maria', 'Olga', 'Sergei', 'Anna', 'Michael', 'Yael', 'Omer', 'Lior']
+LAST_NAMES = ['כהן', 'לוי', 'מזרחי', 'פרץ', 'ביטון', 'אברהם', 'פרידמן', 'שפירא', 'בן-דוד', 'אזולאי',
+              'Cohen', 'Levy', 'Smith', 'Ivanov', 'Garcia', 'Katz', 'Friedman', 'Peretz', 'Azulay', 'Weiss']
+TEAMS = ['kitchen', 'bar', 'floor', 'delivery', '']
+
+
+def make_users(count: int, seed: int = 0) -> list:
+    from shift_management_system import User
+    rng = random.Random(seed)
+    users = []
+    for number in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        users.append(User(f"emp{number}", first_name=first, last_name=last,
+                          email=f"emp{number}@example.com", phone=f"05{rng.randrange(10)}-{rng.randrange(10**7):07d}",
+                          id_number=f"{rng.randrange(10**9):09d}", employee_number=str(1000 + number),
+                          team=rng.choice(TEAMS)))
+    return users
+
+
+def scan(users: dict, query: str) -> list:
+    """החיפוש בלי אינדקס: כל מילה בשאילתה בכל אחד מהשדות, ומיון לפי שם"""
+    terms = query.lower().split()
+    found = [user for user in users.values()
+             if all(any(term in (value or '').lower()
+                        for value in (user.first_name, user.last_name, user.username, user.email,
+                                      user.phone, user.id_number, user.employee_number))
+                    for term in terms)]
+    found.sort(key=lambda user: (user.last_name, user.first_name, user.username))
+    return found[:50]
+
+
+def per_query(fn, queries: list, runs: int) -> float:
+    """זמן ממוצע לשאילתה במילי-שניות"""
+    start = timer.perf_counter()
+    for number in range(runs):
+        fn(queries[number % len(queries)])
+    return (timer.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--employees', type=int, default=50_000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    from employee_search import EmployeeIndex, paginate
+    from shift_management_system import ShiftManagementSystem, User
+
+    system = ShiftManagementSystem()
+    system.users['admin'] = User('admin', is_admin=True)
+    for user in make_users(args.employees):
+        system.users[user.username] = user
+
+    start = timer.perf_counter()
+    EmployeeIndex(system.users.values())
+    build = timer.perf_counter() - start
+    # הזיכרון נמדד בבנייה נפרדת - tracemalloc מאט את הבנייה עצמה
+    tracemalloc.start()
+    system.employee_index()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{args.employees} employees: index built in {build * 1000:.0f} ms, {memory / 2**20:.1f} MiB")
+
+    def search(query: str):
+        page = paginate(system.search_employees('admin', query), 1, 50)
+        return [system.users[username] for username in page['items']]
+
+    rng = random.Random(1)
+    users = list(system.users.values())[1:]
+    cases = (
+        ('prefix (2 chars)', ['כה', 'Da', 'לו', 'Ol', 'מי']),
+        ('name substring', ['מזרח', 'iedma', 'רידמנ', 'ivanov']),
+        ('two words', ['דוד כהן', 'anna katz', 'נועה בן']),
+        ('phone prefix', [user.phone.replace('-', '')[:7] for user in rng.sample(users, 20)]),
+        ('id number', [user.id_number for user in rng.sample(users, 20)]),
+        ('employee number', [user.employee_number for user in rng.sample(users, 20)]),
+        ('all (page 1)', ['']),
+    )
+    print(f"{'':<18} {'scan':>9} {'index':>9}   (ms per query, first page of 50)")
+    for label, queries in cases:
+        before = per_query(lambda query: scan(system.users, query), queries, max(1, args.queries // 10))
+        after = per_query(search, queries, args.queries)
+        print(f"{label:<18} {before:9.2f} {after:9.3f}")
+
+    start = timer.perf_counter()
+    for number in range(args.queries):
+        user = users[number]
+        system.update_employee('admin', user.username, {'last_name': rng.choice(LAST_NAMES)})
+    print(f"{'edit employee':<18} {'':>9} {(timer.perf_counter() - start) / args.queries * 1000:9.3f}"
+          f"   (ms per update, index included)")
+    after = per_query(search, ['', 'כה'], args.queries)
+    print(f"{'search after edit':<18} {'':>9} {after:9.3f}   (first query re-sorts once)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""ריבוי אתרים: זיכרון וזמן בקשה עם 1,000 אתרים
+
+יוצר 1,000 מאגרי אתרים (עובדים, שבוע מאויש וערעורים), ואז עובר על כל
+האתרים בסדר אקראי עם גבול אתרים טעונים (LRU). המדידה רצה בתהליך נפרד
+לכל גבול, ומדפיסה את שיא ה-RSS כל 200 אתרים - עם גבול הוא נשאר יציב,
+ובלי גבול (--max-resident 0) הוא גדל עם מספר האתרים.
+
+    python benchmarks/bench_tenants.py [--tenants 1000] [--max-resident 50]
+"""
+import argparse
+import logging
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time as timer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+EMPLOYEES = 40
+APPEALS = 200
+REQUESTS = 3
+
+
+def build_tenants(directory: str, count: int):
+    """רישום count אתרים ויצירת מאגר SQLite מלא לכל אחד"""
+    from generators import add_appeals, fill_current_week, make_system
+    from storage import SQLiteStorage
+    from tenants import TenantRegistry
+
+    registry = TenantRegistry(directory, loader=None)
+    for number in range(count):
+        tenant_id = f"site{number}"
+        registry.add(tenant_id, f"Site {number}")
+        system = add_appeals(fill_current_week(make_system(EMPLOYEES)), APPEALS, seed=number)
+        storage = SQLiteStorage(registry.database_path(tenant_id))
+        system.attach_storage(storage)
+        storage.close()
+
+
+def peak_rss_mb() -> float:
+    # ב-Linux היחידה היא KB, ב-macOS בתים
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(directory: str, max_resident: int):
+    """מעבר על כל האתרים פעמיים; בכל ביקור כמה בקשות API"""
+    logging.disable(logging.CRITICAL)
+    os.environ['TENANTS_DIR'] = directory
+    os.environ['MAX_RESIDENT_TENANTS'] = str(max_resident or 1_000_000)
+    import web_app
+
+    tenant_ids = sorted(web_app.tenants.tenants)
+    rng = random.Random(0)
+    order = tenant_ids + rng.sample(tenant_ids, len(tenant_ids))
+    client = web_app.app.test_client()
+    serializer = web_app.app.session_interface.get_signing_serializer(web_app.app)
+    cold, warm = [], []
+
+    for visited, tenant_id in enumerate(order, start=1):
+        host = f"{tenant_id}.example.com"
+        base_url = f"http://{host}"
+        client.set_cookie('session', serializer.dumps({'username': web_app.ADMIN_USERNAME, 'is_admin': True,
+                                                       'tenant': tenant_id}), domain=host)
+        for _ in range(REQUESTS):
+            resident = web_app.tenants.is_resident(tenant_id)
+            start = timer.perf_counter()
+            response = client.get('/api/schedule/week', base_url=base_url)
+            elapsed = timer.perf_counter() - start
+            assert response.status_code == 200, response.status_code
+            (warm if resident else cold).append(elapsed)
+        if visited % 200 == 0:
+            stats = web_app.tenants.stats()
+            print(f"  {visited:5d} visits  resident {stats['resident']:5d}  evictions {stats['evictions']:5d}  "
+                  f"peak RSS {peak_rss_mb():7.1f} MB")
+
+    cold.sort()
+    warm.sort()
+    print(f"  cold request p50 {cold[len(cold) // 2] * 1000:.2f} ms ({len(cold)})  "
+          f"warm request p50 {warm[len(warm) // 2] * 1000:.2f} ms ({len(warm)})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=1_000)
+    parser.add_argument('--max-resident', type=int, default=50)
+    parser.add_argument('--measure', metavar='DIR', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.max_resident)
+        return
+
+    logging.disable(logging.CRITICAL)
+    directory = tempfile.mkdtemp()
+    try:
+        start = timer.perf_counter()
+        build_tenants(directory, args.tenants)
+        print(f"built {args.tenants} sites in {timer.perf_counter() - start:.1f} s")
+        for max_resident in (args.max_resident, 0):
+            print(f"max resident: {max_resident or 'unbounded'}")
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', directory,
+                            '--max-resident', str(max_resident)], check=True)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
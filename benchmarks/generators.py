@@ -0,0 +1,86 @@
+"""מחוללי נתונים סינתטיים לבנצ'מרקים: משתמשים, היסטוריה רב-שנתית וערעורים
+
+כל המחוללים דטרמיניסטיים (seed קבוע), כך שהרצות חוזרות על אותו קומיט
+מודדות את אותם נתונים.
+"""
+import os
+import random
+import sys
+from datetime import time, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shift_management_system import Shift, ShiftAppeal, ShiftHistory, ShiftManagementSystem, User
+
+ADMIN = 'admin'
+SHIFT_HOURS = ((time(8, 0), time(16, 0)), (time(16, 0), time(23, 0)))
+
+
+def employee_names(count: int) -> List[str]:
+    return [f"emp{i}" for i in range(count)]
+
+
+def make_system(employees: int = 300) -> ShiftManagementSystem:
+    """מערכת עם מנהל ו-employees עובדים, בלי שיבוצים"""
+    system = ShiftManagementSystem()
+    system.users[ADMIN] = User(ADMIN, is_admin=True)
+    for name in employee_names(employees):
+        system.users[name] = User(name, first_name=name.title())
+    return system
+
+
+def fill_current_week(system: ShiftManagementSystem) -> ShiftManagementSystem:
+    """שיבוץ כל העובדים במשמרות השבוע הנוכחי (חצי בכל משמרת, מתחלף לפי יום)"""
+    employees = [name for name, user in system.users.items() if not user.is_admin]
+    items = []
+    for day_number, day in enumerate(system.weekly_shifts):
+        for offset in range(0, len(employees), 2):
+            employee = employees[(offset + day_number) % len(employees)]
+            items.append({'day': day, 'shift_index': (offset // 2) % 2, 'employee': employee})
+    system.assign_shifts(ADMIN, items)
+    return system
+
+
+def fill_history(system: ShiftManagementSystem, years: int, per_shift: int = 8,
+                 seed: int = 0) -> ShiftManagementSystem:
+    """היסטוריית משמרות ל-years שנים אחורה מהיום"""
+    rng = random.Random(seed)
+    employees = [name for name, user in system.users.items() if not user.is_admin]
+    today = system.get_israel_time().date()
+    history = ShiftHistory()
+    for offset in range(years * 365, 0, -1):
+        day = today - timedelta(days=offset)
+        shifts = []
+        for start, end in SHIFT_HOURS:
+            shift = Shift(start, end)
+            shift.employees = rng.sample(employees, min(per_shift, len(employees)))
+            shifts.append(shift)
+        history[day] = shifts
+    system.shifts_history = history
+    return system
+
+
+def add_appeals(system: ShiftManagementSystem, count: int, seed: int = 0) -> ShiftManagementSystem:
+    """ערעורים על שיבוצים קיימים בשבוע הנוכחי, בתערובת סטטוסים"""
+    rng = random.Random(seed)
+    slots = [
+        (employee, day, index)
+        for day, shifts in system.weekly_shifts.items()
+        for index, shift in enumerate(shifts)
+        for employee in shift.employees
+    ]
+    for _ in range(count):
+        employee, day, index = rng.choice(slots)
+        appeal = ShiftAppeal(employee, day, index, "סיבה")
+        appeal.status = rng.choice(('pending', 'approved', 'rejected', 'rejected'))
+        system.appeals.add(appeal)
+    return system
+
+
+def realistic_system(employees: int = 300, years: int = 3, appeals: int = 5_000) -> ShiftManagementSystem:
+    """מערכת מלאה: שבוע מאויש, היסטוריה וערעורים"""
+    system = fill_current_week(make_system(employees))
+    fill_history(system, years)
+    add_appeals(system, appeals)
+    return system
@@ -0,0 +1,150 @@
+"""תשתית בנצ'מרקים קטנה בסגנון asv
+
+בנצ'מרק הוא פונקציה שמקבלת את תוצאת ה-setup שלה ומבצעת קריאה אחת.
+מספר הקריאות בכל חזרה נקבע אוטומטית (כמו timeit.autorange), וכל
+בנצ'מרק רץ repeat חזרות. התוצאות נשמרות כ-JSON עם הקומיט, וניתן
+להשוות שני קבצים ולזהות האטות מעבר לסף.
+"""
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time as timer
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHMARKS: List['Benchmark'] = []
+
+
+class Benchmark:
+    """בנצ'מרק רשום"""
+
+    def __init__(self, name: str, func: Callable, setup: Optional[Callable], repeat: int,
+                 number: Optional[int], min_time: float):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.repeat = repeat
+        self.number = number
+        self.min_time = min_time
+
+    def _timeit(self, state, number: int) -> float:
+        func = self.func
+        start = timer.perf_counter()
+        for _ in range(number):
+            func(state)
+        return timer.perf_counter() - start
+
+    def run(self, quick: bool = False) -> dict:
+        state = self.setup() if self.setup is not None else None
+        self.func(state)  # חימום: מטמונים ובנייה חד-פעמית לא נכנסים למדידה
+        min_time = self.min_time / 10 if quick else self.min_time
+        number = self.number
+        if number is None:
+            # הגדלת מספר הקריאות עד שחזרה אחת לוקחת לפחות min_time
+            number = 1
+            while self._timeit(state, number) < min_time and number < 1_000_000:
+                number *= 10 if number < 10 else 2
+        repeat = 2 if quick else self.repeat
+
+        gc_was_enabled = gc.isenabled()
+        gc.collect()
+        gc.disable()
+        try:
+            times = [self._timeit(state, number) / number for _ in range(repeat)]
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return {
+            'median': statistics.median(times),
+            'min': min(times),
+            'mean': statistics.mean(times),
+            'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+            'number': number,
+            'repeat': repeat,
+        }
+
+
+def benchmark(name: Optional[str] = None, setup: Optional[Callable] = None, repeat: int = 5,
+              number: Optional[int] = None, min_time: float = 0.2):
+    """דקורטור לרישום בנצ'מרק; setup נקרא פעם אחת לפני המדידה"""
+    def register(func):
+        BENCHMARKS.append(Benchmark(name or func.__name__, func, setup, repeat, number, min_time))
+        return func
+    return register
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(selected: Optional[str] = None, quick: bool = False, log=print) -> dict:
+    """הרצת כל הבנצ'מרקים (או רק אלה ששמם מכיל selected)"""
+    results = {}
+    for bench in BENCHMARKS:
+        if selected and selected not in bench.name:
+            continue
+        result = results[bench.name] = bench.run(quick)
+        log(f"{bench.name:<40} {format_seconds(result['median']):>12}  "
+            f"(±{result['stdev'] / result['median'] * 100 if result['median'] else 0:.1f}%, "
+            f"{result['number']}x{result['repeat']})")
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': quick,
+        'benchmarks': results,
+    }
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def save(results: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base: dict, current: dict, threshold: float = 0.10) -> List[Dict]:
+    """השוואת חציונים; מוחזרת רשומה לכל בנצ'מרק משותף, עם סימון האטה/שיפור"""
+    rows = []
+    for name, result in current['benchmarks'].items():
+        previous = base['benchmarks'].get(name)
+        if previous is None:
+            continue
+        ratio = result['median'] / previous['median'] if previous['median'] else float('inf')
+        # שינוי נחשב אמיתי רק אם הוא גדול מהסף וגם מהרעש של שתי ההרצות
+        noise = (result['stdev'] + previous['stdev']) / previous['median'] if previous['median'] else 0.0
+        limit = max(threshold, noise)
+        status = 'slower' if ratio > 1 + limit else 'faster' if ratio < 1 / (1 + limit) else 'same'
+        rows.append({'name': name, 'base': previous['median'], 'current': result['median'],
+                     'ratio': ratio, 'status': status})
+    return rows
+
+
+def print_comparison(rows: List[Dict], base_label: str, current_label: str, out=sys.stdout):
+    out.write(f"{'benchmark':<40} {base_label:>12} {current_label:>12} {'ratio':>7}\n")
+    for row in rows:
+        marker = {'slower': '  !', 'faster': '  +', 'same': ''}[row['status']]
+        out.write(f"{row['name']:<40} {format_seconds(row['base']):>12} "
+                  f"{format_seconds(row['current']):>12} {row['ratio']:>7.2f}{marker}\n")
@@ -0,0 +1,69 @@
+"""הרצת חבילת הבנצ'מרקים ושמירה/השוואה של תוצאות
+
+    python benchmarks/run.py                       # הרצה ושמירה ל-benchmarks/results/<commit>.json
+    python benchmarks/run.py -k schedule --quick   # רק בנצ'מרקים ששמם מכיל "schedule", הרצה מהירה
+    python benchmarks/run.py --compare benchmarks/results/abc1234.json
+    python benchmarks/run.py compare base.json current.json
+
+עם --compare (או בפקודת compare) קוד היציאה הוא 1 אם נמצאה האטה מעבר לסף,
+כך שאפשר להריץ את ההשוואה אוטומטית בין קומיטים.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import harness
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def compare_files(base_path: str, current: dict, threshold: float) -> int:
+    base = harness.load(base_path)
+    rows = harness.compare(base, current, threshold)
+    print()
+    harness.print_comparison(rows, base.get('commit', 'base'), current.get('commit', 'current'))
+    slower = [row['name'] for row in rows if row['status'] == 'slower']
+    if slower:
+        print(f"\n{len(slower)} regression(s) above {threshold:.0%}: {', '.join(slower)}")
+        return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['compare']:
+        parser = argparse.ArgumentParser(prog='run.py compare')
+        parser.add_argument('base')
+        parser.add_argument('current')
+        parser.add_argument('--threshold', type=float, default=0.10)
+        args = parser.parse_args(argv[1:])
+        return compare_files(args.base, harness.load(args.current), args.threshold)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-k', dest='selected', help='run only benchmarks whose name contains this')
+    parser.add_argument('--quick', action='store_true', help='fewer, shorter repeats (smoke run)')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--no-save', action='store_true')
+    parser.add_argument('--compare', metavar='BASE', help='compare against a previous results file')
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    import suite
+    try:
+        results = harness.run(args.selected, args.quick)
+    finally:
+        suite.cleanup()
+
+    if not args.no_save:
+        output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+        harness.save(results, output)
+        print(f"\nresults saved to {output}")
+    if args.compare:
+        return compare_files(args.compare, results, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
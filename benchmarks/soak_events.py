@@ -0,0 +1,97 @@
+"""בדיקת עומס ממושכת לערוץ השינויים: אלפי לקוחות ממתינים ושינויים רצופים
+
+כל לקוח מדומה הוא thread שממתין ב-ChangeFeed.wait כמו חיבור SSE. בודקים
+שכל לקוח קיבל בדיוק את האירועים שמיועדים לו, את זמן ההגעה (p50/p99),
+ושתורי ההתראות נשארים חסומים.
+"""
+import os
+import statistics
+import sys
+import threading
+import time as timer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shift_management_system import ShiftManagementSystem, User
+
+CLIENTS = 2_000
+EMPLOYEES = 200
+ROUNDS = 300
+
+
+def client(system, username, start_seq, stop, results):
+    seq = start_seq
+    received = 0
+    arrivals = []
+    missed = False
+    while not stop.is_set():
+        events, seq, lost = system.feed.wait(seq, username, timeout=1.0)
+        missed = missed or lost
+        now = timer.perf_counter()
+        for event in events:
+            received += 1
+            if event.type == 'schedule':
+                arrivals.append((event.seq, now))
+    results[username].append((received, arrivals, missed))
+
+
+def main():
+    system = ShiftManagementSystem()
+    system.feed = type(system.feed)(max_events=50_000)
+    system.users['admin'] = User('admin', is_admin=True)
+    employees = [f"emp{i}" for i in range(EMPLOYEES)]
+    for employee in employees:
+        system.users[employee] = User(employee)
+    days = list(system.weekly_shifts)
+
+    stop = threading.Event()
+    results = {employee: [] for employee in employees}
+    start_seq = system.feed.last_seq
+    threads = [
+        threading.Thread(target=client, args=(system, employees[i % EMPLOYEES], start_seq, stop, results),
+                         daemon=True)
+        for i in range(CLIENTS)
+    ]
+    for thread in threads:
+        thread.start()
+    timer.sleep(1.0)
+
+    expected = {employee: 0 for employee in employees}
+    sent = {}
+    started = timer.perf_counter()
+    for round_number in range(ROUNDS):
+        employee = employees[round_number % EMPLOYEES]
+        day = days[round_number % len(days)]
+        seq = system.feed.last_seq + 1  # אירוע ה-schedule מתפרסם ראשון
+        sent[seq] = timer.perf_counter()
+        if not system.assign_shift('admin', day, round_number % 2, employee):
+            system.remove_from_shift('admin', day, round_number % 2, employee)
+        for other in employees:
+            expected[other] += 1  # אירוע schedule לכולם
+        expected[employee] += 1  # התראה אישית
+        timer.sleep(0.005)
+    publish_time = timer.perf_counter() - started
+
+    timer.sleep(2.0)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies = []
+    errors = 0
+    for employee, client_results in results.items():
+        for received, arrivals, missed in client_results:
+            latencies.extend(now - sent[seq] for seq, now in arrivals)
+            if missed or received != expected[employee]:
+                errors += 1
+    latencies.sort()
+    queue_sizes = [len(queue) for queue in system.notifications.values()]
+    print(f"{CLIENTS} clients, {ROUNDS} changes in {publish_time:.1f}s")
+    print(f"delivery p50: {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99: {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+    print(f"clients with wrong event count: {errors}")
+    print(f"max notification queue: {max(queue_sizes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""הבנצ'מרקים של מנוע המשמרות ונתיבי הווב (ראו run.py להרצה)"""
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from datetime import timedelta
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generators import ADMIN, add_appeals, fill_current_week, fill_history, make_system, realistic_system
+from harness import benchmark
+
+# כל הקבצים שהבנצ'מרקים כותבים נוצרים כאן ונמחקים ב-cleanup
+TEMP_DIR = tempfile.mkdtemp(prefix='shift-bench-')
+
+
+def temp_path(name: str) -> str:
+    return tempfile.mkdtemp(dir=TEMP_DIR) + os.sep + name
+
+
+@lru_cache(maxsize=None)
+def history_system():
+    """300 עובדים, שבוע מאויש, 5 שנות היסטוריה ו-20,000 ערעורים (משותף לבנצ'מרקים)"""
+    return realistic_system(employees=300, years=5, appeals=20_000)
+
+
+def first_day(system):
+    return next(iter(system.weekly_shifts))
+
+
+# ---- תצוגות ----
+
+@benchmark(setup=history_system)
+def weekly_schedule_cached(system):
+    system.get_weekly_schedule(0)
+
+
+@benchmark(setup=history_system)
+def weekly_schedule_uncached(system):
+    system.view_cache.clear()
+    system.get_weekly_schedule(52)
+
+
+@benchmark(setup=history_system)
+def weekly_schedule_employee(system):
+    system.view_cache.clear()
+    system.get_weekly_schedule(0, employee='emp7')
+
+
+@benchmark(setup=history_system)
+def monthly_schedule_cached(system):
+    system.get_monthly_schedule(0)
+
+
+@benchmark(setup=history_system)
+def monthly_schedule_uncached(system):
+    system.view_cache.clear()
+    system.get_monthly_schedule(24)
+
+
+@benchmark(setup=history_system)
+def future_year_range(system):
+    """שנה קדימה לפי תבניות המשמרות - בלי ליצור אובייקטי משמרת"""
+    today = system.get_israel_time().date()
+    system.get_schedule_range(today, today + timedelta(days=365))
+
+
+# ---- שינויים ----
+
+def assign_setup():
+    system = make_system(300)
+    return system, first_day(system)
+
+
+@benchmark(setup=assign_setup)
+def assign_and_remove_shift(state):
+    system, day = state
+    system.assign_shift(ADMIN, day, 0, 'emp1')
+    system.remove_from_shift(ADMIN, day, 0, 'emp1')
+
+
+def batch_setup():
+    system = make_system(300)
+    items = [{'day': day, 'shift_index': index % 2, 'employee': f"emp{index}"}
+             for day in system.weekly_shifts for index in range(300)]
+    return system, items
+
+
+@benchmark(setup=batch_setup, number=5)
+def assign_shifts_batch_2100(state):
+    system, items = state
+    system.assign_shifts(ADMIN, items)
+    system.remove_from_shifts(ADMIN, items)
+
+
+def appeal_setup():
+    """יצירת ערעור כולל רישום ביומן (כמו בייצור), בתיקייה זמנית"""
+    system = fill_current_week(make_system(300))
+    add_appeals(system, 20_000)
+    system.enable_journal(temp_path('schedule.json'), compact_every=10 ** 9)
+    day = first_day(system)
+    employee = system.weekly_shifts[day][0].employees[0]
+    return system, day, employee
+
+
+@benchmark(setup=appeal_setup)
+def create_and_handle_appeal(state):
+    system, day, employee = state
+    system.create_appeal(employee, day, 0, "סיבה")
+    appeal = system.appeals.for_slot(employee, day, 0)[-1]
+    system.handle_appeal(ADMIN, appeal.appeal_id, 'rejected', '')
+
+
+@benchmark(setup=history_system)
+def has_active_appeal(system):
+    system.has_active_appeal('emp3', first_day(system), 0)
+
+
+# ---- שמירה וטעינה ----
+
+def persistence_setup():
+    system = fill_history(fill_current_week(make_system(300)), years=2)
+    add_appeals(system, 5_000)
+    path = temp_path('schedule.json')
+    system.save_to_file(path)
+    return system, path
+
+
+@benchmark(setup=persistence_setup, repeat=3)
+def save_to_file_2y(state):
+    system, path = state
+    system.save_to_file(path)
+
+
+@benchmark(setup=persistence_setup, repeat=3)
+def load_from_file_2y(state):
+    system, path = state
+    system.load_from_file(path)
+
+
+# ---- PDF ----
+
+def pdf_setup():
+    from pdf_generator import create_schedule_pdf, render_schedule_pdf
+    system = fill_current_week(make_system(300))
+    return create_schedule_pdf, render_schedule_pdf, system.get_weekly_schedule(), temp_path('schedule.pdf')
+
+
+@benchmark(setup=pdf_setup)
+def create_schedule_pdf_week(state):
+    create_schedule_pdf, _, schedule, path = state
+    create_schedule_pdf(schedule, path)
+
+
+@benchmark(setup=pdf_setup)
+def render_employee_pdf(state):
+    _, render_schedule_pdf, schedule, _ = state
+    render_schedule_pdf(schedule, employee='emp5')
+
+
+# ---- נתיבי ווב (לקוח הבדיקה של Flask) ----
+
+def web_setup():
+    import web_app
+    logging.disable(logging.CRITICAL)
+    web_app.system = history_system()
+    client = web_app.app.test_client()
+    with client.session_transaction() as session:
+        session['username'] = ADMIN
+        session['is_admin'] = True
+    return client
+
+
+def _get(client, path, headers=None):
+    response = client.get(path, headers=headers)
+    assert response.status_code in (200, 304), (path, response.status_code)
+
+
+@benchmark(setup=web_setup)
+def route_api_week(client):
+    _get(client, '/api/schedule/week')
+
+
+@benchmark(setup=web_setup)
+def route_api_week_gzip(client):
+    _get(client, '/api/schedule/week', {'Accept-Encoding': 'gzip'})
+
+
+@benchmark(setup=web_setup)
+def route_api_month(client):
+    _get(client, '/api/schedule/month?offset=3')
+
+
+@benchmark(setup=web_setup)
+def route_api_appeals(client):
+    _get(client, '/api/appeals')
+
+
+@benchmark(setup=web_setup)
+def route_download_pdf(client):
+    _get(client, '/download_user_schedule')
+
+
+def cleanup():
+    shutil.rmtree(TEMP_DIR, ignore_errors=True)
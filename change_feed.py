@@ -0,0 +1,193 @@
+"""ערוץ שינויים (change feed) והתראות אישיות
+
+כל שינוי במערכת מפורסם כאירוע עם מספר סידורי עולה. לקוחות (למשל חיבורי
+SSE) ממתינים לאירועים שאחרי המספר האחרון שקיבלו, ורואים רק אירועים
+שמיועדים להם. נשמר רק חלון אחרון של אירועים; לקוח שפספס יותר מזה מקבל
+אירוע reset וטוען את הדף מחדש.
+
+מזהה האירוע שנשלח ללקוח הוא "<מזהה הערוץ>-<מספר>". המספרים מתחילים מחדש
+בכל ערוץ (הפעלה מחדש, אתר שנטען מחדש, worker אחר), ולכן מזהה מערוץ אחר -
+או מספר שהערוץ עוד לא הגיע אליו - נחשב כפספוס ולא כנקודת המשך.
+"""
+import asyncio
+import itertools
+import secrets
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+
+class Event:
+    """אירוע שינוי; users=None פירושו אירוע לכולם"""
+    __slots__ = ('seq', 'type', 'data', 'users', 'admins')
+
+    def __init__(self, seq: int, event_type: str, data: dict,
+                 users: Optional[frozenset] = None, admins: bool = False):
+        self.seq = seq
+        self.type = event_type
+        self.data = data
+        self.users = users
+        self.admins = admins  # האם האירוע מיועד גם לכל המנהלים
+
+    def visible_to(self, username: str, is_admin: bool = False) -> bool:
+        if self.users is None:
+            return True
+        return username in self.users or (self.admins and is_admin)
+
+
+class ChangeFeed:
+    """חלון אירועים אחרונים עם המתנה חסומה לאירועים חדשים
+
+    הממתינים חוסמים על threading.Event משותף שמוחלף בכל פרסום, כך שפרסום
+    אינו מחכה לממתינים והם אינם מתחרים על נעילה אחת בזמן ההמתנה. זה עובד
+    גם ב-workers של gevent (לאחר monkey patching) שבהם כל חיבור פתוח הוא
+    greenlet זול. במצב ASGI ממתינים ב-wait_async, שאינה תופסת thread.
+    """
+
+    def __init__(self, max_events: int = 1024):
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._async_waiters = {}  # future -> event loop
+        self.last_seq = 0
+        self.feed_id = secrets.token_hex(4)
+
+    def event_id(self, seq: int) -> str:
+        """מזהה האירוע ללקוח (Last-Event-ID בחיבור הבא)"""
+        return f"{self.feed_id}-{seq}"
+
+    def resume(self, last_event_id: Optional[str]) -> Tuple[int, bool]:
+        """(המספר שממנו ממשיכים, האם פוספסו אירועים) לפי Last-Event-ID של הלקוח
+
+        בלי מזהה - ממשיכים מעכשיו. מזהה של ערוץ אחר, לא תקין או מהעתיד - פספוס.
+        """
+        if not last_event_id:
+            return self.last_seq, False
+        feed_id, _, seq = last_event_id.rpartition('-')
+        if feed_id != self.feed_id or not seq.isdigit() or int(seq) > self.last_seq:
+            return self.last_seq, True
+        return int(seq), False
+
+    def publish(self, event_type: str, data: dict, users: Optional[Iterable[str]] = None,
+                admins: bool = False) -> Event:
+        """פרסום אירוע; users - המשתמשים שיקבלו אותו (None = כולם)"""
+        with self._lock:
+            self.last_seq += 1
+            event = Event(self.last_seq, event_type, data,
+                          frozenset(users) if users is not None else None, admins)
+            self._events.append(event)
+            changed, self._changed = self._changed, threading.Event()
+            waiters, self._async_waiters = self._async_waiters, {}
+        changed.set()
+        for future, loop in waiters.items():
+            # הפרסום יכול להגיע מ-thread אחר מזה של לולאת האירועים
+            loop.call_soon_threadsafe(_wake, future)
+        return event
+
+    def since(self, seq: int, username: str, is_admin: bool = False) -> Tuple[List[Event], bool]:
+        """האירועים שאחרי seq שמיועדים למשתמש, והאם חלק מהם כבר נמחקו מהחלון"""
+        with self._lock:
+            return self._since(seq, username, is_admin)
+
+    def _since(self, seq: int, username: str, is_admin: bool) -> Tuple[List[Event], bool]:
+        if seq > self.last_seq:
+            return [], True  # מספר מערוץ אחר
+        if not self._events or seq == self.last_seq:
+            return [], False
+        first = self._events[0].seq
+        missed = seq < first - 1
+        # המספרים רציפים, כך שאפשר לדלג ישירות לאירוע הראשון החדש
+        start = max(seq - first + 1, 0)
+        events = [event for event in itertools.islice(self._events, start, None)
+                  if event.visible_to(username, is_admin)]
+        return events, missed
+
+    def wait(self, seq: int, username: str, is_admin: bool = False,
+             timeout: Optional[float] = None) -> Tuple[List[Event], int, bool]:
+        """המתנה לאירועים אחרי seq (או עד timeout)
+
+        מחזיר (אירועים, המספר האחרון שנבדק, האם פוספסו אירועים).
+        """
+        with self._lock:
+            changed = self._changed
+            if seq != self.last_seq:
+                events, missed = self._since(seq, username, is_admin)
+                return events, self.last_seq, missed
+        changed.wait(timeout)
+        with self._lock:
+            events, missed = self._since(seq, username, is_admin)
+            return events, self.last_seq, missed
+
+    async def wait_async(self, seq: int, username: str, is_admin: bool = False,
+                         timeout: Optional[float] = None) -> Tuple[List[Event], int, bool]:
+        """כמו wait, אבל ממתינה בלולאת asyncio ללא thread"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if seq != self.last_seq:
+                events, missed = self._since(seq, username, is_admin)
+                return events, self.last_seq, missed
+            future = loop.create_future()
+            self._async_waiters[future] = loop
+        await asyncio.wait({future}, timeout=timeout)
+        with self._lock:
+            self._async_waiters.pop(future, None)
+            events, missed = self._since(seq, username, is_admin)
+            return events, self.last_seq, missed
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class NotificationQueue:
+    """תור התראות חסום למשתמש אחד
+
+    כשהתור מלא נמחקת ההתראה הישנה ביותר שכבר נקראה; רק אם כולן
+    לא נקראו נמחקת הישנה ביותר.
+    """
+
+    def __init__(self, max_items: int = 100):
+        self.max_items = max_items
+        self._items = deque()
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, message: str, notification_type: str) -> dict:
+        if len(self._items) >= self.max_items:
+            self._evict()
+        notification = {
+            'id': next(self._ids),
+            'message': message,
+            'type': notification_type,
+            'timestamp': datetime.now(),
+            'read': False
+        }
+        self._items.append(notification)
+        return notification
+
+    def _evict(self):
+        for index, notification in enumerate(self._items):
+            if notification['read']:
+                del self._items[index]
+                return
+        self._items.popleft()
+
+    def items(self) -> list:
+        return list(self._items)
+
+    def unread_count(self) -> int:
+        return sum(1 for notification in self._items if not notification['read'])
+
+    def mark_read(self, ids: Optional[Iterable[int]] = None) -> int:
+        """סימון התראות כנקראו (כולן אם ids=None); מחזיר כמה סומנו"""
+        wanted = set(ids) if ids is not None else None
+        marked = 0
+        for notification in self._items:
+            if not notification['read'] and (wanted is None or notification['id'] in wanted):
+                notification['read'] = True
+                marked += 1
+        return marked
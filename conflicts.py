@@ -0,0 +1,193 @@
+"""זיהוי התנגשויות בין משמרות של אותו עובד
+
+כל משמרת היא קטע זמן מוחלט (דקות מאז תחילת לוח השנה), כך שמשמרות
+שחוצות את חצות ושעות שעודכנו ב-update_shift_hours נבדקות בדיוק כמו כל
+משמרת אחרת. שני סוגי התנגשות:
+    overlap - המשמרות חופפות בזמן
+    rest    - בין סוף משמרת לתחילת הבאה יש פחות ממנוחת המינימום
+
+IntervalIndex מחזיק לכל עובד רשימה ממוינת של קטעים ונבדק ב-O(log n)
+לפני שיבוץ; audit סורק את כל ההיסטוריה במעבר אחד (אחרי מיון).
+
+    python conflicts.py schedule.json [--min-rest-hours 8]
+"""
+import argparse
+import bisect
+import sys
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_MIN_REST_MINUTES = 8 * 60  # כמו ברירת המחדל של auto_scheduler
+# משמרת אורכת לכל היותר יממה, כך שמשמרת שמתחילה מוקדם מזה לא יכולה להגיע לקטע הנבדק
+MAX_SHIFT_MINUTES = MINUTES_PER_DAY
+
+Interval = Tuple[int, int]  # (התחלה, סיום) בדקות מוחלטות
+
+OVERLAP = 'overlap'
+REST = 'rest'
+
+
+def shift_interval(day: date, start_minutes: int, end_minutes: int) -> Interval:
+    """קטע הזמן המוחלט של משמרת; סיום לפני ההתחלה (או שווה לה) = סיום למחרת"""
+    start = day.toordinal() * MINUTES_PER_DAY + start_minutes
+    duration = (end_minutes - start_minutes) % MINUTES_PER_DAY or MINUTES_PER_DAY
+    return start, start + duration
+
+
+def interval_date(minutes: int) -> date:
+    return date.fromordinal(minutes // MINUTES_PER_DAY)
+
+
+def format_interval(interval: Interval) -> str:
+    start, end = interval
+    return (f"{interval_date(start).isoformat()} {start % MINUTES_PER_DAY // 60:02d}:{start % 60:02d}"
+            f"-{end % MINUTES_PER_DAY // 60:02d}:{end % 60:02d}")
+
+
+def classify(first: Interval, second: Interval, min_rest: int) -> Optional[str]:
+    """סוג ההתנגשות בין שני קטעים (first מתחיל לא אחרי second), או None"""
+    gap = second[0] - first[1]
+    if gap < 0:
+        return OVERLAP
+    if gap < min_rest:
+        return REST
+    return None
+
+
+class IntervalIndex:
+    """קטעי המשמרות של כל עובד, ממוינים לפי זמן התחלה
+
+    הקטעים עצמם יכולים לחפוף (היסטוריה ישנה עם התנגשויות), ולכן הבדיקה
+    לא מסתמכת על השכנים בלבד אלא על כל הקטעים שמתחילים בחלון שבו קטע
+    יכול בכלל להגיע לקטע הנבדק - בפועל משמרות בודדות.
+    """
+
+    def __init__(self):
+        self._intervals: Dict[str, List[Interval]] = {}
+
+    def add(self, employee: str, interval: Interval):
+        bisect.insort(self._intervals.setdefault(employee, []), interval)
+
+    def remove(self, employee: str, interval: Interval) -> bool:
+        intervals = self._intervals.get(employee)
+        if not intervals:
+            return False
+        position = bisect.bisect_left(intervals, interval)
+        if position == len(intervals) or intervals[position] != interval:
+            return False
+        del intervals[position]
+        if not intervals:
+            del self._intervals[employee]
+        return True
+
+    def add_shift(self, day: date, start_minutes: int, end_minutes: int, employees: Iterable[str],
+                  sign: int = 1):
+        """הוספה (sign=1) או הסרה (sign=-1) של המשמרת לכל העובדים שבה"""
+        interval = shift_interval(day, start_minutes, end_minutes)
+        for employee in employees:
+            if sign > 0:
+                self.add(employee, interval)
+            else:
+                self.remove(employee, interval)
+
+    def conflict(self, employee: str, interval: Interval,
+                 min_rest: int = DEFAULT_MIN_REST_MINUTES) -> Optional[Tuple[str, Interval]]:
+        """ההתנגשות הראשונה של קטע חדש עם משמרות העובד: (סוג, הקטע הקיים), או None"""
+        intervals = self._intervals.get(employee)
+        if not intervals:
+            return None
+        start, end = interval
+        low = bisect.bisect_left(intervals, (start - MAX_SHIFT_MINUTES - min_rest,))
+        high = bisect.bisect_left(intervals, (end + min_rest,))
+        for existing in intervals[low:high]:
+            kind = classify(existing, interval, min_rest) if existing <= interval \
+                else classify(interval, existing, min_rest)
+            if kind is not None:
+                return kind, existing
+        return None
+
+    def window(self, start: int, end: int) -> 'IntervalIndex':
+        """אינדקס חדש רק עם הקטעים שמתחילים בין start ל-end (למשל סביב שבוע שמשבצים)"""
+        index = IntervalIndex()
+        for employee, intervals in self._intervals.items():
+            selected = intervals[bisect.bisect_left(intervals, (start,)):bisect.bisect_left(intervals, (end,))]
+            if selected:
+                index._intervals[employee] = selected
+        return index
+
+    def employees(self) -> List[str]:
+        return list(self._intervals)
+
+    def __len__(self) -> int:
+        return sum(len(intervals) for intervals in self._intervals.values())
+
+
+class Conflict:
+    """התנגשות שנמצאה בביקורת: העובד, שתי המשמרות (לפי סדר הזמן) וסוג ההתנגשות"""
+    __slots__ = ('employee', 'first', 'second', 'kind')
+
+    def __init__(self, employee: str, first: Interval, second: Interval, kind: str):
+        self.employee = employee
+        self.first = first
+        self.second = second
+        self.kind = kind
+
+    def to_dict(self) -> dict:
+        return {'employee': self.employee, 'kind': self.kind,
+                'first': format_interval(self.first), 'second': format_interval(self.second)}
+
+    def __repr__(self) -> str:
+        return f"Conflict({self.employee!r}, {self.kind}, {format_interval(self.first)}, {format_interval(self.second)})"
+
+
+def audit(shifts: Iterable[Tuple[date, int, int, Iterable[str]]],
+          min_rest: int = DEFAULT_MIN_REST_MINUTES) -> Iterator[Conflict]:
+    """כל ההתנגשויות במשמרות (תאריך, דקת התחלה, דקת סיום, עובדים)
+
+    הקטעים ממוינים לכל עובד, ואז מעבר אחד משווה כל משמרת למשמרת שמסתיימת
+    הכי מאוחר מבין הקודמות לה - אם היא לא מתנגשת איתה, היא לא מתנגשת עם
+    אף אחת מהן.
+    """
+    by_employee: Dict[str, List[Interval]] = {}
+    for day, start_minutes, end_minutes, employees in shifts:
+        interval = shift_interval(day, start_minutes, end_minutes)
+        for employee in employees:
+            by_employee.setdefault(employee, []).append(interval)
+
+    for employee in sorted(by_employee):
+        intervals = sorted(by_employee[employee])
+        latest = intervals[0]
+        for interval in intervals[1:]:
+            kind = classify(latest, interval, min_rest)
+            if kind is not None:
+                yield Conflict(employee, latest, interval, kind)
+            if interval[1] > latest[1]:
+                latest = interval
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="ביקורת התנגשויות בכל המשמרות")
+    parser.add_argument('path', help="קובץ נתונים (.json/.snap) או מאגר SQLite (.db)")
+    parser.add_argument('--min-rest-hours', type=float, default=DEFAULT_MIN_REST_MINUTES / 60)
+    args = parser.parse_args(argv)
+    from shift_management_system import ShiftManagementSystem
+
+    system = ShiftManagementSystem()
+    if args.path.endswith('.db'):
+        from storage import SQLiteStorage
+        system.attach_storage(SQLiteStorage(args.path))
+    else:
+        system.load_from_file(args.path)
+
+    count = 0
+    for conflict in system.audit_conflicts(round(args.min_rest_hours * 60)):
+        count += 1
+        label = 'חפיפה' if conflict.kind == OVERLAP else 'מנוחה קצרה'
+        print(f"{conflict.employee}\t{label}\t{format_interval(conflict.first)}\t{format_interval(conflict.second)}")
+    print(f"נמצאו {count} התנגשויות")
+    return 1 if count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
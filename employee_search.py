@@ -0,0 +1,314 @@
+"""חיפוש וסינון עובדים בזיכרון, לדף ניהול העובדים
+
+EmployeeIndex מחזיק לכל עובד:
+    - מילות חיפוש מנורמלות (שם פרטי, שם משפחה, שם משתמש, מספר עובד, ובפרטים
+      האישיים גם אימייל וטלפון) ברשימה ממוינת - התאמת קידומת ב-bisect
+    - טריגרמים של המילים שאינן מספרים - התאמת תת-מחרוזת (למשל "רידמ" בתוך
+      "פרידמן") בחיתוך רשימות הטריגרמים ובדיקה של המועמדים בלבד
+    - מפות מדויקות ממספר עובד, תעודת זהות ואימייל לשמות משתמש
+    - קבוצות לפי צוות ותפקיד, וקבוצת המנהלים, לסינון בלי לעבור על כל עובד
+
+הנרמול זהה בעברית ובאנגלית: אותיות קטנות, בלי ניקוד וסימני הטעמה, ואותיות
+סופיות כרגילות (כך ש"כהנ" מוצא את "כהן"). כל מילה בשאילתה צריכה להתאים
+(AND); מילה מתאימה בקידומת, בתת-מחרוזת (3 תווים ומעלה, לא במספרים) או
+בדיוק לאחד המזהים. טלפון נשמר גם כספרות בלבד, כך שמספר מלא או תחילתו
+מוצאים אותו. הסדר לכל מפתח מיון נשמר אחרי החישוב הראשון, כך שדף תוצאות
+מתוך רשימה גדולה אינו ממיין אותה מחדש.
+
+האינדקס מתעדכן ב-add/remove על ידי המערכת (ראו
+ShiftManagementSystem.employee_index); כתיבה ישירה ל-system.users אחרי
+שהאינדקס נבנה לא נראית בו.
+"""
+import bisect
+import re
+import unicodedata
+from functools import lru_cache
+from sys import intern
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# שדות שמופיעים רק למי שמנהל עובדים (Permission.MANAGE_EMPLOYEES)
+PRIVATE_FIELDS = ('email', 'phone', 'id_number')
+SORT_KEYS = ('name', 'username', 'employee_number')
+EXACT_FIELDS = ('employee_number', 'id_number', 'email')
+MAX_PER_PAGE = 200
+
+_FINAL_LETTERS = str.maketrans('ךםןףץ', 'כמנפצ')
+# סימנים צמודים לאות: סימנים מעל אותיות לטיניות (אחרי NFKD), ניקוד וטעמים - בלי המקף העברי וסוף פסוק
+_MARKS = re.compile('[\u0300-\u036f\u0591-\u05bd\u05bf\u05c1\u05c2\u05c4\u05c5\u05c7]')
+_WORD = re.compile(r'[^\W_]+')
+
+
+def normalize(text: str) -> str:
+    """אותיות קטנות, בלי ניקוד/טעמים/סימנים מעל אותיות לטיניות, ואותיות סופיות כרגילות"""
+    if not text:
+        return ''
+    if text.isascii():
+        return text.lower()
+    return _MARKS.sub('', unicodedata.normalize('NFKD', text)).casefold().translate(_FINAL_LETTERS)
+
+
+def words(text: str) -> List[str]:
+    """המילים המנורמלות בטקסט: רצפי אותיות וספרות (גרש, מקף ונקודה מפרידים)"""
+    return [intern(word) for word in _WORD.findall(normalize(text))]
+
+
+@lru_cache(maxsize=16384)
+def _name_words(name: str) -> Tuple[str, ...]:
+    """המילים של שם פרטי/משפחה - שמות חוזרים רבות, ולכן במטמון"""
+    return tuple(words(name))
+
+
+def trigrams(word: str) -> Set[str]:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def _text_trigrams(words: Iterable[str]) -> Set[str]:
+    """טריגרמים של המילים שאינן מספרים (במספרים - קידומת בלבד)"""
+    result = set()
+    for word in words:
+        if not word.isdigit():
+            result |= trigrams(word)
+    return result
+
+
+def _exact(value: str) -> str:
+    return normalize(value.strip()) if value else ''
+
+
+class _Entry:
+    """מה שהאינדקס זוכר על עובד אחד"""
+    __slots__ = ('public', 'private', 'exact', 'team', 'role', 'is_admin', 'sort_keys')
+
+    def __init__(self, user):
+        self.public = tuple(sorted({*_name_words(user.first_name), *_name_words(user.last_name),
+                                    *words(f"{user.username} {user.employee_number}")}))
+        # הטלפון גם כספרות בלבד, כך ש-0541234567 מוצא את 054-1234567
+        digits = ''.join(char for char in user.phone or '' if char.isdigit())
+        self.private = tuple(sorted(set(words(f"{user.email} {user.phone} {digits}")) - set(self.public)))
+        self.exact = tuple(_exact(getattr(user, field)) for field in EXACT_FIELDS)
+        self.team = user.team
+        self.role = user.role
+        self.is_admin = user.is_admin
+        name = normalize(f"{user.last_name} {user.first_name}").strip()
+        number = user.employee_number or ''
+        # לפי הסדר ב-SORT_KEYS. שם ריק בסוף ושוויון לפי שם משתמש; מספרי עובד
+        # מספריים לפי ערכם, אחריהם השאר, וריקים בסוף
+        self.sort_keys = (
+            (not name, name, user.username),
+            (user.username,),
+            (not number, not number.isdigit(), int(number) if number.isdigit() else 0, number, user.username),
+        )
+
+    def rows(self, username: str):
+        """השורות של העובד ברשימת המילים, "מילה\0שם משתמש" ובפרטים האישיים גם "\0p"
+
+        שורה היא מחרוזת אחת ולא tuple: מיון והשוואה של מחרוזות מהירים יותר,
+        והמילה בתחילתה שומרת על סדר המילים לחיפוש קידומת.
+        """
+        for word in self.public:
+            yield f"{word}\0{username}"
+        for word in self.private:
+            yield f"{word}\0{username}\0p"
+
+
+# בקבוצות (מפתח -> שמות משתמש) ערך של עובד יחיד נשמר כמחרוזת ולא כקבוצה: רוב
+# המזהים והטריגרמים הנדירים שייכים לעובד אחד, וקבוצה ריקה כמעט תופסת פי כמה
+
+def _members(groups: dict, key) -> Set[str]:
+    members = groups.get(key)
+    if members is None:
+        return set()
+    return {members} if isinstance(members, str) else members
+
+
+def _add_to(groups: dict, key, username: str):
+    members = groups.get(key)
+    if members is None:
+        groups[key] = username
+    elif isinstance(members, str):
+        if members != username:
+            groups[key] = {members, username}
+    else:
+        members.add(username)
+
+
+def _remove_from(groups: dict, key, username: str):
+    members = groups.get(key)
+    if members is None:
+        return
+    if isinstance(members, str):
+        if members == username:
+            del groups[key]
+        return
+    members.discard(username)
+    if len(members) == 1:
+        groups[key] = next(iter(members))
+
+
+class EmployeeIndex:
+    """אינדקס חיפוש על עובדי המערכת (username -> פרטי חיפוש)"""
+
+    def __init__(self, users: Iterable = ()):
+        self._entries: Dict[str, _Entry] = {}
+        self._words: List[str] = []  # שורות _Entry.rows של כל העובדים, ממוינות
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._exact: Dict[str, Dict[str, Set[str]]] = {field: {} for field in EXACT_FIELDS}
+        self._teams: Dict[str, Set[str]] = {}
+        self._roles: Dict[str, Set[str]] = {}
+        self._admins: Set[str] = set()
+        self._order: Dict[str, List[str]] = {}  # מפתח מיון -> שמות משתמש ממוינים
+        rows = []
+        for user in users:
+            rows.extend(self._insert(user).rows(user.username))
+        self._words = sorted(rows)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._entries
+
+    def _insert(self, user) -> _Entry:
+        username = user.username
+        entry = self._entries[username] = _Entry(user)
+        for trigram in _text_trigrams(entry.public + entry.private):
+            _add_to(self._trigrams, trigram, username)
+        for field, value in zip(EXACT_FIELDS, entry.exact):
+            if value:
+                _add_to(self._exact[field], value, username)
+        _add_to(self._teams, entry.team, username)
+        _add_to(self._roles, entry.role, username)
+        if entry.is_admin:
+            self._admins.add(username)
+        self._order.clear()
+        return entry
+
+    def add(self, user):
+        """הוספת עובד, או עדכון עובד קיים אחרי שינוי בפרטיו"""
+        self.remove(user.username)
+        for row in self._insert(user).rows(user.username):
+            bisect.insort(self._words, row)
+
+    def remove(self, username: str) -> bool:
+        entry = self._entries.pop(username, None)
+        if entry is None:
+            return False
+        for row in entry.rows(username):
+            position = bisect.bisect_left(self._words, row)
+            if position < len(self._words) and self._words[position] == row:
+                del self._words[position]
+        for trigram in _text_trigrams(entry.public + entry.private):
+            _remove_from(self._trigrams, trigram, username)
+        for field, value in zip(EXACT_FIELDS, entry.exact):
+            _remove_from(self._exact[field], value, username)
+        _remove_from(self._teams, entry.team, username)
+        _remove_from(self._roles, entry.role, username)
+        self._admins.discard(username)
+        self._order.clear()
+        return True
+
+    def lookup(self, field: str, value: str) -> Set[str]:
+        """שמות המשתמש עם ערך מדויק בשדה (employee_number, id_number או email)"""
+        return set(_members(self._exact[field], _exact(value)))
+
+    def _prefix_matches(self, word: str, private: bool) -> Set[str]:
+        rows = self._words
+        position = bisect.bisect_left(rows, word)
+        matches = set()
+        while position < len(rows) and rows[position].startswith(word):
+            fields = rows[position].split('\0')
+            if private or len(fields) == 2:
+                matches.add(fields[1])
+            position += 1
+        return matches
+
+    def _substring_matches(self, word: str, private: bool) -> Set[str]:
+        postings = [_members(self._trigrams, trigram) for trigram in trigrams(word)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        matches = set()
+        for username in candidates:
+            entry = self._entries[username]
+            fields = entry.public + entry.private if private else entry.public
+            if any(word in candidate for candidate in fields):
+                matches.add(username)
+        return matches
+
+    def _term_matches(self, term: str, private: bool) -> Set[str]:
+        value = _exact(term)
+        matches = set(_members(self._exact['employee_number'], value))
+        if private:
+            matches.update(_members(self._exact['id_number'], value))
+            matches.update(_members(self._exact['email'], value))
+        text = None
+        # מילה אחת בשאילתה יכולה להתפרק לכמה (למשל "בן-דוד"), וכולן צריכות להתאים
+        for word in words(term):
+            if len(word) >= 3 and not word.isdigit():
+                found = self._substring_matches(word, private)
+            else:
+                found = self._prefix_matches(word, private)
+            text = found if text is None else text & found
+        return matches | text if text else matches
+
+    def ordered(self, sort: str) -> List[str]:
+        """כל שמות המשתמש לפי מפתח המיון (נשמר עד השינוי הבא)"""
+        order = self._order.get(sort)
+        if order is None:
+            entries, key = self._entries, SORT_KEYS.index(sort)
+            order = self._order[sort] = sorted(entries, key=lambda username: entries[username].sort_keys[key])
+        return order
+
+    def search(self, query: str = '', sort: str = 'name', descending: bool = False,
+               team: Optional[str] = None, role: Optional[str] = None, include_admins: bool = False,
+               private: bool = False, visible: Optional[Callable[[str, str], bool]] = None
+               ) -> List[str]:
+        """שמות המשתמש שמתאימים לשאילתה ולמסננים, ממוינים
+
+        private - האם האימייל, הטלפון ותעודת הזהות משתתפים בחיפוש.
+        visible(username, team) - סינון לפי הרשאת הצופה (למשל Grant.can_view_employee).
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"unknown sort key: {sort}")
+        matches = None  # None = כל העובדים
+        for term in query.split():
+            if not words(term):
+                continue  # סימנים בלבד
+            found = self._term_matches(term, private)
+            matches = found if matches is None else matches & found
+        for groups, key in ((self._teams, team), (self._roles, role)):
+            if key is not None:
+                members = _members(groups, key)
+                matches = members if matches is None else matches & members
+        if matches is not None and not include_admins:
+            matches = matches - self._admins
+        if matches is not None and not matches:
+            return []
+
+        entries = self._entries
+        if matches is None:
+            order = self.ordered(sort)
+            result = list(order) if include_admins else [username for username in order
+                                                         if username not in self._admins]
+        elif len(matches) * 8 > len(entries):
+            # הרבה תוצאות: מעבר על הסדר השמור; מעט: מיון של התוצאות בלבד
+            result = [username for username in self.ordered(sort) if username in matches]
+        else:
+            key = SORT_KEYS.index(sort)
+            result = sorted(matches, key=lambda username: entries[username].sort_keys[key])
+        if visible is not None:
+            result = [username for username in result if visible(username, entries[username].team)]
+        if descending:
+            result.reverse()
+        return result
+
+
+def paginate(items: list, page: int, per_page: int) -> dict:
+    """דף אחד מתוך רשימה (page מתחיל ב-1), עם הסך ומספר הדפים"""
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    pages = max(1, -(-len(items) // per_page))
+    page = max(1, min(page, pages))
+    start = (page - 1) * per_page
+    return {'total': len(items), 'page': page, 'per_page': per_page, 'pages': pages,
+            'items': items[start:start + per_page]}
@@ -0,0 +1,50 @@
+"""מטמון לתשובות JSON מסודרות, לפי גרסת המצב של המערכת"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+GZIP_MIN_BYTES = 1024
+
+
+class CachedBody:
+    """תשובה מוכנה: גוף JSON, ETag חזק וגרסה דחוסה (לתשובות גדולות)"""
+    __slots__ = ('version', 'etag', 'body', 'gzipped')
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        # ה-ETag נגזר מהתוכן ולא מהגרסה, כך שהוא זהה בין workers שונים
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+
+
+class VersionedResponseCache:
+    """מטמון LRU של תשובות JSON; רשומה תקפה כל עוד גרסת המצב לא השתנתה"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version: int, build) -> CachedBody:
+        """תשובה מהמטמון, או בנייה מחדש באמצעות build() אם הגרסה השתנתה"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        body = json.dumps(build(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        entry = CachedBody(version, body)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
@@ -0,0 +1,244 @@
+"""מדדי ביצועים (בפורמט Prometheus), פרופיילר דגימה ולוגים דרך תור
+
+- Registry: מונים והיסטוגרמות זמנים עם תוויות, ו-render() לטקסט של
+  Prometheus. מדדים שכבר נספרים במקום אחר (למשל פגיעות במטמון) נאספים
+  בזמן הייצוא דרך register_collector, בלי עבודה בנתיב הבקשה.
+- instrument_methods: עטיפת מתודות של מחלקה במדידת זמן.
+- SamplingProfiler: דגימת המחסנית של thread אחד, לפרופיל של בקשה בודדת.
+- start_queue_logging: כתיבת הלוגים מתבצעת ב-thread נפרד (QueueHandler).
+"""
+import atexit
+import bisect
+import functools
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time as timer
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# גבולות דליי ההיסטוגרמה בשניות (ברירת המחדל של לקוחות Prometheus)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """היסטוגרמה מצטברת: מספר תצפיות בכל דלי, סכום ומספר כולל"""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # האחרון הוא +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """הערכת אחוזון לפי הדליים (הגבול העליון של הדלי)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """מאגר המדדים של התהליך"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors = []
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+
+    def counter_value(self, name: str, **labels) -> float:
+        return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(_labels(labels))
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple]]):
+        """collector מחזיר (שם, סוג, תוויות, ערך) - נקרא רק בזמן הייצוא"""
+        self._collectors.append(collector)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """ייצוא בפורמט הטקסט של Prometheus (גרסה 0.0.4)"""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (list(h.counts), h.sum, h.count, h.buckets) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+
+        collected: Dict[str, Tuple[str, list]] = {}
+        for collector in self._collectors:
+            for name, metric_type, labels, value in collector():
+                collected.setdefault(name, (metric_type, []))[1].append((_labels(labels), value))
+
+        for name in sorted(counters):
+            self._header(lines, name, 'counter')
+            for key, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        for name in sorted(collected):
+            metric_type, samples = collected[name]
+            self._header(lines, name, metric_type)
+            for key, value in samples:
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        for name in sorted(histograms):
+            self._header(lines, name, 'histogram')
+            for key, (counts, total, count, buckets) in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines: list, name: str, metric_type: str):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+
+metrics = Registry()
+metrics.describe('shift_system_method_seconds', 'Time spent in ShiftManagementSystem methods')
+metrics.describe('http_request_duration_seconds', 'Request handling time by route')
+metrics.describe('http_requests_total', 'Requests by route, method and status')
+
+
+def instrument_methods(cls, names: Iterable[str], metric: str = 'shift_system_method_seconds',
+                       registry: Registry = metrics):
+    """עטיפת מתודות המחלקה במדידת זמן (היסטוגרמה לפי שם המתודה)"""
+    for name in names:
+        method = getattr(cls, name)
+
+        def wrap(method, name):
+            @functools.wraps(method)
+            def timed(*args, **kwargs):
+                start = timer.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    registry.observe(metric, timer.perf_counter() - start, method=name)
+            return timed
+
+        setattr(cls, name, wrap(method, name))
+    return cls
+
+
+class SamplingProfiler:
+    """פרופיילר דגימה ל-thread אחד
+
+    thread נפרד קורא את המחסנית של ה-thread הנמדד כל interval שניות.
+    התוצאה בפורמט "collapsed stacks" (פונקציות מופרדות ב-;) שמתאים
+    ישירות לכלי flame graph.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.001):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def start_queue_logging(level: int = logging.INFO,
+                        fmt: str = '%(asctime)s - %(levelname)s - %(message)s') -> logging.handlers.QueueListener:
+    """הפניית הלוגים לתור; thread ייעודי כותב אותם ל-stderr
+
+    מחליף את ה-handlers של ה-root logger, כך שקריאה ל-logger בבקשה רק
+    מכניסה רשומה לתור.
+    """
+    records = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(fmt))
+    listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
+    listener.start()
+    # ריקון התור ביציאה מהתהליך
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,149 @@
+"""לוח שנה ישראלי: שעון ישראל, תוויות ימים, תאריכים עבריים וחגים, ומפתחות שבוע
+
+כל מה שנבנה כאן נבנה פעם אחת ולא בכל בקשה:
+    - אזור הזמן Asia/Jerusalem נטען פעם אחת (zoneinfo מהספרייה התקנית,
+      pytz אם אין בסיס נתוני אזורי זמן, ושעון מקומי אם אין אף אחד)
+    - ספריית hebrew_dates (אופציונלית) מיובאת פעם אחת, וכל תאריך עברי
+      מחושב פעם אחת
+    - תוויות הימים ("ראשון 18/10/2026") ושמות החגים מחושבים מראש לחלון
+      תאריכים סביב היום (DayWindow), והגישה אליהם היא אינדקס ברשימה
+
+השבוע הישראלי מתחיל ביום ראשון. ב-date.toordinal() יום ראשון הוא בדיוק
+הכפולות של 7, ולכן תחילת השבוע ומפתח השבוע הם חשבון על מספר שלם.
+"""
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from shift_templates import hebrew_holiday
+
+HEBREW_DAYS = ['ראשון', 'שני', 'שלישי', 'רביעי', 'חמישי', 'שישי', 'שבת']
+TIMEZONE_NAME = 'Asia/Jerusalem'
+
+
+def _load_timezone():
+    try:
+        from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+        try:
+            return ZoneInfo(TIMEZONE_NAME)
+        except ZoneInfoNotFoundError:
+            # למשל Windows בלי חבילת tzdata
+            pass
+    except ImportError:
+        pass
+    try:
+        import pytz
+        return pytz.timezone(TIMEZONE_NAME)
+    except ImportError:
+        return None
+
+
+ISRAEL_TZ = _load_timezone()  # None = שעון מקומי
+
+
+def israel_now() -> datetime:
+    """התאריך והשעה הנוכחיים בישראל (שעון מקומי אם אין נתוני אזור זמן)"""
+    return datetime.now(ISRAEL_TZ) if ISRAEL_TZ is not None else datetime.now()
+
+
+def week_start(day: date) -> date:
+    """יום ראשון של השבוע הישראלי שבו נמצא התאריך"""
+    ordinal = day.toordinal()
+    return date.fromordinal(ordinal - ordinal % 7)
+
+
+def week_key(day: date) -> int:
+    """מספר השבוע הישראלי של התאריך - שווה לכל ימי אותו שבוע, עולה באחד בכל שבוע"""
+    return day.toordinal() // 7
+
+
+try:
+    from hebrew_dates import GregorianDate, HebrewDate
+except ImportError:
+    # בלי הספרייה: התאריך הלועזי במקום העברי, ואין חגים מהלוח העברי
+    GregorianDate = HebrewDate = None
+
+
+@lru_cache(maxsize=8192)
+def hebrew_date(day: date) -> str:
+    """התאריך העברי כמחרוזת (או הלועזי, אם hebrew_dates אינה מותקנת)"""
+    if HebrewDate is None:
+        return day.strftime('%d/%m/%Y')
+    return HebrewDate.from_gregorian(GregorianDate(day.year, day.month, day.day)).hebrew_date_string()
+
+
+def _day_entry(day: date) -> Tuple[str, str, Optional[str]]:
+    """(תווית עם שנה, תווית בלי שנה, שם החג)"""
+    name = HEBREW_DAYS[(day.weekday() + 1) % 7]
+    short = f"{name} {day.day:02d}/{day.month:02d}"
+    holiday = hebrew_holiday(hebrew_date(day)) if HebrewDate is not None else None
+    return f"{short}/{day.year:04d}", short, holiday
+
+
+class DayWindow:
+    """תוויות ושמות חגים מחושבים מראש לימים שבין before ימים לפני היום ל-after ימים אחריו
+
+    יום שמחוץ לחלון מחושב ישירות, בלי לשמור אותו. אם היום עצמו התקדם מאז
+    בניית החלון, החלון נבנה מחדש סביבו (פעם אחת, בפספוס הראשון אחרי שהחלון
+    מתחיל להתיישן), כך שהוא זז עם הזמן ולא עם בקשות לתאריכים רחוקים.
+    """
+
+    def __init__(self, before: int = 400, after: int = 400, today: Optional[date] = None):
+        self.before = before
+        self.after = after
+        self._lock = threading.Lock()
+        self._center = None
+        self._build(today or israel_now().date())
+
+    def _build(self, center: date):
+        self._center = center
+        first = center.toordinal() - self.before
+        entries = [_day_entry(date.fromordinal(ordinal))
+                   for ordinal in range(first, center.toordinal() + self.after + 1)]
+        # החלפה באובייקט אחד, כך שקוראים במקביל רואים חלון שלם (ישן או חדש)
+        self._window: Tuple[int, List[tuple]] = (first, entries)
+
+    def entry(self, day: date) -> Tuple[str, str, Optional[str]]:
+        first, entries = self._window
+        index = day.toordinal() - first
+        if 0 <= index < len(entries):
+            return entries[index]
+        today = israel_now().date()
+        if today > self._center:
+            with self._lock:
+                if today > self._center:
+                    self._build(today)
+            first, entries = self._window
+            index = day.toordinal() - first
+            if 0 <= index < len(entries):
+                return entries[index]
+        return _day_entry(day)
+
+    @property
+    def first_day(self) -> date:
+        return date.fromordinal(self._window[0])
+
+    def __len__(self) -> int:
+        return len(self._window[1])
+
+
+_window = None
+
+
+def day_window() -> DayWindow:
+    """החלון המשותף, נבנה בשימוש הראשון"""
+    global _window
+    if _window is None:
+        _window = DayWindow()
+    return _window
+
+
+def day_label(day: date, with_year: bool = True) -> str:
+    """תווית תצוגה ליום, למשל "ראשון 13/10/2026" (או "ראשון 13/10")"""
+    return day_window().entry(day)[0 if with_year else 1]
+
+
+def holiday_name(day: date) -> Optional[str]:
+    """שם החג מהלוח העברי (ראו shift_templates.HEBREW_HOLIDAYS), או None"""
+    return day_window().entry(day)[2]
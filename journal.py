@@ -0,0 +1,148 @@
+"""יומן שינויים (write-ahead journal) לשמירה מצטברת של מצב המערכת"""
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # ב-Windows אין fcntl - נוותר על נעילה בין תהליכים
+    fcntl = None
+
+
+class Journal:
+    """יומן הוספה בלבד הנשמר לצד קובץ תמונת מצב (snapshot)
+
+    כל שורה ביומן היא רשומת JSON אחת. השורה הראשונה היא כותרת עם מספר
+    הדור (generation) של תמונת המצב שהיומן ממשיך. בעת איחוד (compaction)
+    נכתבת תמונת מצב חדשה עם דור חדש ומוחלפת אטומית, ורק אחר כך נפתח יומן
+    חדש - כך שקריסה בין שני השלבים לא גורמת להחלת רשומות פעמיים.
+    """
+
+    def __init__(self, snapshot_path: str, compact_every: int = 1000, fsync: bool = False):
+        self.snapshot_path = snapshot_path
+        self.path = f"{snapshot_path}.journal"
+        self.lock_path = f"{snapshot_path}.lock"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.generation = 0
+        self.pending = 0  # מספר הרשומות מאז האיחוד האחרון
+
+    @contextmanager
+    def locked(self, exclusive: bool = True):
+        """נעילה בין תהליכים (למשל בין workers של gunicorn)"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.compact_every > 0 and self.pending >= self.compact_every
+
+    def append(self, record: dict):
+        """הוספת רשומה ליומן בכתיבה אחת (O_APPEND)"""
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self.locked(exclusive=False):
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode('utf-8'))
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+        self.pending += 1
+
+    def write_snapshot(self, data: dict, encode=None):
+        """כתיבת תמונת מצב חדשה בהחלפה אטומית ופתיחת יומן ריק
+
+        encode ממיר את המילון לתוכן הקובץ (למשל snapshot.encode לפורמט
+        הבינארי); ברירת המחדל היא JSON.
+        """
+        generation = data.get('journal_generation', 0) + 1
+        data['journal_generation'] = generation
+        content = encode(data) if encode is not None else json.dumps(data, ensure_ascii=False)
+        atomic_write(self.snapshot_path, content, self.fsync)
+        header = json.dumps({'op': 'header', 'generation': generation}) + '\n'
+        atomic_write(self.path, header, self.fsync)
+        self.generation = generation
+        self.pending = 0
+
+    def repair(self, generation: int):
+        """התאמת היומן לתמונת המצב שנטענה, לפני שמוסיפים לו רשומות
+
+        יומן מדור קודם (קריסה אחרי החלפת תמונת המצב ולפני כתיבת הכותרת
+        החדשה) או בלי כותרת מוחלף ביומן ריק של הדור הנתון: הרשומות שבו כבר
+        כלולות בתמונת המצב, ורשומות חדשות שיתווספו אחרי כותרת ישנה היו
+        נזרקות בטעינה הבאה. יומן מדור חדש יותר (תהליך אחר איחד בינתיים)
+        נשאר כמו שהוא. בכל מקרה אחר נסגרת שורה קטועה בסוף היומן כדי שרשומות
+        חדשות לא יידבקו אליה.
+        """
+        with self.locked():
+            current = self.read_generation(self.path)
+            if current is None or current < generation:
+                header = json.dumps({'op': 'header', 'generation': generation}) + '\n'
+                atomic_write(self.path, header, self.fsync)
+                return
+            with open(self.path, 'rb+') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+
+    @staticmethod
+    def read_generation(path: str):
+        """הדור שבכותרת היומן, או None אם אין יומן או כותרת תקינה"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(record, dict) or record.get('op') != 'header':
+            return None
+        return record.get('generation')
+
+    @staticmethod
+    def read_tail(snapshot_path: str, generation: int) -> list:
+        """קריאת הרשומות שנכתבו אחרי תמונת המצב מהדור הנתון"""
+        path = f"{snapshot_path}.journal"
+        if not os.path.exists(path):
+            return []
+
+        records = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # שורה קטועה מקריסה באמצע כתיבה - מדלגים
+                    continue
+                if record.get('op') == 'header':
+                    if line_number == 0 and record.get('generation') != generation:
+                        # יומן של דור קודם - כבר כלול בתמונת המצב
+                        return []
+                    continue
+                records.append(record)
+        return records
+
+
+def atomic_write(path: str, content, fsync: bool = False):
+    """כתיבת קובץ (טקסט או bytes) לקובץ זמני והחלפה אטומית"""
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    if isinstance(content, bytes):
+        handle = open(tmp_path, 'wb')
+    else:
+        handle = open(tmp_path, 'w', encoding='utf-8')
+    with handle as f:
+        f.write(content)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,340 @@
+"""תחזוקה ברקע: מעבר שבוע, גיבויים מצטברים דחוסים וסבב שמירת גיבויים
+
+Maintenance מריץ thread אחד שמתעורר כשמשהו מגיע לזמנו:
+    - מעבר שבוע ביום ראשון 00:00 לפי זמן ישראל (ShiftManagementSystem.roll_over_week)
+    - גיבוי כל backup_interval שניות, מחוץ למסלול הבקשות
+    - מחיקת גיבויים ישנים לפי RetentionPolicy (שעתי/יומי/שבועי)
+
+הזמן נלקח תמיד מ-system.get_israel_time, כך שבבדיקות מציבים ב-system.clock
+שעון מזויף וקוראים ל-run_pending ישירות, בלי thread ובלי להמתין.
+
+מעבר השבוע ולקיחת תמונת המצב לגיבוי נוגעים במבנים שהבקשות קוראות ומשנות,
+ולכן רצים דרך dispatch - במצב ASGI ב-thread של Flask שבו רצים כל השינויים
+(ראו asgi.run_on_flask_thread). במצב WSGI עם workers של gevent הם רצים
+ישירות: ה-thread הוא greenlet, והם אינם מוותרים על המעבד באמצע. דחיסת
+הגיבוי וכתיבתו לדיסק רצות תמיד ב-thread של התחזוקה.
+
+מבנה תיקיית הגיבויים:
+    chunks/<hash>.json.gz            קטע דחוס: ליבה (משתמשים, ערעורים, תוכנית
+                                     ומשמרות השבוע) או חודש אחד של היסטוריה
+    backup-YYYYmmdd-HHMMSS.json      גיבוי: רשימת הקטעים שמרכיבים אותו
+
+שם הקטע הוא גיבוב התוכן, ולכן גיבוי חדש כותב רק קטעים שהשתנו - בדרך כלל
+הליבה והחודש הנוכחי - וגיבוי בלי שינוי לא נכתב כלל. שחזור:
+
+    python maintenance.py list backups
+    python maintenance.py restore backups schedule.json [backup-...json]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from journal import atomic_write
+
+try:
+    import fcntl
+except ImportError:
+    # ב-Windows אין fcntl - גיבוי מכמה תהליכים במקביל אינו מתואם
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKUP_INTERVAL = 3600
+# כמה זמן לכל היותר בין בדיקות (למשל אחרי שינוי שעון או מעבר לשעון קיץ)
+MAX_WAIT = 300
+MANIFEST_PREFIX = 'backup-'
+MANIFEST_FORMAT = '%Y%m%d-%H%M%S'
+CORE_CHUNK = 'core'
+HISTORY_CHUNK = 'history/'  # + YYYY-MM
+
+
+class RetentionPolicy:
+    """אילו גיבויים נשמרים: האחרון בכל אחת מ-hourly השעות, daily הימים ו-weekly השבועות האחרונים"""
+    __slots__ = ('hourly', 'daily', 'weekly')
+
+    def __init__(self, hourly: int = 24, daily: int = 7, weekly: int = 8):
+        self.hourly = hourly
+        self.daily = daily
+        self.weekly = weekly
+
+    def keep(self, stamps: Iterable[datetime]) -> set:
+        """הזמנים שנשמרים מתוך זמני הגיבויים הקיימים (האחרון תמיד נשמר)"""
+        stamps = sorted(stamps, reverse=True)
+        kept = set(stamps[:1])
+        buckets = (
+            (self.hourly, lambda stamp: (stamp.date(), stamp.hour)),
+            (self.daily, lambda stamp: stamp.date()),
+            (self.weekly, lambda stamp: stamp.isocalendar()[:2]),
+        )
+        for count, bucket in buckets:
+            seen = set()
+            for stamp in stamps:
+                key = bucket(stamp)
+                if key in seen:
+                    continue
+                if len(seen) >= count:
+                    break
+                seen.add(key)
+                kept.add(stamp)  # החדש ביותר בכל תקופה
+        return kept
+
+
+def split_chunks(data: dict) -> Dict[str, dict]:
+    """חלוקת קובץ הנתונים לקטעים: ליבה, וחודש לכל קטע היסטוריה"""
+    chunks = {CORE_CHUNK: {key: value for key, value in data.items() if key != 'history'}}
+    for day, shifts in data.get('history', {}).items():
+        chunks.setdefault(HISTORY_CHUNK + day[:7], {})[day] = shifts
+    return chunks
+
+
+def join_chunks(chunks: Dict[str, dict]) -> dict:
+    data = dict(chunks[CORE_CHUNK])
+    history = {}
+    for name in sorted(chunks):
+        if name.startswith(HISTORY_CHUNK):
+            history.update(chunks[name])
+    data['history'] = history
+    return data
+
+
+def _chunk_path(directory: str, digest: str) -> str:
+    return os.path.join(directory, 'chunks', f"{digest}.json.gz")
+
+
+def list_backups(directory: str) -> List[Tuple[datetime, str]]:
+    """(זמן, נתיב) לכל גיבוי בתיקייה, מהישן לחדש"""
+    if not os.path.isdir(directory):
+        return []
+    backups = []
+    for name in os.listdir(directory):
+        if not (name.startswith(MANIFEST_PREFIX) and name.endswith('.json')):
+            continue
+        try:
+            stamp = datetime.strptime(name[len(MANIFEST_PREFIX):-len('.json')], MANIFEST_FORMAT)
+        except ValueError:
+            continue
+        backups.append((stamp, os.path.join(directory, name)))
+    return sorted(backups)
+
+
+def _read_manifest(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@contextmanager
+def _backup_lock(directory: str):
+    """נעילה לא חוסמת של התיקייה; מחזיר False אם תהליך אחר מגבה עכשיו"""
+    if fcntl is None:
+        yield True
+        return
+    with open(os.path.join(directory, '.lock'), 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_backup(directory: str, data: dict, created: datetime) -> Optional[str]:
+    """כתיבת גיבוי מצטבר; מחזיר את נתיב הגיבוי, או None אם לא השתנה דבר (או שתהליך אחר מגבה)"""
+    os.makedirs(os.path.join(directory, 'chunks'), exist_ok=True)
+    with _backup_lock(directory) as acquired:
+        if not acquired:
+            return None
+        names = {}
+        written = 0
+        for name, chunk in split_chunks(data).items():
+            content = json.dumps(chunk, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+            digest = hashlib.sha256(content).hexdigest()[:32]
+            names[name] = digest
+            path = _chunk_path(directory, digest)
+            if not os.path.exists(path):
+                # mtime=0: אותו תוכן נותן אותו קובץ
+                atomic_write(path, gzip.compress(content, compresslevel=6, mtime=0))
+                written += 1
+
+        backups = list_backups(directory)
+        if backups and _read_manifest(backups[-1][1])['chunks'] == names:
+            return None
+        stamp = created.replace(tzinfo=None, microsecond=0)
+        if backups and stamp <= backups[-1][0]:
+            stamp = backups[-1][0] + timedelta(seconds=1)  # שמות ייחודיים וממוינים
+        path = os.path.join(directory, f"{MANIFEST_PREFIX}{stamp.strftime(MANIFEST_FORMAT)}.json")
+        atomic_write(path, json.dumps({'created': stamp.isoformat(), 'chunks': names}, indent=1))
+    logger.info(f"Backup {path}: {written} of {len(names)} chunks written")
+    return path
+
+
+def read_backup(path: str) -> dict:
+    """קובץ הנתונים המלא מגיבוי (לשחזור: json.dump ואז load_from_file)"""
+    directory = os.path.dirname(path)
+    chunks = {}
+    for name, digest in _read_manifest(path)['chunks'].items():
+        with open(_chunk_path(directory, digest), 'rb') as f:
+            chunks[name] = json.loads(gzip.decompress(f.read()))
+    return join_chunks(chunks)
+
+
+def prune_backups(directory: str, policy: RetentionPolicy) -> int:
+    """מחיקת גיבויים שמחוץ למדיניות ושל קטעים שאף גיבוי לא משתמש בהם; מחזיר כמה גיבויים נמחקו"""
+    if not os.path.isdir(directory):
+        return 0
+    with _backup_lock(directory) as acquired:
+        if not acquired:
+            return 0
+        backups = list_backups(directory)
+        kept = policy.keep(stamp for stamp, _ in backups)
+        removed = 0
+        used = set()
+        for stamp, path in backups:
+            if stamp in kept:
+                used.update(_read_manifest(path)['chunks'].values())
+            else:
+                os.remove(path)
+                removed += 1
+        chunks_dir = os.path.join(directory, 'chunks')
+        for name in os.listdir(chunks_dir):
+            if name.endswith('.json.gz') and name[:-len('.json.gz')] not in used:
+                os.remove(os.path.join(chunks_dir, name))
+    return removed
+
+
+def _call(fn):
+    return fn()
+
+
+class Maintenance:
+    """משימות רקע תקופתיות לכל המערכות ש-systems מחזיר
+
+    systems מחזיר רשימת (מפתח, מערכת): מערכת אחת, או האתרים הטעונים
+    במצב ריבוי אתרים. הגיבויים של כל מערכת נשמרים ב-backup_dir/<מפתח>
+    (או ב-backup_dir עצמו למפתח ריק). בלי backup_dir - רק מעבר שבוע.
+    """
+
+    def __init__(self, systems: Callable[[], list], backup_dir: Optional[str] = None,
+                 backup_interval: float = DEFAULT_BACKUP_INTERVAL,
+                 retention: Optional[RetentionPolicy] = None,
+                 dispatch: Optional[Callable[[Callable], object]] = None):
+        self.systems = systems
+        self.backup_dir = backup_dir
+        self.backup_interval = backup_interval
+        self.retention = retention or RetentionPolicy()
+        # מריץ פעולה שנוגעת במצב המערכת במסלול השינויים שלה ומחזיר את התוצאה
+        self.dispatch = dispatch or _call
+        self._next_backup: Dict[str, datetime] = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _backup_path(self, key: str) -> str:
+        return os.path.join(self.backup_dir, key) if key else self.backup_dir
+
+    def _backup_due(self, key: str, now: datetime) -> datetime:
+        """מועד הגיבוי הבא; בהפעלה - לפי הגיבוי האחרון בדיסק, כדי שהפעלה מחדש לא תגבה מיד"""
+        due = self._next_backup.get(key)
+        if due is None:
+            backups = list_backups(self._backup_path(key))
+            due = (backups[-1][0] + timedelta(seconds=self.backup_interval) if backups
+                   else now.replace(tzinfo=None))
+            self._next_backup[key] = due
+        return due
+
+    def run_pending(self) -> dict:
+        """סבב אחד: כל מה שהגיע זמנו; מחזיר מה נעשה (לוגים ובדיקות)"""
+        done = {'rolled_over': [], 'backups': [], 'pruned': 0}
+        for key, system in self.systems():
+            try:
+                if self.dispatch(system.roll_over_week):
+                    done['rolled_over'].append(key)
+                if self.backup_dir is None:
+                    continue
+                now = system.get_israel_time()
+                if now.replace(tzinfo=None) < self._backup_due(key, now):
+                    continue
+                self._next_backup[key] = now.replace(tzinfo=None) + timedelta(seconds=self.backup_interval)
+                data = self.dispatch(system.backup_data)
+                path = write_backup(self._backup_path(key), data, now)
+                if path is not None:
+                    done['backups'].append(path)
+                done['pruned'] += prune_backups(self._backup_path(key), self.retention)
+            except Exception:
+                # תקלה באתר אחד (למשל דיסק מלא) לא עוצרת את השאר ואת הסבבים הבאים
+                logger.exception(f"Maintenance failed for {key or 'system'}")
+        return done
+
+    def seconds_until_due(self) -> float:
+        """זמן עד המשימה הקרובה: מעבר השבוע הבא או הגיבוי הבא"""
+        wait = MAX_WAIT
+        for key, system in self.systems():
+            now = system.get_israel_time()
+            midnight = datetime.combine(now.date(), datetime.min.time())
+            next_week = midnight + timedelta(days=7 - (now.weekday() + 1) % 7)
+            wait = min(wait, (next_week - now.replace(tzinfo=None)).total_seconds())
+            if self.backup_dir is not None:
+                wait = min(wait, (self._backup_due(key, now) - now.replace(tzinfo=None)).total_seconds())
+        return max(wait, 1.0)
+
+    def _run(self):
+        while not self._stop.wait(self.seconds_until_due()):
+            self.run_pending()
+
+    def start(self) -> 'Maintenance':
+        self._thread = threading.Thread(target=self._run, name='maintenance', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="גיבויים מצטברים: רשימה ושחזור")
+    commands = parser.add_subparsers(dest='command', required=True)
+    list_parser = commands.add_parser('list')
+    list_parser.add_argument('directory')
+    restore_parser = commands.add_parser('restore')
+    restore_parser.add_argument('directory')
+    restore_parser.add_argument('output', help="קובץ נתונים לכתיבה (.json או .snap)")
+    restore_parser.add_argument('backup', nargs='?', help="שם הגיבוי (ברירת מחדל: האחרון)")
+    args = parser.parse_args(argv)
+
+    backups = list_backups(args.directory)
+    if args.command == 'list':
+        for stamp, path in backups:
+            print(f"{stamp.isoformat(sep=' ')}\t{os.path.basename(path)}")
+        return 0
+    if not backups:
+        print(f"אין גיבויים ב-{args.directory}")
+        return 1
+    path = os.path.join(args.directory, args.backup) if args.backup else backups[-1][1]
+    from shift_management_system import ShiftManagementSystem
+
+    data = read_backup(path)
+    temporary = f"{args.output}.restore.json"
+    atomic_write(temporary, json.dumps(data, ensure_ascii=False))
+    try:
+        system = ShiftManagementSystem()
+        system.load_from_file(temporary)
+        system.save_to_file(args.output)
+    finally:
+        os.remove(temporary)
+    print(f"הגיבוי {os.path.basename(path)} שוחזר אל {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
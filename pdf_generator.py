@@ -2,56 +2,235 @@ from reportlab.pdfgen import canvas
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, Iterable, Optional
 import os
 
 try:
-    # ניסיון להשתמש בפונט עברי אם קיים
-    hebrew_font_path = "fonts/ArialHB.ttf"
-    if os.path.exists(hebrew_font_path):
-        pdfmetrics.registerFont(TTFont('Hebrew', hebrew_font_path))
-        DEFAULT_FONT = 'Hebrew'
-    else:
-        # אם אין פונט עברי, נשתמש בפונט ברירת מחדל
-        DEFAULT_FONT = 'Helvetica'
-except:
-    DEFAULT_FONT = 'Helvetica'
+    # סידור דו-כיווני מלא אם הספריה מותקנת
+    from bidi.algorithm import get_display
+except ImportError:
+    get_display = None
 
-def create_schedule_pdf(schedule, filename="schedule.pdf"):
-    """יצירת קובץ PDF של לוח המשמרות"""
-    c = canvas.Canvas(filename, pagesize=A4)
-    c.setFont(DEFAULT_FONT, 14)
-    
-    # כותרת
-    c.drawString(50, 800, "Weekly Schedule - Shkedia")
-    
-    y_position = 750
+HEBREW_FONT_PATH = "fonts/ArialHB.ttf"
+DEFAULT_TITLE = "Weekly Schedule - Shkedia"
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+TOP = 800
+BOTTOM = 50
+LEFT = 50
+
+_font_name = None
+
+def get_font() -> str:
+    """רישום הפונט העברי פעם אחת לכל תהליך"""
+    global _font_name
+    if _font_name is None:
+        try:
+            # ניסיון להשתמש בפונט עברי אם קיים
+            if os.path.exists(HEBREW_FONT_PATH):
+                pdfmetrics.registerFont(TTFont('Hebrew', HEBREW_FONT_PATH))
+                _font_name = 'Hebrew'
+            else:
+                # אם אין פונט עברי, נשתמש בפונט ברירת מחדל
+                _font_name = 'Helvetica'
+        except Exception:
+            _font_name = 'Helvetica'
+    return _font_name
+
+@lru_cache(maxsize=8192)
+def display_text(text: str) -> str:
+    """סידור חזותי של טקסט עברי (RTL) לציור, עם מטמון לטקסטים חוזרים"""
+    if not any('\u0590' <= char <= '\u05ff' for char in text):
+        return text
+    if get_display is not None:
+        return get_display(text)
+    # בלי python-bidi: היפוך סדר המילים והיפוך אותיות רק במילים עבריות
+    return ' '.join(
+        word[::-1] if any('\u0590' <= char <= '\u05ff' for char in word) else word
+        for word in reversed(text.split(' '))
+    )
+
+@lru_cache(maxsize=8192)
+def text_width(text: str, font: str, size: int) -> float:
+    """רוחב טקסט מחושב מראש (שמות עובדים וימים חוזרים בכל המסמכים)"""
+    return pdfmetrics.stringWidth(text, font, size)
+
+class PdfTemplate:
+    """החלקים הקבועים של מסמך לוח משמרות
+
+    הכותרת והקו שמתחתיה מוגדרים פעם אחת לכל מסמך כ-form XObject ומשובצים
+    בכל עמוד, כך שעבודת כל מסמך היא רק הנתונים המשתנים. תבניות נשמרות
+    במטמון לפי כותרת (ראו get_template).
+    """
+    FORM_NAME = 'schedule_static_page'
+
+    def __init__(self, title: str):
+        self.title = title
+        self.font = get_font()
+        self.title_text = display_text(title)
+
+    def begin_document(self, pdf: canvas.Canvas):
+        """הגדרת החלק הקבוע של העמוד במסמך"""
+        pdf.beginForm(self.FORM_NAME)
+        pdf.setFont(self.font, 14)
+        pdf.drawString(LEFT, TOP, self.title_text)
+        pdf.setLineWidth(0.5)
+        pdf.line(LEFT, TOP - 8, PAGE_WIDTH - LEFT, TOP - 8)
+        pdf.endForm()
+
+    def begin_page(self, pdf: canvas.Canvas, page: int):
+        pdf.doForm(self.FORM_NAME)
+        if page > 1:
+            pdf.setFont(self.font, 9)
+            pdf.drawRightString(PAGE_WIDTH - LEFT, BOTTOM - 20, str(page))
+
+_templates = {}
+
+def get_template(title: str = DEFAULT_TITLE) -> PdfTemplate:
+    """תבנית משותפת לכל המסמכים עם אותה כותרת (בתוך התהליך)"""
+    template = _templates.get(title)
+    if template is None:
+        template = _templates[title] = PdfTemplate(title)
+    return template
+
+def shift_label(shift: dict) -> str:
+    """שם המשמרת לפי שעת ההתחלה (ולא לפי מיקומה ביום)"""
+    hour = int(shift['start_time'].split(':')[0])
+    if 5 <= hour < 12:
+        return "Morning Shift"
+    if 12 <= hour < 20:
+        return "Evening Shift"
+    return "Night Shift"
+
+def filter_schedule(schedule: Dict, employee: str) -> Dict:
+    """לוח משמרות של עובד אחד - רק המשמרות שהוא משובץ בהן"""
+    return {
+        day: [dict(shift, employees=[employee]) for shift in shifts if employee in shift['employees']]
+        for day, shifts in schedule.items()
+    }
+
+class _PageWriter:
+    """כתיבת שורות לקנבס עם מעבר עמוד לפני כל שורה שלא נכנסת"""
+    def __init__(self, output, template: PdfTemplate):
+        self.canvas = canvas.Canvas(output, pagesize=A4)
+        self.template = template
+        self.font = template.font
+        self.page = 0
+        template.begin_document(self.canvas)
+        self._start_page()
+
+    def _start_page(self):
+        self.page += 1
+        self.template.begin_page(self.canvas, self.page)
+        self.y = TOP - 50
+
+    def ensure_space(self, height: float):
+        """מעבר לעמוד חדש אם אין מספיק מקום"""
+        if self.y - height < BOTTOM:
+            self.canvas.showPage()
+            self._start_page()
+
+    def line(self, text: str, size: int, indent: float = 0, spacing: float = 15):
+        self.ensure_space(spacing)
+        self.canvas.setFont(self.font, size)
+        self.canvas.drawString(LEFT + indent, self.y, display_text(text))
+        self.y -= spacing
+
+    def wrapped(self, text: str, size: int, indent: float = 0, spacing: float = 15):
+        """שורה ארוכה מפוצלת לפי רוחב העמוד"""
+        max_width = PAGE_WIDTH - LEFT * 2 - indent
+        words = text.split(' ')
+        current = ''
+        for word in words:
+            candidate = f"{current} {word}" if current else word
+            if current and text_width(candidate, self.font, size) > max_width:
+                self.line(current, size, indent, spacing)
+                current = word
+            else:
+                current = candidate
+        if current:
+            self.line(current, size, indent, spacing)
+
+    def save(self):
+        self.canvas.save()
+
+def render_schedule_pdf(schedule: Dict, output=None, title: str = DEFAULT_TITLE,
+                        employee: Optional[str] = None):
+    """יצירת PDF של לוח משמרות (שבוע, חודש או כל טווח)
+
+    output יכול להיות נתיב לקובץ או אובייקט קובץ; אם לא ניתן, נכתב
+    BytesIO שמוחזר מוכן לקריאה (למשל לתשובת HTTP).
+    """
+    buffer = BytesIO() if output is None else output
+    writer = _PageWriter(buffer, get_template(title))
+    if employee is not None:
+        schedule = filter_schedule(schedule, employee)
+        writer.line(f"Employee: {employee}", 12, spacing=25)
     for day, shifts in schedule.items():
-        # כותרת היום
-        c.setFont(DEFAULT_FONT, 12)
-        c.drawString(50, y_position, f"{day}:")
-        y_position -= 20
-        
-        for i, shift in enumerate(shifts):
-            shift_type = "Morning Shift" if i == 0 else "Evening Shift"
-            c.setFont(DEFAULT_FONT, 10)
+        # כותרת היום נשארת יחד עם המשמרת הראשונה שלו
+        writer.ensure_space(20 + (40 if shifts else 15))
+        writer.line(f"{day}:", 12, spacing=20)
+
+        if not shifts:
+            writer.line("No shifts", 10, indent=20)
+        for shift in shifts:
+            writer.ensure_space(40)
             # פרטי המשמרת
-            c.drawString(70, y_position, 
-                        f"{shift_type}: {shift['start_time']} - {shift['end_time']}")
-            
+            writer.line(f"{shift_label(shift)}: {shift['start_time']} - {shift['end_time']}",
+                        10, indent=20)
             # רשימת העובדים
             employees_str = ", ".join(shift['employees']) if shift['employees'] else "Not assigned"
-            c.drawString(70, y_position - 15, f"Employees: {employees_str}")
-            
-            y_position -= 40
-            
-        y_position -= 10
-        
-        # מעבר לעמוד חדש אם אין מספיק מקום
-        if y_position < 50:
-            c.showPage()
-            c.setFont(DEFAULT_FONT, 14)
-            y_position = 750
-    
-    c.save()
-    return filename 
\ No newline at end of file
+            writer.wrapped(f"Employees: {employees_str}", 10, indent=20)
+            writer.y -= 10
+        writer.y -= 10
+    writer.save()
+
+    if output is None:
+        buffer.seek(0)
+    return buffer
+
+def render_schedule_pdf_bytes(schedule: Dict, title: str = DEFAULT_TITLE,
+                              employee: Optional[str] = None) -> bytes:
+    """תוכן ה-PDF כ-bytes (למשל להרצה בתהליך נפרד שמחזיר את התוצאה)"""
+    return render_schedule_pdf(schedule, title=title, employee=employee).getvalue()
+
+def create_schedule_pdf(schedule, filename="schedule.pdf"):
+    """יצירת קובץ PDF של לוח המשמרות"""
+    render_schedule_pdf(schedule, filename)
+    return filename
+
+_worker_schedule = None
+_worker_title = None
+
+def _init_worker(schedule: Dict, title: str):
+    """אתחול תהליך עבודה: הלוח מועבר פעם אחת ולא עם כל משימה"""
+    global _worker_schedule, _worker_title
+    _worker_schedule = schedule
+    _worker_title = title
+    get_template(title)
+
+def _render_for_employee(task):
+    employee, output_dir = task
+    if output_dir is None:
+        return employee, render_schedule_pdf(_worker_schedule, title=_worker_title,
+                                             employee=employee).getvalue()
+    path = os.path.join(output_dir, f"schedule_{employee}.pdf")
+    render_schedule_pdf(_worker_schedule, path, title=_worker_title, employee=employee)
+    return employee, path
+
+def generate_employee_pdfs(schedule: Dict, employees: Iterable[str], output_dir: Optional[str] = None,
+                           title: str = DEFAULT_TITLE, max_workers: Optional[int] = None) -> Dict[str, object]:
+    """יצירת PDF אישי לכל עובד במקביל (מאגר תהליכים)
+
+    מחזיר מילון עובד -> נתיב הקובץ, או עובד -> תוכן ה-PDF אם לא ניתנה תיקייה.
+    """
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    tasks = [(employee, output_dir) for employee in employees]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(schedule, title)) as executor:
+        chunksize = max(1, len(tasks) // ((max_workers or os.cpu_count() or 1) * 4))
+        return dict(executor.map(_render_for_employee, tasks, chunksize=chunksize))
@@ -0,0 +1,229 @@
+"""דוחות שעות ושכר: שעות לכל עובד, שעות לילה/סוף שבוע/חג ושעות נוספות
+
+הסיכומים נשמרים מראש (rollups) ברמת יום, שבוע וחודש לכל עובד, ומתעדכנים
+בכל שיבוץ, הסרה ושינוי שעות - כך שדוח לטווח כלשהו מחבר חודשים ושבועות
+שלמים ורק את הימים שבקצוות, בלי לעבור על המשמרות עצמן.
+
+כללי החישוב (קבועים במודול):
+    שעות לילה    - בין 22:00 ל-06:00
+    סוף שבוע     - שישי מ-16:00 ועד סוף שבת
+    חג           - כל שעות המשמרת בתאריך שהוא חג (ראו is_holiday במערכת)
+    שעות נוספות  - מעבר ל-8 שעות ביום, ובנוסף מעבר ל-42 שעות רגילות בשבוע;
+                   השבועיות נזקפות לשבת של אותו שבוע
+שעות משמרת נזקפות לתאריך תחילת המשמרת, גם כשהיא חוצה את חצות.
+"""
+import csv
+import io
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from shift_templates import weekday_index
+from israel_calendar import week_start
+
+MINUTES_PER_DAY = 24 * 60
+NIGHT_END = 6 * 60
+NIGHT_START = 22 * 60
+FRIDAY_WEEKEND_START = 16 * 60
+DAILY_REGULAR_MINUTES = 8 * 60
+WEEKLY_REGULAR_MINUTES = 42 * 60
+
+# מיקומים ברשומת הסיכום; OVERTIME כולל את השעות הנוספות היומיות והשבועיות
+TOTAL, NIGHT, WEEKEND, HOLIDAY, OVERTIME = range(5)
+
+REPORT_FIELDS = ('employee', 'hours', 'night_hours', 'weekend_hours', 'holiday_hours', 'overtime_hours')
+
+
+def _overlap(start: int, end: int, low: int, high: int) -> int:
+    return max(0, min(end, high) - max(start, low))
+
+
+def shift_minutes(day: date, start_minutes: int, end_minutes: int,
+                  is_holiday: Callable[[date], bool]) -> Tuple[int, int, int, int]:
+    """פירוק משמרת לדקות: (סך הכל, לילה, סוף שבוע, חג)"""
+    if end_minutes <= start_minutes:
+        end_minutes += MINUTES_PER_DAY  # משמרת לילה - הסיום למחרת
+    total = end_minutes - start_minutes
+    night = weekend = holiday = 0
+    offset = 0
+    current = day
+    while offset < end_minutes:
+        # החלק של המשמרת שנופל ביום הנוכחי, בדקות מתחילת אותו יום
+        low = max(start_minutes, offset) - offset
+        high = min(end_minutes, offset + MINUTES_PER_DAY) - offset
+        if high > low:
+            night += _overlap(low, high, 0, NIGHT_END) + _overlap(low, high, NIGHT_START, MINUTES_PER_DAY)
+            weekday = weekday_index(current)
+            if weekday == 6:
+                weekend += high - low
+            elif weekday == 5:
+                weekend += _overlap(low, high, FRIDAY_WEEKEND_START, MINUTES_PER_DAY)
+            if is_holiday(current):
+                holiday += high - low
+        offset += MINUTES_PER_DAY
+        current += timedelta(days=1)
+    return total, night, weekend, holiday
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def range_keys(start: date, end: date) -> Tuple[List[date], List[date], List[date]]:
+    """פירוק טווח (כולל) לחודשים שלמים, שבועות שלמים וימים בודדים בקצוות
+
+    המפתחות הם תחילת החודש / יום ראשון של השבוע / התאריך, כמו בסיכומים.
+    """
+    months, weeks, days = [], [], []
+    current = start
+    while current <= end:
+        if current.day == 1:
+            next_month = (current + timedelta(days=32)).replace(day=1)
+            if next_month - timedelta(days=1) <= end:
+                months.append(current)
+                current = next_month
+                continue
+        if weekday_index(current) == 0 and current + timedelta(days=6) <= end \
+                and (current + timedelta(days=6)).month == current.month:
+            weeks.append(current)
+            current += timedelta(days=7)
+        else:
+            days.append(current)
+            current += timedelta(days=1)
+    return months, weeks, days
+
+
+class HoursLedger:
+    """סיכומי דקות לכל עובד ברמת יום, שבוע (לפי יום ראשון) וחודש
+
+    השעות הנוספות השבועיות נרשמות ביום השבת של השבוע (ומשם בשבוע ובחודש
+    שלו), כך שכל טווח מתקבל מסכום של רשומות בלבד.
+    """
+
+    def __init__(self, is_holiday: Callable[[date], bool]):
+        self._is_holiday = is_holiday
+        self._holidays: Dict[date, bool] = {}
+        self._breakdowns: Dict[Tuple[date, int, int], Tuple[int, int, int, int]] = {}
+        self.days: Dict[str, Dict[date, List[int]]] = {}
+        self.weeks: Dict[str, Dict[date, List[int]]] = {}
+        self.months: Dict[str, Dict[date, List[int]]] = {}
+        # employee -> {week: [שעות נוספות יומיות בשבוע, שעות נוספות שבועיות]}
+        self._week_overtime: Dict[str, Dict[date, List[int]]] = {}
+
+    def _holiday(self, day: date) -> bool:
+        result = self._holidays.get(day)
+        if result is None:
+            result = self._holidays[day] = bool(self._is_holiday(day))
+        return result
+
+    def _breakdown(self, day: date, start_minutes: int, end_minutes: int) -> Tuple[int, int, int, int]:
+        key = (day, start_minutes, end_minutes)
+        breakdown = self._breakdowns.get(key)
+        if breakdown is None:
+            breakdown = self._breakdowns[key] = shift_minutes(day, start_minutes, end_minutes, self._holiday)
+        return breakdown
+
+    @staticmethod
+    def _record(rollup: Dict[date, List[int]], key: date) -> List[int]:
+        totals = rollup.get(key)
+        if totals is None:
+            totals = rollup[key] = [0, 0, 0, 0, 0]
+        return totals
+
+    def _add_overtime(self, employee: str, day: date, minutes: int):
+        """שעות נוספות לרשומת היום ולשבוע ולחודש שלו"""
+        for rollup, key in ((self.days, day), (self.weeks, week_start(day)), (self.months, _month_start(day))):
+            totals = self._record(rollup.setdefault(employee, {}), key)
+            totals[OVERTIME] += minutes
+            if rollup is self.days and not any(totals):
+                del rollup[employee][key]
+
+    def add(self, employee: str, day: date, start_minutes: int, end_minutes: int, sign: int = 1):
+        """עדכון הסיכומים בשיבוץ (sign=1) או בהסרה (sign=-1) של עובד במשמרת"""
+        breakdown = self._breakdown(day, start_minutes, end_minutes)
+        week = week_start(day)
+        days = self.days.setdefault(employee, {})
+        weeks = self.weeks.setdefault(employee, {})
+        day_totals = self._record(days, day)
+        week_totals = self._record(weeks, week)
+        month_totals = self._record(self.months.setdefault(employee, {}), _month_start(day))
+        for index in (TOTAL, NIGHT, WEEKEND, HOLIDAY):
+            delta = sign * breakdown[index]
+            day_totals[index] += delta
+            week_totals[index] += delta
+            month_totals[index] += delta
+
+        overtime = self._week_overtime.setdefault(employee, {}).get(week)
+        if overtime is None:
+            overtime = self._week_overtime[employee][week] = [0, 0]
+        daily_before = max(0, day_totals[TOTAL] - sign * breakdown[TOTAL] - DAILY_REGULAR_MINUTES)
+        daily_delta = max(0, day_totals[TOTAL] - DAILY_REGULAR_MINUTES) - daily_before
+        if daily_delta:
+            self._add_overtime(employee, day, daily_delta)
+            overtime[0] += daily_delta
+        elif not any(day_totals):
+            del days[day]
+        # שעות נוספות שבועיות: מעבר ל-42 שעות רגילות (שאינן כבר שעות נוספות יומיות)
+        weekly = max(0, week_totals[TOTAL] - overtime[0] - WEEKLY_REGULAR_MINUTES)
+        if weekly != overtime[1]:
+            self._add_overtime(employee, week + timedelta(days=6), weekly - overtime[1])
+            overtime[1] = weekly
+
+    def add_shift(self, day: date, start_minutes: int, end_minutes: int, employees: Iterable[str],
+                  sign: int = 1):
+        for employee in employees:
+            self.add(employee, day, start_minutes, end_minutes, sign)
+
+    def employees(self) -> List[str]:
+        return list(self.days)
+
+    def totals(self, employee: str, start: date, end: date, keys=None) -> List[int]:
+        """[סך, לילה, סוף שבוע, חג, שעות נוספות] בדקות לטווח (כולל)
+
+        חודשים ושבועות שנכללים במלואם בטווח נלקחים מהסיכום שלהם, ורק
+        הימים שבקצוות נסכמים אחד אחד. keys - תוצאת range_keys לאותו טווח,
+        כשמחשבים כמה עובדים.
+        """
+        result = [0, 0, 0, 0, 0]
+        months, weeks, days = keys or range_keys(start, end)
+        for rollup, rollup_keys in ((self.months, months), (self.weeks, weeks), (self.days, days)):
+            records = rollup.get(employee)
+            if not records:
+                continue
+            for key in rollup_keys:
+                totals = records.get(key)
+                if totals is not None:
+                    result[0] += totals[0]
+                    result[1] += totals[1]
+                    result[2] += totals[2]
+                    result[3] += totals[3]
+                    result[4] += totals[4]
+        return result
+
+    def report(self, start: date, end: date, employees: Optional[Iterable[str]] = None) -> Iterator[dict]:
+        """שורת דוח (בשעות) לכל עובד, לפי סדר שמות העובדים"""
+        keys = range_keys(start, end)
+        for employee in sorted(self.days if employees is None else employees):
+            total, night, weekend, holiday, overtime = self.totals(employee, start, end, keys)
+            yield {
+                'employee': employee,
+                'hours': total / 60,
+                'night_hours': night / 60,
+                'weekend_hours': weekend / 60,
+                'holiday_hours': holiday / 60,
+                'overtime_hours': overtime / 60,
+            }
+
+
+def iter_csv(rows: Iterable[dict], fields=REPORT_FIELDS, excel: bool = True) -> Iterator[str]:
+    """ייצוא CSV בהזרמה, שורה אחרי שורה; excel=True מוסיף BOM כדי ש-Excel יזהה UTF-8"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    header = buffer.getvalue()
+    yield ('﻿' + header) if excel else header
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow({key: f"{value:.2f}" if isinstance(value, float) else value
+                         for key, value in row.items()})
+        yield buffer.getvalue()
@@ -0,0 +1,68 @@
+"""מטמון לתצוגות לוח המשמרות (שבועי/חודשי) עם פסילה מדויקת לפי תאריך"""
+import threading
+from collections import OrderedDict
+from datetime import date
+
+
+class ScheduleCache:
+    """מטמון LRU לתצוגות לוח משמרות
+
+    כל רשומה שומרת את טווח התאריכים שהיא מכסה, כך ששינוי במשמרת של יום
+    מסוים פוסל רק את התצוגות שמכילות את אותו יום. שבועות עבר שלא השתנו
+    נשארים במטמון.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (start, end, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """קבלת תצוגה מהמטמון, או None אם אינה קיימת"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, start: date, end: date, value):
+        """שמירת תצוגה שמכסה את טווח התאריכים start..end"""
+        with self._lock:
+            self._entries[key] = (start, end, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, day: date):
+        """פסילת כל התצוגות שמכסות את התאריך"""
+        with self._lock:
+            stale = [key for key, (start, end, _) in self._entries.items() if start <= day <= end]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """ריקון המטמון (למשל אחרי טעינה מחדש של כל הנתונים)"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """מוני פגיעות/החטאות לניטור"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+            }
@@ -1,13 +1,94 @@
-from datetime import datetime, time, timedelta
+from datetime import date, datetime, time, timedelta
 from typing import Dict, List, Optional
+from sys import intern
+from functools import lru_cache
+import bisect
 import json
+import logging
+import os
 from collections import OrderedDict
+from itertools import count
+from journal import Journal, atomic_write
+import snapshot
+import maintenance
+from schedule_cache import ScheduleCache
+from shift_templates import ShiftPlan
+from israel_calendar import day_label, hebrew_date, holiday_name, israel_now, week_start
+from reports import HoursLedger
+from authorization import ROLES, Grant, GrantCache, Permission, requires
+from auth import VerifiedCredentialsCache, dummy_verify, hash_password, needs_rehash, verify_password
+from conflicts import DEFAULT_MIN_REST_MINUTES, OVERLAP, IntervalIndex, audit, shift_interval
+from employee_search import PRIVATE_FIELDS, EmployeeIndex
+from change_feed import ChangeFeed, NotificationQueue
+from instrumentation import instrument_methods, metrics
+
+logger = logging.getLogger(__name__)
+
+MIN_PASSWORD_LENGTH = 4
+
+# גרסאות המצב נלקחות ממונה אחד לכל התהליך: מערכת שנטענת מחדש (למשל אתר
+# ששוחרר מהזיכרון, ראו tenants.py) לא חוזרת לגרסה שכבר נשמרה במטמון תשובות
+_state_versions = count(1)
+# פרטי עובד שאפשר לעדכן ב-update_employee
+EMPLOYEE_DETAIL_FIELDS = ('first_name', 'last_name', 'email', 'phone', 'id_number', 'employee_number')
+# החלטות אפשריות בטיפול בערעור (ראו handle_appeal)
+APPEAL_DECISIONS = ('approved', 'rejected')
+
+def format_day_label(day: date, with_year: bool = True) -> str:
+    """תווית תצוגה ליום, למשל "ראשון 13/10/2026" (מחושבת מראש, ראו israel_calendar)"""
+    return day_label(day, with_year)
+
+@lru_cache(maxsize=8192)
+def parse_day_key(day: str) -> date:
+    """חילוץ התאריך ממפתח יום ("ראשון 13/10/2026" או "2026-10-13")
+
+    נקרא בכל שינוי (פסילת מטמון, סיכומי שעות, בדיקת התנגשויות), ולכן נשמר במטמון.
+    """
+    value = day.split()[-1]
+    if '-' in value:
+        return date.fromisoformat(value)
+    return datetime.strptime(value, '%d/%m/%Y').date()
+
+def label_date(day) -> Optional[date]:
+    """התאריך של מפתח יום בפורמט הרגיל ("ראשון 13/10/2026"), או None"""
+    if not isinstance(day, str):
+        return None
+    try:
+        current_date = parse_day_key(day)
+    except ValueError:
+        return None
+    return current_date if day == format_day_label(current_date) else None
+
+def time_to_minutes(value: time) -> int:
+    """המרת שעה לדקות מאז חצות"""
+    return value.hour * 60 + value.minute
+
+def format_minutes(minutes: int) -> str:
+    """דקות מאז חצות בפורמט HH:MM"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def parse_minutes(value: str) -> int:
+    """HH:MM לדקות מאז חצות"""
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def shift_to_dict(shift) -> dict:
+    """ייצוג משמרת לתצוגה"""
+    return {
+        'start_time': format_minutes(shift.start_minutes),
+        'end_time': format_minutes(shift.end_minutes),
+        'employees': shift.employees
+    }
 
 class User:
+    __slots__ = ('username', 'password', 'first_name', 'last_name', 'email',
+                 'phone', 'id_number', 'employee_number', 'is_admin', 'role', 'team', 'scope')
+
     def __init__(self, username: str, password: str = None, first_name: str = "", last_name: str = "", 
                  email: str = "", phone: str = "", id_number: str = "", 
-                 employee_number: str = "", is_admin: bool = False):
-        self.username = username
+                 employee_number: str = "", is_admin: bool = False, role: str = "",
+                 team: str = "", scope: Optional[dict] = None):
+        self.username = intern(username)
         self.password = password
         self.first_name = first_name
         self.last_name = last_name
@@ -16,6 +97,9 @@ class User:
         self.id_number = id_number
         self.employee_number = employee_number
         self.is_admin = is_admin
+        self.role = role  # מפתח ב-ROLES; ריק = לפי is_admin
+        self.team = team
+        self.scope = scope or {}  # {'days': [...], 'teams': [...]} למנהל מוגבל
         
     def to_dict(self):
         """המרת המשתמש למילון"""
@@ -28,7 +112,10 @@ class User:
             'phone': self.phone,
             'id_number': self.id_number,
             'employee_number': self.employee_number,
-            'is_admin': self.is_admin
+            'is_admin': self.is_admin,
+            'role': self.role,
+            'team': self.team,
+            'scope': self.scope
         }
 
     @staticmethod
@@ -43,50 +130,105 @@ class User:
             phone=data.get('phone', ''),
             id_number=data.get('id_number', ''),
             employee_number=data.get('employee_number', ''),
-            is_admin=data.get('is_admin', False)
+            is_admin=data.get('is_admin', False),
+            role=data.get('role', ''),
+            team=data.get('team', ''),
+            scope=data.get('scope')
         )
 
 class Shift:
+    """משמרת: שעות כדקות מאז חצות, ועובדים כקבוצה השומרת על סדר השיבוץ"""
+    __slots__ = ('start_minutes', 'end_minutes', '_employees')
+
     def __init__(self, start_time: time, end_time: time):
-        self.start_time = start_time
-        self.end_time = end_time
-        self.employees = []
+        self.start_minutes = time_to_minutes(start_time)
+        self.end_minutes = time_to_minutes(end_time)
+        self._employees = {}  # dict כקבוצה שומרת סדר
+
+    @property
+    def start_time(self) -> time:
+        return time(self.start_minutes // 60, self.start_minutes % 60)
+
+    @start_time.setter
+    def start_time(self, value: time):
+        self.start_minutes = time_to_minutes(value)
+
+    @property
+    def end_time(self) -> time:
+        return time(self.end_minutes // 60, self.end_minutes % 60)
+
+    @end_time.setter
+    def end_time(self, value: time):
+        self.end_minutes = time_to_minutes(value)
+
+    @property
+    def employees(self) -> list:
+        """רשימת העובדים לפי סדר השיבוץ (עותק)"""
+        return list(self._employees)
+
+    @employees.setter
+    def employees(self, employees):
+        self._employees = dict.fromkeys(intern(employee) for employee in employees)
+
+    @property
+    def overnight(self) -> bool:
+        """משמרת שחוצה את חצות (הסיום למחרת)"""
+        return self.end_minutes <= self.start_minutes
+
+    @property
+    def duration_minutes(self) -> int:
+        return (self.end_minutes - self.start_minutes) % (24 * 60) or 24 * 60
+
+    def has_employee(self, employee: str) -> bool:
+        return employee in self._employees
 
     def add_employee(self, employee: str):
-        if employee not in self.employees:
-            self.employees.append(employee)
+        if employee not in self._employees:
+            self._employees[intern(employee)] = None
             return True
         return False
 
     def remove_employee(self, employee: str):
-        if employee in self.employees:
-            self.employees.remove(employee)
+        if employee in self._employees:
+            del self._employees[employee]
             return True
         return False
 
-class Permission:
-    VIEW_SCHEDULE = 1
-    EDIT_SCHEDULE = 2
-    MANAGE_EMPLOYEES = 4
-    ADMIN = 8
+    def to_dict(self) -> dict:
+        """המרת המשמרת למילון (פורמט הקובץ)"""
+        return {
+            'start': format_minutes(self.start_minutes),
+            'end': format_minutes(self.end_minutes),
+            'employees': self.employees
+        }
 
-class Role:
-    def __init__(self, name, permissions):
-        self.name = name
-        self.permissions = permissions
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Shift':
+        """יצירת משמרת ממילון (פורמט הקובץ)"""
+        shift = cls.__new__(cls)
+        shift.start_minutes = parse_minutes(data['start'])
+        shift.end_minutes = parse_minutes(data['end'])
+        shift.employees = data.get('employees', [])
+        return shift
 
-ROLES = {
-    'viewer': Role('viewer', Permission.VIEW_SCHEDULE),
-    'manager': Role('manager', Permission.VIEW_SCHEDULE | Permission.EDIT_SCHEDULE),
-    'admin': Role('admin', Permission.VIEW_SCHEDULE | Permission.EDIT_SCHEDULE | 
-                          Permission.MANAGE_EMPLOYEES | Permission.ADMIN)
-}
+    @classmethod
+    def from_minutes(cls, start_minutes: int, end_minutes: int, employees: list) -> 'Shift':
+        """יצירת משמרת ישירות מדקות (למשל מתמונת מצב בינארית)"""
+        shift = cls.__new__(cls)
+        shift.start_minutes = start_minutes
+        shift.end_minutes = end_minutes
+        shift._employees = dict.fromkeys(employees)
+        return shift
 
 class ShiftAppeal:
     """מחלקה המייצגת ערעור על משמרת"""
+    __slots__ = ('appeal_id', 'employee', 'day', 'shift_index', 'reason',
+                 'status', 'admin_response', 'created_at')
+
     def __init__(self, employee: str, day: str, shift_index: int, reason: str):
-        self.employee = employee
-        self.day = day
+        self.appeal_id = None  # מזהה יציב, מוקצה על ידי AppealStore
+        self.employee = intern(employee)
+        self.day = intern(day)
         self.shift_index = shift_index
         self.reason = reason
         self.status = 'pending'  # pending, approved, rejected
@@ -96,6 +238,7 @@ class ShiftAppeal:
     def to_dict(self):
         """המרת הערעור למילון"""
         return {
+            'id': self.appeal_id,
             'employee': self.employee,
             'day': self.day,
             'shift_index': self.shift_index,
@@ -117,167 +260,677 @@ class ShiftAppeal:
         appeal.status = data['status']
         appeal.admin_response = data['admin_response']
         appeal.created_at = datetime.fromisoformat(data['created_at'])
+        appeal.appeal_id = data.get('id')
         return appeal
 
+class AppealStore:
+    """מאגר ערעורים עם אינדקסים משניים לפי עובד, משמרת וסטטוס"""
+    def __init__(self):
+        self._by_id = {}  # appeal_id -> ShiftAppeal, לפי סדר יצירה
+        self._by_employee = {}  # employee -> [appeal_id]
+        self._by_slot = {}  # (employee, day, shift_index) -> [appeal_id]
+        self._by_status = {}  # status -> {appeal_id: None} (קבוצה שומרת סדר)
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
+
+    def __contains__(self, appeal_id):
+        return appeal_id in self._by_id
+
+    def add(self, appeal: ShiftAppeal) -> int:
+        """הוספת ערעור למאגר והקצאת מזהה יציב"""
+        if appeal.appeal_id is None or appeal.appeal_id in self._by_id:
+            appeal.appeal_id = self._next_id
+        self._next_id = max(self._next_id, appeal.appeal_id + 1)
+
+        appeal_id = appeal.appeal_id
+        self._by_id[appeal_id] = appeal
+        self._by_employee.setdefault(appeal.employee, []).append(appeal_id)
+        slot = (appeal.employee, appeal.day, appeal.shift_index)
+        self._by_slot.setdefault(slot, []).append(appeal_id)
+        self._by_status.setdefault(appeal.status, {})[appeal_id] = None
+        return appeal_id
+
+    def get(self, appeal_id: int) -> Optional[ShiftAppeal]:
+        """קבלת ערעור לפי מזהה"""
+        return self._by_id.get(appeal_id)
+
+    def set_status(self, appeal_id: int, status: str, admin_response: str = '') -> bool:
+        """עדכון סטטוס ערעור תוך שמירה על עקביות האינדקסים"""
+        appeal = self._by_id.get(appeal_id)
+        if appeal is None:
+            return False
+        old_bucket = self._by_status.get(appeal.status)
+        if old_bucket is not None:
+            old_bucket.pop(appeal_id, None)
+        appeal.status = status
+        appeal.admin_response = admin_response
+        self._by_status.setdefault(status, {})[appeal_id] = None
+        return True
+
+    def by_status(self, status: str) -> list:
+        """ערעורים בסטטוס מסוים, לפי סדר יצירה"""
+        return [self._by_id[appeal_id] for appeal_id in self._by_status.get(status, {})]
+
+    def by_employee(self, employee: str) -> list:
+        """ערעורים של עובד מסוים, לפי סדר יצירה"""
+        return [self._by_id[appeal_id] for appeal_id in self._by_employee.get(employee, [])]
+
+    def for_slot(self, employee: str, day: str, shift_index: int) -> list:
+        """ערעורים של עובד על משמרת מסוימת, לפי סדר יצירה"""
+        ids = self._by_slot.get((employee, day, shift_index), [])
+        return [self._by_id[appeal_id] for appeal_id in ids]
+
+class LazyAppealStore(AppealStore):
+    """מאגר ערעורים שנבנה מתמונת מצב רק בגישה הראשונה אליו"""
+    def __init__(self, loader):
+        super().__init__()
+        self._loader = loader  # פונקציה המחזירה רשימת מילוני ערעורים
+
+    def _load(self):
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            for appeal_data in loader():
+                super().add(ShiftAppeal.from_dict(appeal_data))
+
+    def __len__(self):
+        self._load()
+        return super().__len__()
+
+    def __iter__(self):
+        self._load()
+        return super().__iter__()
+
+    def __contains__(self, appeal_id):
+        self._load()
+        return super().__contains__(appeal_id)
+
+    def add(self, appeal: ShiftAppeal) -> int:
+        self._load()
+        return super().add(appeal)
+
+    def get(self, appeal_id: int) -> Optional[ShiftAppeal]:
+        self._load()
+        return super().get(appeal_id)
+
+    def set_status(self, appeal_id: int, status: str, admin_response: str = '') -> bool:
+        self._load()
+        return super().set_status(appeal_id, status, admin_response)
+
+    def by_status(self, status: str) -> list:
+        self._load()
+        return super().by_status(status)
+
+    def by_employee(self, employee: str) -> list:
+        self._load()
+        return super().by_employee(employee)
+
+    def for_slot(self, employee: str, day: str, shift_index: int) -> list:
+        self._load()
+        return super().for_slot(employee, day, shift_index)
+
+class ShiftHistory:
+    """היסטוריית משמרות לפי תאריך, ממוינת לשאילתות טווח ב-O(log n + k)"""
+    def __init__(self):
+        self._shifts = {}  # date -> [Shift]
+        self._dates = []  # תאריכים ממוינים
+
+    def __len__(self):
+        return len(self._dates)
+
+    def __contains__(self, day: date):
+        return day in self._shifts
+
+    def __getitem__(self, day: date) -> list:
+        return self._shifts[day]
+
+    def __setitem__(self, day: date, shifts: list):
+        if day not in self._shifts:
+            # בדרך כלל מוסיפים שבוע חדש בסוף, כך שההכנסה זולה
+            if not self._dates or day > self._dates[-1]:
+                self._dates.append(day)
+            else:
+                bisect.insort(self._dates, day)
+        self._shifts[day] = shifts
+
+    def get(self, day: date, default=None):
+        return self._shifts.get(day, default)
+
+    def items(self):
+        return [(day, self._shifts[day]) for day in self._dates]
+
+    def range(self, start: date, end: date) -> list:
+        """רשימת (תאריך, משמרות) בטווח התאריכים (כולל)"""
+        low = bisect.bisect_left(self._dates, start)
+        high = bisect.bisect_right(self._dates, end)
+        return [(day, self._shifts[day]) for day in self._dates[low:high]]
+
+    @classmethod
+    def from_snapshot(cls, reader) -> 'ShiftHistory':
+        """היסטוריה שימיה נבנים מתמונת מצב בינארית רק כשניגשים אליהם"""
+        history = cls()
+        history._dates = [date.fromordinal(ordinal) for ordinal in reader.days]
+        history._shifts = _MappedDays(reader, history._dates)
+        return history
+
+class _MappedDays(dict):
+    """מילון date -> [Shift] שמשלים ימים חסרים מתמונת מצב בינארית"""
+    def __init__(self, reader, dates: list):
+        super().__init__()
+        self._reader = reader
+        self._positions = {day: position for position, day in enumerate(dates)}
+
+    def __missing__(self, day: date) -> list:
+        position = self._positions[day]
+        shifts = [Shift.from_minutes(start, end, employees)
+                  for start, end, employees in self._reader.shifts(position)]
+        self[day] = shifts
+        return shifts
+
+    def __contains__(self, day) -> bool:
+        return day in self._positions or super().__contains__(day)
+
+    def get(self, day, default=None):
+        return self[day] if day in self else default
+
+class ShiftDays(dict):
+    """משמרות קונקרטיות לפי מפתח יום ("ראשון 18/10/2026")
+
+    מכיל את השבוע הנוכחי ואת הימים העתידיים שכבר נערכו. יום עתידי שעוד
+    לא נגעו בו נוצר מתוכנית המשמרות בגישה הראשונה אליו, כך שרק ימים
+    שמוצגים או נערכים בפועל הופכים לאובייקטים.
+    """
+    def __init__(self, system: 'ShiftManagementSystem', data=()):
+        super().__init__(data)
+        self._system = system
+
+    def __missing__(self, day: str) -> list:
+        if not self._system._can_materialize(day):
+            raise KeyError(day)
+        shifts = self[day] = self._system._materialize_day(day)
+        return shifts
+
+    def __contains__(self, day) -> bool:
+        return super().__contains__(day) or self._system._can_materialize(day)
+
+    def get(self, day, default=None):
+        return self[day] if day in self else default
+
 class ShiftManagementSystem:
     def __init__(self):
         self.users = {}
-        self.shifts_history = {}  # מילון לשמירת היסטוריית משמרות
-        self.weekly_shifts = {}
-        self.appeals = []  # רשימת הערעורים
+        self.shifts_history = ShiftHistory()  # היסטוריית משמרות לפי תאריך
+        self.shift_plan = ShiftPlan.default()  # תבניות וכללי חזרה (ראו shift_templates.py)
+        self.weekly_shifts = ShiftDays(self)
+        self.appeals = AppealStore()  # מאגר הערעורים
+        self.journal = None  # יומן שינויים, מופעל על ידי enable_journal
+        self.storage = None  # שכבת אחסון משותפת, מופעלת על ידי attach_storage
+        self.journal_generation = 0
+        self.view_cache = ScheduleCache()  # מטמון תצוגות שבועיות/חודשיות
+        self.version = next(_state_versions)  # גרסת המצב, עולה בכל שינוי (ל-ETag וכו'), ייחודית בתהליך
+        self.feed = ChangeFeed()  # אירועי שינוי לדחיפה ללקוחות
+        self.notifications = {}  # username -> NotificationQueue
+        self.tenant_id = None  # מזהה האתר בפריסה מרובת אתרים (ראו tenants.py)
+        self.site_title = None  # שם האתר לכותרות (למשל ב-PDF)
+        self._hours = None  # סיכומי שעות (reports.HoursLedger), נבנים בשימוש הראשון
+        self._conflicts = None  # קטעי המשמרות של כל עובד (conflicts.IntervalIndex), נבנים בשיבוץ הראשון
+        self._employee_index = None  # אינדקס חיפוש עובדים (employee_search.EmployeeIndex), נבנה בחיפוש הראשון
+        self.min_rest_minutes = DEFAULT_MIN_REST_MINUTES  # מנוחה מינימלית בין משמרות של עובד
+        self.credentials_cache = VerifiedCredentialsCache()  # אימותים אחרונים (ראו auth.py)
+        self.grants = GrantCache(self.get_user)  # הרשאה אפקטיבית לכל משתמש (ראו authorization.py)
+        self.clock = None  # פונקציה שמחזירה את השעה בישראל במקום השעון האמיתי (לבדיקות)
+        self.current_week = None  # יום ראשון של השבוע שמשמרותיו ב-weekly_shifts
         self.initialize_shifts()
     
     def get_israel_time(self):
         """קבלת התאריך והשעה הנוכחיים בישראל"""
-        try:
-            import pytz
-            israel_tz = pytz.timezone('Asia/Jerusalem')
-            return datetime.now(israel_tz)
-        except ImportError:
-            # אם אין pytz, נחזיר את הזמן המקומי
-            return datetime.now()
+        if self.clock is not None:
+            return self.clock()
+        return israel_now()
     
     def initialize_shifts(self):
-        """אתחול מערכת המשמרות עם תאריכים לפי זמן ישראל"""
-        israel_today = self.get_israel_time().date()
-        
-        # התאמה לשבוע הישראלי (0 = יום ראשון)
-        israel_weekday = (israel_today.weekday() + 1) % 7  # המרה ללוח השבועי הישראלי
-        start_of_week = israel_today - timedelta(days=israel_weekday)
-        
-        days_hebrew = ['ראשון', 'שני', 'שלישי', 'רביעי', 'חמישי', 'שישי', 'שבת']
+        """אתחול משמרות השבוע הנוכחי (לפי זמן ישראל) מתוכנית המשמרות"""
+        start_of_week = week_start(self.get_israel_time().date())
+        self.current_week = start_of_week
         
         for i in range(7):
             current_date = start_of_week + timedelta(days=i)
-            # יצירת מפתח עם התאריך המלא
-            formatted_date = current_date.strftime('%d/%m/%Y')
-            date_key = f"{days_hebrew[i]} {formatted_date}"
-            
-            self.weekly_shifts[date_key] = []
-            morning_shift = Shift(time(8, 0), time(16, 0))
-            evening_shift = Shift(time(16, 0), time(23, 0))
-            self.weekly_shifts[date_key].extend([morning_shift, evening_shift])
-
-    def get_weekly_schedule(self, week_offset: int = 0) -> Dict:
-        """קבלת לוח המשמרות השבועי לפי זמן ישראל"""
-        israel_today = self.get_israel_time().date()
-        
-        # התאמה לשבוע הישראלי (0 = יום ראשון)
-        israel_weekday = (israel_today.weekday() + 1) % 7  # המרה ללוח השבועי הישראלי
-        start_of_current_week = israel_today - timedelta(days=israel_weekday)
-        target_week = start_of_current_week - timedelta(weeks=week_offset)
+            # יצירת מפתח עם התאריך המלא; יום שכבר נוצר (למשל נערך מראש) נשאר כמו שהוא
+            date_key = format_day_label(current_date)
+            if not dict.__contains__(self.weekly_shifts, date_key):
+                self.weekly_shifts[date_key] = self._materialize_day(date_key)
+
+    def roll_over_week(self) -> int:
+        """מעבר לשבוע חדש לפי זמן ישראל: ימים שעברו עוברים להיסטוריה ומשמרות השבוע נוצרות
+
+        מחזיר את מספר הימים שהועברו. כשהשבוע לא התחלף זו השוואה אחת, כך
+        שאפשר לקרוא לזה בכל סבב של תחזוקת הרקע (ראו maintenance.py).
+        במצב אחסון הימים כבר נמצאים במאגר, ורק יוצאים מהזיכרון.
+        """
+        start_of_week = week_start(self.get_israel_time().date())
+        if start_of_week == self.current_week:
+            return 0
+        archived = 0
+        for day in list(dict.keys(self.weekly_shifts)):
+            current_date = label_date(day)
+            if current_date is None or current_date >= start_of_week:
+                continue
+            shifts = dict.pop(self.weekly_shifts, day)
+            if self.storage is None:
+                self.shifts_history[current_date] = shifts
+            archived += 1
+        self.initialize_shifts()
+        self.view_cache.clear()
+        self.version = next(_state_versions)
+        self.feed.publish('reload', {})
+        logger.info(f"Week rolled over to {start_of_week}: {archived} days archived")
+        return archived
+
+    def is_holiday(self, day: date) -> bool:
+        """חג לפי הלוח העברי, או תאריך שהוגדר כחג בתוכנית המשמרות"""
+        if day in self.shift_plan.holidays:
+            return True
+        return holiday_name(day) is not None
+
+    def _template_shifts(self, day: date) -> list:
+        """משמרות ריקות ליום לפי תוכנית המשמרות"""
+        return [Shift.from_minutes(spec.start_minutes, spec.end_minutes, [])
+                for spec in self.shift_plan.specs_for(day, self.is_holiday)]
+
+    def _template_day(self, day: date) -> List[dict]:
+        """כמו _template_shifts, בייצוג התצוגה ובלי ליצור אובייקטי משמרת"""
+        return [{'start_time': format_minutes(spec.start_minutes), 'end_time': format_minutes(spec.end_minutes),
+                 'employees': []}
+                for spec in self.shift_plan.specs_for(day, self.is_holiday)]
+
+    def _can_materialize(self, day) -> bool:
+        """האם מפתח היום מתאר יום מהשבוע הנוכחי והלאה (בפורמט המפתחות הרגיל)"""
+        current_date = label_date(day)
+        return current_date is not None and current_date >= week_start(self.get_israel_time().date())
+
+    def _materialize_day(self, day: str) -> list:
+        """יצירת המשמרות של יום עתידי בגישה הראשונה (ראו ShiftDays)"""
+        current_date = parse_day_key(day)
+        if self.storage is not None:
+            # ייתכן שתהליך אחר כבר יצר את היום במאגר המשותף
+            stored = self.storage.shifts_between(current_date, current_date).get(current_date)
+            if stored:
+                return [Shift.from_dict({'start': data['start_time'], 'end': data['end_time'],
+                                         'employees': data['employees']}) for data in stored]
+        shifts = self._template_shifts(current_date)
+        if self.storage is not None:
+            self.storage.ensure_shifts(day, shifts)
+        return shifts
+
+    def week_shifts(self, week_offset: int = 0) -> Dict[str, list]:
+        """המשמרות הקונקרטיות של שבוע (0 = הנוכחי, 1 = הבא), לפי מפתח יום"""
+        start = week_start(self.get_israel_time().date()) + timedelta(weeks=week_offset)
+        keys = [format_day_label(start + timedelta(days=i)) for i in range(7)]
+        return OrderedDict((key, self.weekly_shifts[key]) for key in keys if key in self.weekly_shifts)
+
+    @requires(Permission.ADMIN, denied=(False, "אין הרשאה"))
+    def set_shift_plan(self, admin_username: str, plan_data: dict) -> tuple[bool, str]:
+        """החלפת תוכנית המשמרות; חלה על ימים שעוד לא נוצרו (ימים שנערכו נשארים כמו שהם)"""
+        try:
+            plan = ShiftPlan.from_dict(plan_data)
+        except (KeyError, TypeError, ValueError) as e:
+            return False, f"תוכנית לא תקינה: {e}"
+        self.shift_plan = plan
+        self.view_cache.clear()
+        self._hours = None  # החגים בתוכנית משפיעים על שעות החג
+        self._record('set_shift_plan', plan=plan.to_dict())
+        return True, "תוכנית המשמרות עודכנה"
+
+    def get_schedule_range(self, start: date, end: date) -> Dict[date, List[dict]]:
+        """קבלת לוח המשמרות לטווח תאריכים (כולל), ממופה לפי תאריך
+
+        זהו מסלול הקוד היחיד שממנו נבנות התצוגות השבועית והחודשית.
+        ההיסטוריה קודמת למשמרות השבוע הנוכחי, כמו בתצוגות המקוריות.
+        """
+        if self.storage is not None:
+            # עם שכבת אחסון - שאילתת טווח אחת
+            stored = self.storage.shifts_between(start, end)
+        else:
+            stored = {}
+            for current_date, shifts in self._current_shifts_by_date().items():
+                if start <= current_date <= end:
+                    stored[current_date] = [shift_to_dict(shift) for shift in shifts]
+            for current_date, shifts in self.shifts_history.range(start, end):
+                stored[current_date] = [shift_to_dict(shift) for shift in shifts]
         
+        # ימים עתידיים שעוד לא נוצרו מוצגים לפי התוכנית, בלי ליצור אותם
+        first_open_day = week_start(self.get_israel_time().date())
         schedule = OrderedDict()
-        days_hebrew = ['ראשון', 'שני', 'שלישי', 'רביעי', 'חמישי', 'שישי', 'שבת']
-        
-        for i in range(7):
-            current_date = target_week + timedelta(days=i)
-            # יצירת מפתח עם התאריך המלא
-            formatted_date = current_date.strftime('%d/%m/%Y')
-            date_key = f"{days_hebrew[i]} {formatted_date}"
-            
-            if date_key in self.shifts_history:
-                shifts = self.shifts_history[date_key]
-            elif week_offset == 0 and date_key in self.weekly_shifts:
-                shifts = self.weekly_shifts[date_key]
-            else:
-                shifts = []
-            
-            schedule[date_key] = []
-            for shift in shifts:
-                schedule[date_key].append({
-                    'start_time': shift.start_time.strftime('%H:%M'),
-                    'end_time': shift.end_time.strftime('%H:%M'),
-                    'employees': shift.employees
-                })
-        
+        current_date = start
+        while current_date <= end:
+            shifts = stored.get(current_date)
+            if shifts is None:
+                shifts = self._template_day(current_date) if current_date >= first_open_day else []
+            schedule[current_date] = shifts
+            current_date += timedelta(days=1)
         return schedule
 
+    def _current_shifts_by_date(self) -> Dict[date, list]:
+        """משמרות השבוע הנוכחי ממופות לפי תאריך"""
+        by_date = {}
+        for day, shifts in self.weekly_shifts.items():
+            try:
+                by_date[parse_day_key(day)] = shifts
+            except ValueError:
+                continue
+        return by_date
+
+    def get_weekly_schedule(self, week_offset: int = 0, employee: Optional[str] = None) -> Dict:
+        """קבלת לוח המשמרות השבועי לפי זמן ישראל
+
+        התוצאה נשמרת במטמון ומשותפת בין הקוראים - אין לשנות אותה.
+        """
+        start = week_start(self.get_israel_time().date()) - timedelta(weeks=week_offset)
+        end = start + timedelta(days=6)
+        return self._cached_view('week', start, end, employee, with_year=True)
+
     def get_hebrew_date(self, date):
-        """המרת תאריך לועזי לעברי"""
-        try:
-            from hebrew_dates import GregorianDate, HebrewDate
-            g_date = GregorianDate(date.year, date.month, date.day)
-            h_date = HebrewDate.from_gregorian(g_date)
-            return h_date.hebrew_date_string()
-        except ImportError:
-            # אם הספריה לא מותקנת, נחזיר רק את התאריך הלועזי
-            return date.strftime('%d/%m/%Y')
-
-    def get_monthly_schedule(self, month_offset: int = 0) -> Dict:
-        """קבלת לוח המשמרות החודשי"""
-        today = datetime.now().date()
-        # מוצאים את היום הראשון בחודש
-        first_of_month = today.replace(day=1) - timedelta(days=today.day - 1)
-        target_month = first_of_month - timedelta(days=30 * month_offset)
-        
-        schedule = OrderedDict()
-        current_date = target_month
-        
-        # מחשבים את מספר הימים בחודש
-        if target_month.month == 12:
-            next_month = target_month.replace(year=target_month.year + 1, month=1)
-        else:
-            next_month = target_month.replace(month=target_month.month + 1)
-        days_in_month = (next_month - target_month).days
-        
-        days = ['ראשון', 'שני', 'שלישי', 'רביעי', 'חמישי', 'שישי', 'שבת']
+        """המרת תאריך לועזי לעברי (הלועזי, אם hebrew_dates אינה מותקנת)"""
+        return hebrew_date(date)
+
+    def get_monthly_schedule(self, month_offset: int = 0, employee: Optional[str] = None) -> Dict:
+        """קבלת לוח המשמרות החודשי
+
+        התוצאה נשמרת במטמון ומשותפת בין הקוראים - אין לשנות אותה.
+        """
+        today = self.get_israel_time().date()
+        month_index = today.year * 12 + today.month - 1 - month_offset
+        first_of_month = date(month_index // 12, month_index % 12 + 1, 1)
+        next_month = date((month_index + 1) // 12, (month_index + 1) % 12 + 1, 1)
         
-        for _ in range(days_in_month):
-            date_key = current_date.strftime('%Y-%m-%d')
-            day_name = days[current_date.weekday()]
-            date_display = f"{day_name} {current_date.strftime('%d/%m')}"
-            
-            if date_key in self.shifts_history:
-                shifts = self.shifts_history[date_key]
-            elif month_offset == 0 and date_key in self.weekly_shifts:
-                shifts = self.weekly_shifts[date_key]
-            else:
-                shifts = []
-            
-            schedule[date_display] = []
-            for shift in shifts:
-                schedule[date_display].append({
-                    'start_time': shift.start_time.strftime('%H:%M'),
-                    'end_time': shift.end_time.strftime('%H:%M'),
-                    'employees': shift.employees
-                })
-            
-            current_date += timedelta(days=1)
+        end = next_month - timedelta(days=1)
+        return self._cached_view('month', first_of_month, end, employee, with_year=False)
+
+    def _cached_view(self, period: str, start: date, end: date,
+                     employee: Optional[str], with_year: bool) -> Dict:
+        """בניית תצוגה עם תוויות יום, דרך מטמון התצוגות"""
+        key = (period, start, employee)
+        schedule = self.view_cache.get(key)
+        if schedule is not None:
+            return schedule
         
+        schedule = OrderedDict()
+        for current_date, shifts in self.get_schedule_range(start, end).items():
+            if employee is not None:
+                # שומרים על מיקום המשמרות כדי שמספר המשמרת יישאר נכון
+                shifts = [dict(shift, employees=[employee] if employee in shift['employees'] else [])
+                          for shift in shifts]
+            schedule[format_day_label(current_date, with_year)] = shifts
+        self.view_cache.put(key, start, end, schedule)
         return schedule
 
+    def _invalidate_day(self, day: str):
+        """פסילת תצוגות שמכילות את היום ששונה"""
+        try:
+            self.view_cache.invalidate(parse_day_key(day))
+        except ValueError:
+            self.view_cache.clear()
+
+    def _track_assignment(self, day: str, shift: 'Shift', employees: list, sign: int):
+        """עדכון סיכומי השעות ואינדקס ההתנגשויות אחרי שיבוץ (1) או הסרה (-1)
+
+        מבנה שעוד לא נבנה לא מתעדכן - הוא ייבנה מהמצב העדכני בשימוש הראשון.
+        """
+        if self._hours is None and self._conflicts is None:
+            return
+        current_date = parse_day_key(day)
+        for tracker in (self._hours, self._conflicts):
+            if tracker is not None:
+                tracker.add_shift(current_date, shift.start_minutes, shift.end_minutes, employees, sign)
+
+    def _all_shifts(self):
+        """כל המשמרות הידועות כ-(תאריך, דקת התחלה, דקת סיום, עובדים)"""
+        if self.storage is not None:
+            for current_date, shifts in self.storage.shifts_between(date.min, date.max).items():
+                for shift in shifts:
+                    yield (current_date, parse_minutes(shift['start_time']), parse_minutes(shift['end_time']),
+                           shift['employees'])
+            return
+        by_date = self._current_shifts_by_date()
+        # כמו בתצוגות - ההיסטוריה גוברת על משמרות השבוע באותו תאריך
+        by_date.update(self.shifts_history.items())
+        for current_date, shifts in by_date.items():
+            for shift in shifts:
+                yield current_date, shift.start_minutes, shift.end_minutes, shift.employees
+
+    def hours_ledger(self) -> HoursLedger:
+        """סיכומי השעות לכל עובד; נבנים פעם אחת ומתעדכנים בכל שינוי"""
+        if self._hours is None:
+            ledger = HoursLedger(self.is_holiday)
+            for current_date, start, end, employees in self._all_shifts():
+                ledger.add_shift(current_date, start, end, employees)
+            self._hours = ledger
+        return self._hours
+
+    def hours_report(self, start: date, end: date, employees: Optional[list] = None):
+        """שורות דוח שעות (ראו reports.HoursLedger.report) לטווח התאריכים"""
+        return self.hours_ledger().report(start, end, employees)
+
+    def conflict_index(self) -> IntervalIndex:
+        """קטעי הזמן של משמרות כל עובד; נבנים פעם אחת ומתעדכנים בכל שינוי"""
+        if self._conflicts is None:
+            index = IntervalIndex()
+            for current_date, start, end, employees in self._all_shifts():
+                index.add_shift(current_date, start, end, employees)
+            self._conflicts = index
+        return self._conflicts
+
+    def find_conflict(self, day: str, shift_index: int, employee_username: str) -> Optional[str]:
+        """סוג ההתנגשות (conflicts.OVERLAP/REST) אם העובד ישובץ למשמרת, או None"""
+        shift = self.weekly_shifts[day][shift_index]
+        interval = shift_interval(parse_day_key(day), shift.start_minutes, shift.end_minutes)
+        conflict = self.conflict_index().conflict(employee_username, interval, self.min_rest_minutes)
+        return conflict[0] if conflict is not None else None
+
+    def audit_conflicts(self, min_rest_minutes: Optional[int] = None) -> list:
+        """כל ההתנגשויות בכל המשמרות הידועות (conflicts.Conflict), במעבר אחד"""
+        if min_rest_minutes is None:
+            min_rest_minutes = self.min_rest_minutes
+        return list(audit(self._all_shifts(), min_rest_minutes))
+
+    def get_cache_stats(self) -> dict:
+        """מוני המטמון לניטור"""
+        return self.view_cache.stats()
+
     def archive_current_week(self):
-        """שמירת המשמרות הנוכחיות בהיסטוריה"""
-        for date_key, shifts in self.weekly_shifts.items():
-            self.shifts_history[date_key] = shifts.copy()
+        """שמירת המשמרות הנוכחיות בהיסטוריה (ימים עתידיים שכבר נוצרו אינם נכללים)"""
+        week_end = week_start(self.get_israel_time().date()) + timedelta(days=6)
+        for current_date, shifts in self._current_shifts_by_date().items():
+            if current_date > week_end:
+                continue
+            self.shifts_history[current_date] = shifts.copy()
+            self.view_cache.invalidate(current_date)
+        self.version = next(_state_versions)
+
+    def get_user(self, username: str) -> Optional[User]:
+        """המשתמש לפי שם; במצב אחסון, משתמש שנוסף בתהליך אחר נקרא מהמאגר לבדו"""
+        user = self.users.get(username)
+        if user is None and self.storage is not None and username:
+            user = self.storage.get_user(username)
+            if user is not None:
+                self.users[user.username] = user
+                self._index_user(user)
+        return user
+
+    def employee_index(self) -> EmployeeIndex:
+        """אינדקס החיפוש על המשתמשים; נבנה פעם אחת ומתעדכן בכל הוספה ועריכה"""
+        if self._employee_index is None:
+            self._employee_index = EmployeeIndex(self.users.values())
+        return self._employee_index
+
+    def _index_user(self, user: User):
+        """עדכון אינדקס החיפוש אחרי הוספת משתמש או שינוי בפרטיו (אם כבר נבנה)"""
+        if self._employee_index is not None:
+            self._employee_index.add(user)
+
+    def search_employees(self, viewer: str, query: str = '', sort: str = 'name', descending: bool = False,
+                         team: Optional[str] = None, role: Optional[str] = None) -> List[str]:
+        """שמות המשתמש של העובדים שהצופה רשאי לראות ושמתאימים לחיפוש, ממוינים (ראו employee_search)
+
+        אימייל, טלפון ותעודת זהות משתתפים בחיפוש רק למי שמנהל עובדים;
+        מנהל משמרות מוגבל מוצא רק עובדים מהצוותים שבתחומו.
+        """
+        grant = self.grant(viewer)
+        return self.employee_index().search(
+            query, sort, descending, team=team, role=role,
+            include_admins=grant.has(Permission.ADMIN), private=grant.has(Permission.MANAGE_EMPLOYEES),
+            visible=None if grant.has(Permission.EDIT_SCHEDULE) and not grant.scoped else grant.can_view_employee)
+
+    @staticmethod
+    def employee_summary(user: User, private: bool = False) -> dict:
+        """פרטי עובד לרשימת העובדים; הפרטים האישיים רק למי שמנהל עובדים"""
+        summary = {'username': user.username, 'first_name': user.first_name, 'last_name': user.last_name,
+                   'employee_number': user.employee_number, 'team': user.team, 'role': user.role,
+                   'is_admin': user.is_admin}
+        if private:
+            summary.update((field, getattr(user, field)) for field in PRIVATE_FIELDS)
+        return summary
+
+    def authenticate(self, username: str, password: str) -> Optional[User]:
+        """המשתמש אם הסיסמה נכונה, אחרת None
 
+        אימות שהצליח לאחרונה נלקח מהמטמון בלי לחשב גיבוב. סיסמה שנשמרה
+        כטקסט גלוי או בעלות גיבוב ישנה מגובבת מחדש כאן.
+        """
+        user = self.get_user(username) if username else None
+        if user is None or not user.password or not password:
+            # אותו זמן תגובה כמו לסיסמה שגויה, כדי לא לחשוף אילו משתמשים קיימים
+            dummy_verify(password or '')
+            return None
+        if self.credentials_cache.check(user.username, password, user.password):
+            return user
+        if not verify_password(password, user.password):
+            return None
+        if needs_rehash(user.password):
+            user.password = hash_password(password)
+            self._record('set_password', username=user.username, password=user.password)
+        self.credentials_cache.add(user.username, password, user.password)
+        return user
+
+    def grant(self, username: Optional[str]) -> Grant:
+        """ההרשאה האפקטיבית של המשתמש (NO_GRANT אם אינו קיים), מהמטמון"""
+        return self.grants.get(username)
+
+    def can_view_employee(self, viewer: str, username: str) -> bool:
+        """האם viewer רשאי לצפות בלוח ובערעורים של העובד (הוא עצמו, או עובד בצוות שבתחומו)"""
+        user = self.users.get(username)
+        return self.grant(viewer).can_view_employee(username, user.team if user is not None else '')
+
+    def _scope_error(self, grant: Grant, day: str, employee: Optional[str] = None) -> Optional[str]:
+        """שגיאה אם היום או צוות העובד מחוץ לתחום של מנהל מוגבל"""
+        if not grant.scoped:
+            return None
+        if not grant.covers_day(parse_day_key(day)):
+            return 'היום מחוץ לתחום ההרשאה'
+        if employee is not None:
+            user = self.users.get(employee)
+            if user is not None and not grant.covers_team(user.team):
+                return 'העובד מחוץ לתחום ההרשאה'
+        return None
+
+    @requires(Permission.ADMIN, denied=(False, "אין הרשאה"))
+    def set_role(self, admin_username: str, username: str, role: str, team: str = "",
+                 scope: Optional[dict] = None) -> tuple[bool, str]:
+        """קביעת תפקיד, צוות ותחום (ימים/צוותים) למשתמש"""
+        user = self.users.get(username)
+        if user is None:
+            return False, "המשתמש אינו קיים"
+        if role and role not in ROLES:
+            return False, "תפקיד לא מוכר"
+        scope = scope or {}
+        try:
+            scope = {key: sorted(int(v) if key == 'days' else str(v) for v in scope[key])
+                     for key in ('days', 'teams') if scope.get(key)}
+        except (TypeError, ValueError):
+            return False, "תחום לא תקין"
+        if not all(0 <= day <= 6 for day in scope.get('days', ())):
+            return False, "תחום לא תקין"
+        user.role, user.team, user.scope = role, team or "", scope
+        self.grants.invalidate(username)
+        self._index_user(user)
+        self._record('set_role', username=username, role=user.role, team=user.team, scope=user.scope)
+        return True, "התפקיד עודכן"
+
+    def set_password(self, actor_username: str, username: str, new_password: str) -> tuple[bool, str]:
+        """קביעת סיסמה: מי שמנהל עובדים לכל משתמש, או משתמש לעצמו"""
+        if actor_username not in self.users or (
+                actor_username != username and not self.grant(actor_username).has(Permission.MANAGE_EMPLOYEES)):
+            return False, "אין הרשאה"
+        user = self.users.get(username)
+        if user is None:
+            return False, "המשתמש אינו קיים"
+        if not new_password or len(new_password) < MIN_PASSWORD_LENGTH:
+            return False, f"הסיסמה חייבת להכיל לפחות {MIN_PASSWORD_LENGTH} תווים"
+        user.password = hash_password(new_password)
+        self._record('set_password', username=username, password=user.password)
+        return True, "הסיסמה עודכנה"
+
+    @requires(Permission.MANAGE_EMPLOYEES)
     def add_user(self, admin_username: str, new_username: str, is_admin: bool = False) -> bool:
         """הוספת משתמש חדש למערכת"""
-        if admin_username not in self.users or not self.users[admin_username].is_admin:
+        if is_admin and not self.grant(admin_username).has(Permission.ADMIN):
             return False
-        
+
         if new_username in self.users:
             return False
             
-        self.users[new_username] = User(new_username, is_admin)
+        self.users[new_username] = User(new_username, is_admin=is_admin)
+        self._index_user(self.users[new_username])
+        self._record('add_user', user=self.users[new_username].to_dict())
         return True
+
+    @requires(Permission.MANAGE_EMPLOYEES, denied=(False, "אין הרשאה"))
+    def update_employee(self, admin_username: str, username: str, details: dict) -> tuple[bool, str]:
+        """עדכון פרטי עובד (שם, אימייל, טלפון, ת"ז, מספר עובד - ראו EMPLOYEE_DETAIL_FIELDS)"""
+        user = self.users.get(username)
+        if user is None:
+            return False, "המשתמש אינו קיים"
+        changes = {}
+        for field, value in details.items():
+            if field not in EMPLOYEE_DETAIL_FIELDS or not isinstance(value, str):
+                return False, "פרטים לא תקינים"
+            changes[field] = value.strip()
+        index = self.employee_index()
+        for field, message in (('employee_number', "מספר העובד כבר בשימוש"),
+                               ('id_number', "תעודת הזהות כבר בשימוש")):
+            if changes.get(field) and index.lookup(field, changes[field]) - {username}:
+                return False, message
+        for field, value in changes.items():
+            setattr(user, field, value)
+        index.add(user)
+        self._record('update_user', username=username, details=changes)
+        return True, "פרטי העובד עודכנו"
     
+    @requires(Permission.EDIT_SCHEDULE)
     def update_shift_hours(self, admin_username: str, day: str, 
                           shift_index: int, new_start: time, new_end: time) -> bool:
         """עדכון שעות משמרת"""
-        if admin_username not in self.users or not self.users[admin_username].is_admin:
-            return False
-            
         if day not in self.weekly_shifts:
             return False
+
+        if self._scope_error(self.grant(admin_username), day) is not None:
+            return False
             
         if shift_index >= len(self.weekly_shifts[day]):
             return False
             
         shift = self.weekly_shifts[day][shift_index]
+        self._track_assignment(day, shift, shift.employees, -1)
         shift.start_time = new_start
         shift.end_time = new_end
+        self._track_assignment(day, shift, shift.employees, 1)
+        self._invalidate_day(day)
+        self._record('update_shift_hours', day=day, shift_index=shift_index,
+                     start=format_minutes(shift.start_minutes), end=format_minutes(shift.end_minutes))
         return True
     
     def is_employee_available(self, day: str, employee_username: str) -> bool:
@@ -287,16 +940,14 @@ class ShiftManagementSystem:
         
         # בדיקה אם העובד כבר משובץ באחת המשמרות של אותו יום
         for shift in self.weekly_shifts[day]:
-            if employee_username in shift.employees:
+            if shift.has_employee(employee_username):
                 return False
         return True
     
+    @requires(Permission.EDIT_SCHEDULE)
     def assign_shift(self, admin_username: str, day: str, 
                     shift_index: int, employee_username: str) -> bool:
         """שיבוץ עובד למשמרת"""
-        if admin_username not in self.users or not self.users[admin_username].is_admin:
-            return False
-            
         if day not in self.weekly_shifts:
             return False
             
@@ -306,60 +957,378 @@ class ShiftManagementSystem:
         if employee_username not in self.users:
             return False
 
+        if self._scope_error(self.grant(admin_username), day, employee_username) is not None:
+            return False
+
         # בדיקה אם העובד כבר משובץ ביום זה
         if not self.is_employee_available(day, employee_username):
             return False
+
+        # חפיפה או מנוחה קצרה מול משמרות אחרות שלו (גם בימים סמוכים ובמשמרות לילה)
+        if self.find_conflict(day, shift_index, employee_username) is not None:
+            return False
             
-        return self.weekly_shifts[day][shift_index].add_employee(employee_username)
+        shift = self.weekly_shifts[day][shift_index]
+        if not shift.add_employee(employee_username):
+            return False
+        self._track_assignment(day, shift, [employee_username], 1)
+        self._invalidate_day(day)
+        self._record('assign_shift', day=day, shift_index=shift_index, employee=employee_username)
+        return True
     
+    @requires(Permission.EDIT_SCHEDULE)
     def remove_from_shift(self, admin_username: str, day: str,
                          shift_index: int, employee_username: str) -> bool:
         """הסרת עובד ממשמרת"""
-        if admin_username not in self.users or not self.users[admin_username].is_admin:
-            return False
-            
         if day not in self.weekly_shifts:
             return False
             
         if shift_index >= len(self.weekly_shifts[day]):
             return False
+
+        if self._scope_error(self.grant(admin_username), day, employee_username) is not None:
+            return False
             
-        return self.weekly_shifts[day][shift_index].remove_employee(employee_username)
+        shift = self.weekly_shifts[day][shift_index]
+        if not shift.remove_employee(employee_username):
+            return False
+        self._track_assignment(day, shift, [employee_username], -1)
+        self._invalidate_day(day)
+        self._record('remove_from_shift', day=day, shift_index=shift_index, employee=employee_username)
+        return True
     
-    def save_to_file(self, filename: str):
-        """שמירת נתוני המערכת לקובץ"""
-        data = {
+    @requires(Permission.EDIT_SCHEDULE, denied=lambda: (False, [{'index': None, 'error': 'אין הרשאה'}]))
+    def assign_shifts(self, admin_username: str, assignments: list) -> tuple[bool, list]:
+        """שיבוץ מרוכז: בדיקה אחת לכל הפריטים והחלה של הכל או כלום
+
+        כל פריט הוא מילון עם day, shift_index ו-employee. מוחזרת רשימת
+        שגיאות לפי מספר הפריט; אם יש שגיאה כלשהי - דבר לא משתנה.
+        """
+        grant = self.grant(admin_username)
+        errors = []
+        busy = {}  # day -> עובדים שכבר משובצים באותו יום (כולל פריטים קודמים באצווה)
+        pending = IntervalIndex()  # משמרות של פריטים קודמים באצווה
+        valid = []
+        for index, item in enumerate(assignments):
+            day, shift_index, employee, error = self._validate_batch_item(item)
+            if error is None and employee not in self.users:
+                error = 'העובד אינו קיים'
+            if error is None:
+                error = self._scope_error(grant, day, employee)
+            if error is None:
+                if day not in busy:
+                    busy[day] = {e for shift in self.weekly_shifts[day] for e in shift.employees}
+                if employee in busy[day]:
+                    error = 'העובד כבר משובץ ביום זה'
+            if error is None:
+                shift = self.weekly_shifts[day][shift_index]
+                interval = shift_interval(parse_day_key(day), shift.start_minutes, shift.end_minutes)
+                conflict = (self.conflict_index().conflict(employee, interval, self.min_rest_minutes)
+                            or pending.conflict(employee, interval, self.min_rest_minutes))
+                if conflict is not None:
+                    error = ('המשמרת חופפת למשמרת אחרת של העובד' if conflict[0] == OVERLAP
+                             else 'אין לעובד מספיק מנוחה ממשמרת אחרת')
+            if error is not None:
+                errors.append({'index': index, 'error': error})
+                continue
+            busy[day].add(employee)
+            pending.add(employee, interval)
+            valid.append({'day': day, 'shift_index': shift_index, 'employee': employee})
+
+        if errors:
+            return False, errors
+
+        for item in valid:
+            shift = self.weekly_shifts[item['day']][item['shift_index']]
+            shift.add_employee(item['employee'])
+            self._track_assignment(item['day'], shift, [item['employee']], 1)
+        for day in busy:
+            self._invalidate_day(day)
+        if valid:
+            self._record('assign_shifts', items=valid)
+        return True, []
+
+    @requires(Permission.EDIT_SCHEDULE, denied=lambda: (False, [{'index': None, 'error': 'אין הרשאה'}]))
+    def remove_from_shifts(self, admin_username: str, removals: list) -> tuple[bool, list]:
+        """הסרה מרוכזת של עובדים ממשמרות, הכל או כלום (ראו assign_shifts)"""
+        grant = self.grant(admin_username)
+        errors = []
+        seen = set()
+        valid = []
+        for index, item in enumerate(removals):
+            day, shift_index, employee, error = self._validate_batch_item(item)
+            if error is None:
+                error = self._scope_error(grant, day, employee)
+            if error is None:
+                key = (day, shift_index, employee)
+                if key in seen or not self.weekly_shifts[day][shift_index].has_employee(employee):
+                    error = 'העובד אינו משובץ במשמרת זו'
+                seen.add(key)
+            if error is not None:
+                errors.append({'index': index, 'error': error})
+                continue
+            valid.append({'day': day, 'shift_index': shift_index, 'employee': employee})
+
+        if errors:
+            return False, errors
+
+        days = set()
+        for item in valid:
+            shift = self.weekly_shifts[item['day']][item['shift_index']]
+            shift.remove_employee(item['employee'])
+            self._track_assignment(item['day'], shift, [item['employee']], -1)
+            days.add(item['day'])
+        for day in days:
+            self._invalidate_day(day)
+        if valid:
+            self._record('remove_from_shifts', items=valid)
+        return True, []
+
+    def _validate_batch_item(self, item) -> tuple:
+        """בדיקת מבנה פריט באצווה: (day, shift_index, employee, error)"""
+        try:
+            day = item['day']
+            shift_index = int(item['shift_index'])
+            employee = item['employee']
+        except (KeyError, TypeError, ValueError):
+            return None, None, None, 'פריט לא תקין'
+        if day not in self.weekly_shifts:
+            return day, shift_index, employee, 'היום אינו קיים'
+        if not 0 <= shift_index < len(self.weekly_shifts[day]):
+            return day, shift_index, employee, 'המשמרת אינה קיימת'
+        return day, shift_index, employee, None
+
+    def enable_journal(self, filename: str, compact_every: int = 1000, fsync: bool = False):
+        """הפעלת מצב יומן: כל שינוי נרשם כרשומה קטנה במקום שמירת הקובץ כולו
+
+        אם קובץ תמונת המצב קיים הוא נטען יחד עם זנב היומן, אחרת נכתבת
+        תמונת מצב ראשונית מהמצב הנוכחי בזיכרון.
+        """
+        self.journal = Journal(filename, compact_every, fsync)
+        if os.path.exists(filename):
+            self.load_from_file(filename)
+        else:
+            self.journal.write_snapshot(self._snapshot_data(), self._snapshot_encoder(filename))
+            self.journal_generation = self.journal.generation
+
+    def compact_journal(self):
+        """איחוד היומן לתמונת מצב חדשה
+
+        האיחוד נבנה מהדיסק ולא מהזיכרון, כדי לא לדרוס רשומות שנכתבו
+        על ידי תהליכים אחרים שחולקים את אותו קובץ.
+        """
+        if self.journal is None:
+            return
+        with self.journal.locked():
+            state = ShiftManagementSystem()
+            state.load_from_file(self.journal.snapshot_path)
+            self.journal.write_snapshot(state._snapshot_data(), self._snapshot_encoder(self.journal.snapshot_path))
+        self.journal_generation = self.journal.generation
+
+    def attach_storage(self, storage):
+        """חיבור שכבת אחסון משותפת (למשל SQLiteStorage)
+
+        מאגר ריק מאותחל מהמצב הנוכחי בזיכרון; אחרת המצב נטען מהמאגר.
+        """
+        self.storage = storage
+        if storage.is_empty():
+            storage.import_state(self)
+        for day, shifts in self.weekly_shifts.items():
+            storage.ensure_shifts(day, shifts)
+        storage.load_into(self)
+        storage.has_changed()
+        self.view_cache.clear()
+        self._hours = self._conflicts = self._employee_index = None
+        self.version = next(_state_versions)
+
+    def refresh(self):
+        """טעינה מחדש מהמאגר המשותף אם תהליך אחר שינה אותו"""
+        if self.storage is not None and self.storage.has_changed():
+            self.storage.load_into(self)
+            metrics.inc('shift_system_loads_total')
+            self.view_cache.clear()
+            self._hours = self._conflicts = self._employee_index = None
+            self.version = next(_state_versions)
+            # השינוי נעשה בתהליך אחר - הלקוחות מתבקשים לטעון מחדש
+            self.feed.publish('reload', {})
+
+    def _record(self, op: str, **fields):
+        """רישום שינוי: קידום גרסת המצב, ורישום ביומן ובשכבת האחסון (אם הופעלו)"""
+        self.version = next(_state_versions)
+        metrics.inc('shift_system_changes_total', op=op)
+        if self.journal is not None or self.storage is not None:
+            record = {'op': op, **fields}
+            if self.storage is not None:
+                self.storage.apply(record)
+            if self.journal is not None:
+                self.journal.append(record)
+                if self.journal.needs_compaction:
+                    self.compact_journal()
+        self._publish_change(op, fields)
+
+    def _publish_change(self, op: str, fields: dict):
+        """פרסום אירוע שינוי והתראות לעובדים שהשינוי נוגע להם"""
+        if op in ('assign_shift', 'remove_from_shift'):
+            self.feed.publish('schedule', {'op': op, 'days': [fields['day']]})
+            self._notify_shift_change(op, [fields])
+        elif op in ('assign_shifts', 'remove_from_shifts'):
+            days = list(dict.fromkeys(item['day'] for item in fields['items']))
+            self.feed.publish('schedule', {'op': op, 'days': days})
+            self._notify_shift_change(op, fields['items'])
+        elif op == 'update_shift_hours':
+            self.feed.publish('schedule', {'op': op, 'days': [fields['day']]})
+        elif op == 'create_appeal':
+            appeal = fields['appeal']
+            self.feed.publish('appeal', {'op': op, 'appeal': appeal},
+                              users=[appeal['employee']], admins=True)
+        elif op == 'handle_appeal':
+            appeal = self.appeals.get(fields['appeal_id'])
+            if appeal is not None:
+                self.feed.publish('appeal', {'op': op, 'appeal': appeal.to_dict()},
+                                  users=[appeal.employee], admins=True)
+                decision = 'אושר' if appeal.status == 'approved' else 'נדחה'
+                self.add_notification(appeal.employee, f"הערעור שלך על {appeal.day} {decision}",
+                                      'appeal')
+        elif op == 'add_user':
+            self.feed.publish('user', {'op': op, 'username': fields['user']['username']},
+                              users=(), admins=True)
+        elif op == 'update_user':
+            self.feed.publish('user', {'op': op, 'username': fields['username']},
+                              users=(), admins=True)
+
+    def _notify_shift_change(self, op: str, items: list):
+        assigned = op.startswith('assign')
+        for item in items:
+            if assigned:
+                message = f"שובצת למשמרת {item['shift_index'] + 1} ביום {item['day']}"
+            else:
+                message = f"הוסרת ממשמרת {item['shift_index'] + 1} ביום {item['day']}"
+            self.add_notification(item['employee'], message, 'schedule')
+
+    def _apply_record(self, record: dict):
+        """החלת רשומת יומן על המצב בזיכרון (ללא בדיקות הרשאה)"""
+        op = record.get('op')
+        if op == 'add_user':
+            user = User.from_dict(record['user'])
+            self.users[user.username] = user
+            self._index_user(user)
+        elif op == 'update_user':
+            user = self.users.get(record['username'])
+            if user is not None:
+                for field, value in record['details'].items():
+                    setattr(user, field, value)
+                self._index_user(user)
+        elif op == 'set_password':
+            user = self.users.get(record['username'])
+            if user is not None:
+                user.password = record['password']
+        elif op == 'set_role':
+            user = self.users.get(record['username'])
+            if user is not None:
+                user.role, user.team, user.scope = record['role'], record['team'], record['scope']
+                self.grants.invalidate(user.username)
+                self._index_user(user)
+        elif op == 'create_appeal':
+            appeal = ShiftAppeal.from_dict(record['appeal'])
+            if appeal.appeal_id not in self.appeals:
+                self.appeals.add(appeal)
+        elif op == 'handle_appeal':
+            self.appeals.set_status(record['appeal_id'], record['status'], record['admin_response'])
+        elif op in ('assign_shifts', 'remove_from_shifts'):
+            single_op = 'assign_shift' if op == 'assign_shifts' else 'remove_from_shift'
+            for item in record['items']:
+                self._apply_record({'op': single_op, **item})
+        elif op == 'set_shift_plan':
+            self.shift_plan = ShiftPlan.from_dict(record['plan'])
+            self.view_cache.clear()
+            self._hours = None
+        elif op in ('assign_shift', 'remove_from_shift', 'update_shift_hours'):
+            shifts = self.weekly_shifts.get(record['day'])
+            current_date = label_date(record['day']) if shifts is None else None
+            if current_date is not None and current_date in self.shifts_history:
+                # יום שכבר הועבר להיסטוריה במעבר שבוע
+                shifts = self.shifts_history[current_date]
+            elif current_date is not None:
+                # יום שנוצר אחרי תמונת המצב, גם אם הוא כבר עבר
+                shifts = self.weekly_shifts[record['day']] = self._materialize_day(record['day'])
+            shifts = shifts or []
+            if record['shift_index'] >= len(shifts):
+                return
+            shift = shifts[record['shift_index']]
+            self._invalidate_day(record['day'])
+            if op == 'assign_shift':
+                if shift.add_employee(record['employee']):
+                    self._track_assignment(record['day'], shift, [record['employee']], 1)
+            elif op == 'remove_from_shift':
+                if shift.remove_employee(record['employee']):
+                    self._track_assignment(record['day'], shift, [record['employee']], -1)
+            else:
+                self._track_assignment(record['day'], shift, shift.employees, -1)
+                shift.start_minutes = parse_minutes(record['start'])
+                shift.end_minutes = parse_minutes(record['end'])
+                self._track_assignment(record['day'], shift, shift.employees, 1)
+
+    def _snapshot_data(self) -> dict:
+        """בניית מבנה הנתונים הנשמר בקובץ"""
+        return {
             'users': {
                 username: user.to_dict() for username, user in self.users.items()
             },
             'shifts': {
-                day: [{
-                    'start': shift.start_time.strftime('%H:%M'),
-                    'end': shift.end_time.strftime('%H:%M'),
-                    'employees': shift.employees
-                } for shift in shifts]
+                day: [shift.to_dict() for shift in shifts]
                 for day, shifts in self.weekly_shifts.items()
             },
-            'appeals': [
-                {
-                    'employee': appeal.employee,
-                    'day': appeal.day,
-                    'shift_index': appeal.shift_index,
-                    'reason': appeal.reason,
-                    'status': appeal.status,
-                    'admin_response': appeal.admin_response,
-                    'created_at': appeal.created_at.isoformat()
-                }
-                for appeal in self.appeals
-            ]
+            'history': {
+                day.isoformat(): [shift.to_dict() for shift in shifts]
+                for day, shifts in self.shifts_history.items()
+            },
+            'appeals': [appeal.to_dict() for appeal in self.appeals],
+            'shift_plan': self.shift_plan.to_dict(),
+            'journal_generation': self.journal_generation
         }
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def _snapshot_encoder(filename: str):
+        """פונקציית הקידוד לקובץ: בינארי לסיומת .snap, אחרת JSON (None)"""
+        return snapshot.encode if snapshot.is_binary_path(filename) else None
+
+    def save_to_file(self, filename: str):
+        """שמירת נתוני המערכת לקובץ (JSON, או פורמט בינארי לקבצי .snap)"""
+        data = self._snapshot_data()
+        if snapshot.is_binary_path(filename):
+            atomic_write(filename, snapshot.encode(data))
+        else:
+            atomic_write(filename, json.dumps(data, ensure_ascii=False, indent=2))
+        metrics.inc('shift_system_saves_total')
     
     def load_from_file(self, filename: str):
-        """טעינת נתוני המערכת מקובץ"""
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        """טעינת נתוני המערכת מקובץ, כולל החלת זנב היומן אם קיים
+
+        הפורמט מזוהה לפי תוכן הקובץ. בתמונת מצב בינארית ההיסטוריה
+        והערעורים נטענים בעצלות, רק כשניגשים אליהם.
+        """
+        if snapshot.is_snapshot_file(filename):
+            reader = snapshot.SnapshotReader(filename)
+            data = reader.meta
+            self.shifts_history = ShiftHistory.from_snapshot(reader)
+            self.appeals = LazyAppealStore(reader.appeals)
+        else:
+            with open(filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # טעינת היסטוריה (לפי סדר תאריכים, כך שההוספה לסוף זולה)
+            self.shifts_history = ShiftHistory()
+            for day in sorted(data.get('history', {})):
+                self.shifts_history[date.fromisoformat(day)] = self._shifts_from_data(data['history'][day])
+
+            # טעינת ערעורים
+            # קבצים ישנים ללא מזהה יקבלו מזהה לפי סדר הופעתם
+            self.appeals = AppealStore()
+            for appeal_data in data.get('appeals', []):
+                self.appeals.add(ShiftAppeal.from_dict(appeal_data))
+        metrics.inc('shift_system_loads_total')
+        self.view_cache.clear()
+        self._hours = self._conflicts = self._employee_index = None
+        self.version = next(_state_versions)
         
         # טעינת משתמשים
         self.users = {}
@@ -369,35 +1338,58 @@ class ShiftManagementSystem:
                 **user_data
             })
         
-        # טעינת משמרות
-        self.weekly_shifts = {}
+        # טעינת תוכנית המשמרות (קבצים ישנים - ברירת המחדל) ומשמרות
+        self.shift_plan = (ShiftPlan.from_dict(data['shift_plan']) if data.get('shift_plan')
+                           else ShiftPlan.default())
+        self.weekly_shifts = ShiftDays(self)
         for day, shifts_data in data.get('shifts', {}).items():
-            self.weekly_shifts[day] = []
-            for shift_data in shifts_data:
-                start = datetime.strptime(shift_data['start'], '%H:%M').time()
-                end = datetime.strptime(shift_data['end'], '%H:%M').time()
-                shift = Shift(start, end)
-                shift.employees = shift_data.get('employees', [])
-                self.weekly_shifts[day].append(shift)
-        
-        # טעינת ערעורים
-        self.appeals = []
-        for appeal_data in data.get('appeals', []):
-            appeal = ShiftAppeal(
-                appeal_data['employee'],
-                appeal_data['day'],
-                appeal_data['shift_index'],
-                appeal_data['reason']
-            )
-            appeal.status = appeal_data['status']
-            appeal.admin_response = appeal_data['admin_response']
-            appeal.created_at = datetime.fromisoformat(appeal_data['created_at'])
-            self.appeals.append(appeal)
-
-    def auto_backup(self):
-        """יצירת גיבוי אוטומטי"""
-        backup_filename = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        self.save_to_file(f"backups/{backup_filename}")
+            self.weekly_shifts[day] = self._shifts_from_data(shifts_data)
+
+        # החלת השינויים שנרשמו ביומן אחרי תמונת המצב
+        self.journal_generation = data.get('journal_generation', 0)
+        records = Journal.read_tail(filename, self.journal_generation)
+        for record in records:
+            self._apply_record(record)
+        if self.journal is not None and self.journal.snapshot_path == filename:
+            self.journal.repair(self.journal_generation)
+            self.journal.generation = self.journal_generation
+            self.journal.pending = len(records)
+
+        # קובץ משבוע קודם: הימים שעברו להיסטוריה ומשמרות השבוע הנוכחי
+        self.current_week = None
+        self.roll_over_week()
+
+    @staticmethod
+    def _shifts_from_data(shifts_data: list) -> list:
+        """בניית אובייקטי משמרת מנתוני קובץ"""
+        return [Shift.from_dict(shift_data) for shift_data in shifts_data]
+
+    def backup_data(self) -> dict:
+        """המצב המלא במבנה קובץ הנתונים, עקבי ובלי לעצור את הטיפול בבקשות
+
+        במצב אחסון - מטרנזקציית קריאה במאגר; במצב יומן - מתמונת המצב
+        והיומן שבדיסק (נעילה משותפת, שלא עוצרת כתיבת רשומות); אחרת
+        מהזיכרון, עם ניסיון חוזר אם המצב השתנה באמצע המעבר.
+        """
+        if self.storage is not None:
+            return self.storage.export_data(self.current_week)
+        if self.journal is not None:
+            with self.journal.locked(exclusive=False):
+                state = ShiftManagementSystem()
+                state.clock = self.clock
+                state.load_from_file(self.journal.snapshot_path)
+            return state._snapshot_data()
+        for _ in range(3):
+            try:
+                return self._snapshot_data()
+            except RuntimeError:
+                # מילון ששונה בזמן המעבר (שינוי מ-thread אחר)
+                continue
+        return self._snapshot_data()
+
+    def auto_backup(self, directory: str = 'backups') -> Optional[str]:
+        """יצירת גיבוי מצטבר דחוס (ראו maintenance.py); None אם לא השתנה דבר מהגיבוי הקודם"""
+        return maintenance.write_backup(directory, self.backup_data(), self.get_israel_time())
     
     def create_appeal(self, employee: str, day: str, shift_index: int, reason: str) -> tuple[bool, str]:
         """יצירת ערעור חדש על משמרת"""
@@ -405,76 +1397,91 @@ class ShiftManagementSystem:
             # בדיקה שהעובד אכן משובץ במשמרת
             if day in self.weekly_shifts:
                 shift = self.weekly_shifts[day][shift_index]
-                if employee in shift.employees:
+                if shift.has_employee(employee):
                     # בדיקה אם כבר קיים ערעור על משמרת זו
-                    for appeal in self.appeals:
-                        if (appeal.employee == employee and 
-                            appeal.day == day and 
-                            appeal.shift_index == shift_index and 
-                            appeal.status == 'pending'):
+                    for appeal in self.appeals.for_slot(employee, day, shift_index):
+                        if appeal.status == 'pending':
                             return False, "כבר קיים ערעור על משמרת זו"
                     
                     # יצירת ערעור חדש
                     appeal = ShiftAppeal(employee, day, shift_index, reason)
-                    self.appeals.append(appeal)
-                    print(f"Created new appeal: {employee} for {day}")  # לוג
-                    self.save_to_file('schedule.json')  # שמירת השינויים
+                    if self.storage is not None:
+                        # המזהה מוקצה במאגר המשותף כדי שלא יתנגש בין workers
+                        appeal.appeal_id = self.storage.insert_appeal(appeal)
+                    self.appeals.add(appeal)
+                    logger.info(f"Created new appeal: {employee} for {day}")
+                    self._record('create_appeal', appeal=appeal.to_dict())
+                    if self.journal is None and self.storage is None:
+                        self.save_to_file('schedule.json')  # שמירת השינויים
                     return True, "הערעור נשלח בהצלחה"
             return False, "לא ניתן להגיש ערעור על משמרת זו"
         except Exception as e:
-            print(f"Error creating appeal: {str(e)}")  # לוג שגיאה
+            logger.error(f"Error creating appeal: {str(e)}")
             return False, f"אירעה שגיאה: {str(e)}"
     
-    def handle_appeal(self, appeal_index: int, admin_decision: str, admin_response: str = '') -> bool:
-        """טיפול בערעור על ידי מנהל"""
-        if 0 <= appeal_index < len(self.appeals):
-            appeal = self.appeals[appeal_index]
-            appeal.status = admin_decision
-            appeal.admin_response = admin_response
-            return True
-        return False
+    @requires(Permission.EDIT_SCHEDULE)
+    def handle_appeal(self, admin_username: str, appeal_id: int, admin_decision: str,
+                      admin_response: str = '') -> bool:
+        """טיפול בערעור על ידי מנהל; מנהל מוגבל רק בערעורים על ימים ועובדים שבתחום שלו"""
+        if admin_decision not in APPEAL_DECISIONS:
+            return False
+        appeal = self.appeals.get(appeal_id)
+        if appeal is None or self._scope_error(self.grant(admin_username), appeal.day, appeal.employee) is not None:
+            return False
+        if not self.appeals.set_status(appeal_id, admin_decision, admin_response):
+            return False
+        self._record('handle_appeal', appeal_id=appeal_id, status=admin_decision,
+                     admin_response=admin_response)
+        return True
     
     def get_pending_appeals(self) -> list:
         """קבלת רשימת הערעורים הממתינים"""
-        return [appeal for appeal in self.appeals if appeal.status == 'pending']
+        return self.appeals.by_status('pending')
     
     def get_employee_appeals(self, employee: str) -> list:
         """קבלת רשימת הערעורים של עובד מסוים"""
-        return [appeal for appeal in self.appeals if appeal.employee == employee]
+        return self.appeals.by_employee(employee)
     
     def add_notification(self, username: str, message: str, notification_type: str):
-        """הוספת התראה למשתמש"""
-        if not hasattr(self, 'notifications'):
-            self.notifications = {}
-        
-        if username not in self.notifications:
-            self.notifications[username] = []
-        
-        self.notifications[username].append({
-            'message': message,
-            'type': notification_type,
-            'timestamp': datetime.now(),
-            'read': False
-        })
+        """הוספת התראה למשתמש (תור חסום) ודחיפתה לחיבורים הפתוחים שלו"""
+        queue = self.notifications.get(username)
+        if queue is None:
+            queue = self.notifications[username] = NotificationQueue()
+        notification = queue.add(message, notification_type)
+        self.feed.publish('notification', dict(notification, timestamp=notification['timestamp'].isoformat()),
+                          users=[username])
     
     def get_user_notifications(self, username: str) -> list:
         """קבלת התראות של משתמש"""
-        if not hasattr(self, 'notifications') or username not in self.notifications:
+        queue = self.notifications.get(username)
+        if queue is None:
             return []
-        return self.notifications[username]
+        return queue.items()
+
+    def mark_notifications_read(self, username: str, notification_ids: Optional[list] = None) -> int:
+        """סימון התראות כנקראו; התראות שנקראו הן הראשונות שנמחקות כשהתור מלא"""
+        queue = self.notifications.get(username)
+        if queue is None:
+            return 0
+        return queue.mark_read(notification_ids)
     
     def has_active_appeal(self, employee: str, day: str, shift_index: int) -> tuple[bool, str, str]:
         """בדיקה אם יש ערעור פעיל או נדחה למשמרת"""
-        for appeal in self.appeals:
-            if (appeal.employee == employee and 
-                appeal.day == day and 
-                appeal.shift_index == shift_index):
-                if appeal.status == 'pending':
-                    return True, 'pending', ''
-                elif appeal.status == 'rejected':
-                    return True, 'rejected', appeal.admin_response
+        for appeal in self.appeals.for_slot(employee, day, shift_index):
+            if appeal.status == 'pending':
+                return True, 'pending', ''
+            elif appeal.status == 'rejected':
+                return True, 'rejected', appeal.admin_response
         return False, '', ''
 
+# מדידת זמנים של המתודות הציבוריות העיקריות (ראו instrumentation)
+instrument_methods(ShiftManagementSystem, [
+    'get_schedule_range', 'get_weekly_schedule', 'get_monthly_schedule',
+    'assign_shift', 'remove_from_shift', 'assign_shifts', 'remove_from_shifts', 'update_shift_hours',
+    'add_user', 'update_employee', 'search_employees', 'create_appeal', 'handle_appeal', 'has_active_appeal',
+    'save_to_file', 'load_from_file', 'refresh', 'archive_current_week',
+])
+
 if __name__ == "__main__":
     # אם מריצים את הקובץ הזה ישירות, לא יקר כלום
     # צריך להריץ את shift_management_demo.py
@@ -0,0 +1,193 @@
+"""תבניות משמרות וכללי חזרה
+
+תבנית מגדירה אילו משמרות יש בכל יום בשבוע (מספר משמרות שונה לכל יום,
+ומשמרות לילה שחוצות את חצות), ואופציונלית סט משמרות נפרד לחגים. כלל
+חזרה מחיל תבנית על טווח תאריכים, כל שבוע או כל כמה שבועות. התוכנית
+(ShiftPlan) היא רשימת התבניות והכללים; כלל מאוחר ברשימה גובר על קודמיו.
+
+התוכנית עצמה אינה יוצרת משמרות: המערכת שואלת אותה מה המשמרות של תאריך
+מסוים רק כשמציגים או עורכים אותו (ראו ShiftDays ב-shift_management_system),
+כך שלוח לשנה קדימה אינו עולה דבר עד שנוגעים בו.
+"""
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+MINUTES_PER_DAY = 24 * 60
+
+# חגים שבהם חלה משמרת החג, לפי יום וחודש עבריים (ללא גרשיים)
+HEBREW_HOLIDAYS = {
+    'א תשרי': 'ראש השנה',
+    'ב תשרי': 'ראש השנה',
+    'י תשרי': 'יום כיפור',
+    'טו תשרי': 'סוכות',
+    'כב תשרי': 'שמיני עצרת',
+    'טו ניסן': 'פסח',
+    'כא ניסן': 'שביעי של פסח',
+    'ו סיון': 'שבועות',
+    'ו סיוון': 'שבועות',
+}
+
+
+def hebrew_holiday(hebrew_date: str) -> Optional[str]:
+    """שם החג לתאריך עברי כמו 'ט"ו ניסן תשפ"ו', או None"""
+    words = hebrew_date.translate(str.maketrans('', '', '\'"׳״')).split()
+    return HEBREW_HOLIDAYS.get(' '.join(words[:2]))
+
+
+def weekday_index(day: date) -> int:
+    """מספר היום בשבוע הישראלי (0 = ראשון)"""
+    return (day.weekday() + 1) % 7
+
+
+def _parse_minutes(value: str) -> int:
+    hours, minutes = value.split(':')
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"שעה לא תקינה: {value}")
+    return hours * 60 + minutes
+
+
+def _format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class ShiftSpec:
+    """הגדרת משמרת בתבנית: שעות כדקות מאז חצות; סיום לפני ההתחלה = משמרת לילה"""
+    __slots__ = ('start_minutes', 'end_minutes', 'label')
+
+    def __init__(self, start_minutes: int, end_minutes: int, label: str = ''):
+        self.start_minutes = start_minutes
+        self.end_minutes = end_minutes
+        self.label = label
+
+    @property
+    def overnight(self) -> bool:
+        return self.end_minutes <= self.start_minutes
+
+    @property
+    def duration_minutes(self) -> int:
+        return (self.end_minutes - self.start_minutes) % MINUTES_PER_DAY or MINUTES_PER_DAY
+
+    def to_dict(self) -> dict:
+        data = {'start': _format_minutes(self.start_minutes), 'end': _format_minutes(self.end_minutes)}
+        if self.label:
+            data['label'] = self.label
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ShiftSpec':
+        return cls(_parse_minutes(data['start']), _parse_minutes(data['end']), data.get('label', ''))
+
+
+class ShiftTemplate:
+    """משמרות לכל יום בשבוע (0 = ראשון), ומשמרות לחגים אם הוגדרו"""
+
+    def __init__(self, name: str, days: Dict[int, List[ShiftSpec]],
+                 holiday: Optional[List[ShiftSpec]] = None):
+        self.name = name
+        self.days = days
+        self.holiday = holiday  # None = בחג חלות משמרות היום הרגיל
+
+    def specs_for(self, day: date, is_holiday: Callable[[date], bool]) -> List[ShiftSpec]:
+        # בדיקת החג (המרה לתאריך עברי) נעשית רק לתבניות שמגדירות משמרות חג
+        if self.holiday is not None and is_holiday(day):
+            return self.holiday
+        return self.days.get(weekday_index(day), [])
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'days': {str(weekday): [spec.to_dict() for spec in specs] for weekday, specs in sorted(self.days.items())},
+            'holiday': [spec.to_dict() for spec in self.holiday] if self.holiday is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ShiftTemplate':
+        days = {}
+        for weekday, specs in data.get('days', {}).items():
+            if not 0 <= int(weekday) <= 6:
+                raise ValueError(f"יום לא תקין: {weekday}")
+            days[int(weekday)] = [ShiftSpec.from_dict(spec) for spec in specs]
+        holiday = data.get('holiday')
+        return cls(data['name'], days, [ShiftSpec.from_dict(spec) for spec in holiday] if holiday is not None else None)
+
+
+class RecurrenceRule:
+    """החלת תבנית מתאריך start (ועד end, כולל), כל every_weeks שבועות"""
+
+    def __init__(self, template: str, start: date, end: Optional[date] = None, every_weeks: int = 1):
+        if every_weeks < 1:
+            raise ValueError("every_weeks חייב להיות לפחות 1")
+        self.template = template
+        self.start = start
+        self.end = end
+        self.every_weeks = every_weeks
+        self._first_week = start.toordinal() - weekday_index(start)
+
+    def applies(self, day: date) -> bool:
+        if day < self.start or (self.end is not None and day > self.end):
+            return False
+        if self.every_weeks == 1:
+            return True
+        weeks = (day.toordinal() - weekday_index(day) - self._first_week) // 7
+        return weeks % self.every_weeks == 0
+
+    def to_dict(self) -> dict:
+        return {'template': self.template, 'start': self.start.isoformat(),
+                'end': self.end.isoformat() if self.end is not None else None,
+                'every_weeks': self.every_weeks}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RecurrenceRule':
+        end = data.get('end')
+        return cls(data['template'], date.fromisoformat(data['start']),
+                   date.fromisoformat(end) if end else None, int(data.get('every_weeks', 1)))
+
+
+class ShiftPlan:
+    """תבניות, כללי חזרה וחגים נוספים (תאריכים שמוגדרים כחג בנוסף ללוח העברי)"""
+
+    def __init__(self, templates: Dict[str, ShiftTemplate], rules: List[RecurrenceRule],
+                 holidays=()):
+        for rule in rules:
+            if rule.template not in templates:
+                raise ValueError(f"תבנית לא קיימת: {rule.template}")
+        self.templates = templates
+        self.rules = rules
+        self.holidays = frozenset(holidays)
+
+    def template_for(self, day: date) -> Optional[ShiftTemplate]:
+        """התבנית שחלה על התאריך (הכלל האחרון שמתאים), או None"""
+        for rule in reversed(self.rules):
+            if rule.applies(day):
+                return self.templates[rule.template]
+        return None
+
+    def specs_for(self, day: date, is_holiday: Callable[[date], bool]) -> List[ShiftSpec]:
+        template = self.template_for(day)
+        return template.specs_for(day, is_holiday) if template is not None else []
+
+    @classmethod
+    def default(cls) -> 'ShiftPlan':
+        """בוקר וערב בכל ימות השבוע"""
+        specs = [ShiftSpec(8 * 60, 16 * 60), ShiftSpec(16 * 60, 23 * 60)]
+        template = ShiftTemplate('default', {weekday: specs for weekday in range(7)})
+        return cls({'default': template}, [RecurrenceRule('default', date.min)])
+
+    def to_dict(self) -> dict:
+        return {
+            'templates': [template.to_dict() for template in self.templates.values()],
+            'rules': [rule.to_dict() for rule in self.rules],
+            'holidays': sorted(day.isoformat() for day in self.holidays),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ShiftPlan':
+        """בניית תוכנית ממילון; ValueError/KeyError/TypeError על נתונים לא תקינים"""
+        templates = {}
+        for template_data in data.get('templates', []):
+            template = ShiftTemplate.from_dict(template_data)
+            templates[template.name] = template
+        rules = [RecurrenceRule.from_dict(rule) for rule in data.get('rules', [])]
+        holidays = [date.fromisoformat(day) for day in data.get('holidays', [])]
+        return cls(templates, rules, holidays)
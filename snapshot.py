@@ -0,0 +1,191 @@
+"""פורמט תמונת מצב בינארי (.snap) עם טעינה עצלה
+
+מבנה הקובץ (little-endian):
+    כותרת:  MAGIC, גרסת פורמט, מספר מקטעים
+    טבלה:   לכל מקטע - שם (8 בתים), היסט ואורך
+    מקטעים: מיושרים ל-8 בתים
+
+המשתמשים ומשמרות השבוע הנוכחי נשמרים כ-JSON קטן (meta) ונטענים מיד.
+ההיסטוריה נשמרת בעמודות (array) - תאריכים כ-ordinal, שעות כדקות מאז
+חצות ועובדים כמספרים בטבלת מחרוזות - ונקראת ישירות מ-mmap רק ליום
+שמבקשים. הערעורים נשמרים כ-JSON נפרד ומפוענחים רק בגישה הראשונה.
+
+המודול אינו תלוי ב-shift_management_system: הוא מקודד את המילון של
+_snapshot_data ומחזיר נתונים גולמיים, והמערכת בונה מהם את האובייקטים.
+
+המרה מקובץ JSON קיים:
+    python snapshot.py schedule.json schedule.snap
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, List, Tuple
+
+MAGIC = b'SHFTSNAP'
+FORMAT_VERSION = 1
+SNAPSHOT_EXTENSION = '.snap'
+
+_HEADER = struct.Struct('<8sII')
+_ENTRY = struct.Struct('<8sQQ')
+
+
+def is_binary_path(path: str) -> bool:
+    """האם הנתיב מיועד לפורמט הבינארי (לפי הסיומת)"""
+    return path.endswith(SNAPSHOT_EXTENSION)
+
+
+def is_snapshot_file(path: str) -> bool:
+    """האם הקובץ הקיים הוא תמונת מצב בינארית (לפי התוכן, לא הסיומת)"""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _parse_minutes(value: str) -> int:
+    hours, minutes = value.split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode(data: dict) -> bytes:
+    """קידוד מילון תמונת המצב (כמו ב-_snapshot_data) לפורמט הבינארי"""
+    strings: Dict[str, int] = {}
+    days = array('i')
+    day_index = array('I', [0])
+    starts = array('H')
+    ends = array('H')
+    employee_index = array('I', [0])
+    employees = array('I')
+
+    from datetime import date
+    for day in sorted(data.get('history', {})):
+        days.append(date.fromisoformat(day).toordinal())
+        for shift in data['history'][day]:
+            starts.append(_parse_minutes(shift['start']))
+            ends.append(_parse_minutes(shift['end']))
+            for employee in shift.get('employees', []):
+                string_id = strings.get(employee)
+                if string_id is None:
+                    string_id = strings[employee] = len(strings)
+                employees.append(string_id)
+            employee_index.append(len(employees))
+        day_index.append(len(starts))
+
+    string_bytes = bytearray()
+    string_offsets = array('I', [0])
+    for value in strings:
+        string_bytes += value.encode('utf-8')
+        string_offsets.append(len(string_bytes))
+
+    meta = {
+        'users': data.get('users', {}),
+        'shifts': data.get('shifts', {}),
+        'shift_plan': data.get('shift_plan'),
+        'journal_generation': data.get('journal_generation', 0),
+    }
+    sections = [
+        (b'meta', json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')),
+        (b'strings', bytes(string_bytes)),
+        (b'stroffs', _little_endian(string_offsets)),
+        (b'days', _little_endian(days)),
+        (b'dayidx', _little_endian(day_index)),
+        (b'starts', _little_endian(starts)),
+        (b'ends', _little_endian(ends)),
+        (b'empidx', _little_endian(employee_index)),
+        (b'emps', _little_endian(employees)),
+        (b'appeals', json.dumps(data.get('appeals', []), ensure_ascii=False,
+                                separators=(',', ':')).encode('utf-8')),
+    ]
+
+    offset = _HEADER.size + _ENTRY.size * len(sections)
+    table = []
+    body = bytearray()
+    for name, content in sections:
+        padding = -(offset + len(body)) % 8
+        body += b'\0' * padding
+        table.append(_ENTRY.pack(name, offset + len(body), len(content)))
+        body += content
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, len(sections)) + b''.join(table) + bytes(body)
+
+
+class SnapshotReader:
+    """קריאת תמונת מצב בינארית מ-mmap; עמודות ההיסטוריה אינן מועתקות"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} אינו קובץ תמונת מצב")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"גרסת פורמט לא נתמכת: {version}")
+
+        self._sections = {}
+        view = memoryview(self._map)
+        for index in range(count):
+            name, offset, length = _ENTRY.unpack_from(self._map, _HEADER.size + index * _ENTRY.size)
+            self._sections[name.rstrip(b'\0')] = view[offset:offset + length]
+
+        self.meta = json.loads(bytes(self._sections[b'meta']))
+        self._strings = self._sections[b'strings']
+        self._string_offsets = self._column(b'stroffs', 'I')
+        self._decoded = [None] * (len(self._string_offsets) - 1)
+        self.days = self._column(b'days', 'i')
+        self._day_index = self._column(b'dayidx', 'I')
+        self._starts = self._column(b'starts', 'H')
+        self._ends = self._column(b'ends', 'H')
+        self._employee_index = self._column(b'empidx', 'I')
+        self._employees = self._column(b'emps', 'I')
+
+    def _column(self, name: bytes, typecode: str):
+        section = self._sections[name]
+        if sys.byteorder == 'little':
+            return section.cast(typecode)
+        values = array(typecode, bytes(section))
+        values.byteswap()
+        return values
+
+    def _string(self, string_id: int) -> str:
+        value = self._decoded[string_id]
+        if value is None:
+            start, end = self._string_offsets[string_id], self._string_offsets[string_id + 1]
+            value = self._decoded[string_id] = sys.intern(str(self._strings[start:end], 'utf-8'))
+        return value
+
+    def shifts(self, day_position: int) -> List[Tuple[int, int, List[str]]]:
+        """המשמרות של היום במקום day_position: (דקת התחלה, דקת סיום, עובדים)"""
+        result = []
+        for shift in range(self._day_index[day_position], self._day_index[day_position + 1]):
+            employees = [self._string(self._employees[i])
+                         for i in range(self._employee_index[shift], self._employee_index[shift + 1])]
+            result.append((self._starts[shift], self._ends[shift], employees))
+        return result
+
+    def appeals(self) -> list:
+        """רשימת הערעורים (מילונים) - מפוענחת רק כשקוראים לה"""
+        return json.loads(bytes(self._sections[b'appeals']))
+
+
+def main(argv: List[str]) -> int:
+    """המרה בין JSON לפורמט הבינארי (הכיוון נקבע לפי סיומת היעד)"""
+    if len(argv) != 2:
+        print("שימוש: python snapshot.py schedule.json schedule.snap")
+        return 1
+    from shift_management_system import ShiftManagementSystem
+
+    system = ShiftManagementSystem()
+    system.load_from_file(argv[0])
+    system.save_to_file(argv[1])
+    print(f"הנתונים הועברו מ-{argv[0]} אל {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,396 @@
+"""שכבת אחסון ניתנת להחלפה עבור מערכת המשמרות, ומימוש SQLite"""
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Dict, List, Optional
+
+from shift_management_system import (
+    AppealStore, Shift, ShiftAppeal, ShiftManagementSystem, User, format_day_label, format_minutes, parse_day_key
+)
+from shift_templates import ShiftPlan
+
+
+class Storage(ABC):
+    """ממשק בסיסי לשכבת אחסון
+
+    שכבת האחסון מקבלת את אותן רשומות שינוי שנכתבות ליומן (ראו
+    ShiftManagementSystem._record) ומחילה אותן על המאגר המשותף.
+    """
+
+    @abstractmethod
+    def is_empty(self) -> bool:
+        """האם המאגר ריק (לפני העברה ראשונית)"""
+
+    @abstractmethod
+    def has_changed(self) -> bool:
+        """האם המאגר שונה על ידי תהליך אחר מאז הבדיקה הקודמת"""
+
+    @abstractmethod
+    def apply(self, record: dict):
+        """החלת רשומת שינוי על המאגר"""
+
+    @abstractmethod
+    def insert_appeal(self, appeal: ShiftAppeal) -> int:
+        """שמירת ערעור חדש והחזרת מזהה שהוקצה על ידי המאגר המשותף"""
+
+    @abstractmethod
+    def import_state(self, system: ShiftManagementSystem):
+        """כתיבת כל המצב בזיכרון למאגר (להעברה ראשונית)"""
+
+    @abstractmethod
+    def load_into(self, system: ShiftManagementSystem):
+        """טעינת משתמשים, ערעורים ומשמרות השבוע הנוכחי לזיכרון"""
+
+    @abstractmethod
+    def ensure_shifts(self, day: str, shifts: List[Shift]):
+        """יצירת משמרות ליום אם עדיין אין לו משמרות במאגר"""
+
+    @abstractmethod
+    def get_user(self, username: str) -> Optional[User]:
+        """משתמש יחיד לפי שם, בלי לטעון את כל המאגר"""
+
+    @abstractmethod
+    def shifts_between(self, start: date, end: date) -> Dict[date, List[dict]]:
+        """משמרות בטווח תאריכים (כולל), ממוינות לפי תאריך ומספר משמרת"""
+
+    @abstractmethod
+    def export_data(self, first_open_day: date) -> dict:
+        """כל המאגר במבנה קובץ הנתונים (ראו ShiftManagementSystem._snapshot_data), לגיבוי
+
+        ימים מ-first_open_day והלאה נשמרים כמשמרות השבוע, והקודמים כהיסטוריה.
+        """
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT,
+    first_name TEXT NOT NULL DEFAULT '',
+    last_name TEXT NOT NULL DEFAULT '',
+    email TEXT NOT NULL DEFAULT '',
+    phone TEXT NOT NULL DEFAULT '',
+    id_number TEXT NOT NULL DEFAULT '',
+    employee_number TEXT NOT NULL DEFAULT '',
+    is_admin INTEGER NOT NULL DEFAULT 0,
+    role TEXT NOT NULL DEFAULT '',
+    team TEXT NOT NULL DEFAULT '',
+    scope TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS shifts (
+    shift_date TEXT NOT NULL,
+    shift_index INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    PRIMARY KEY (shift_date, shift_index)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS shift_employees (
+    shift_date TEXT NOT NULL,
+    shift_index INTEGER NOT NULL,
+    employee TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (shift_date, shift_index, employee)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_shift_employees_employee
+    ON shift_employees (employee, shift_date);
+CREATE TABLE IF NOT EXISTS appeals (
+    id INTEGER PRIMARY KEY,
+    employee TEXT NOT NULL,
+    day TEXT NOT NULL,
+    shift_index INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    status TEXT NOT NULL,
+    admin_response TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_appeals_slot ON appeals (employee, day, shift_index);
+CREATE INDEX IF NOT EXISTS idx_appeals_status ON appeals (status);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+USER_FIELDS = ('username', 'password', 'first_name', 'last_name', 'email',
+               'phone', 'id_number', 'employee_number', 'is_admin', 'role', 'team', 'scope')
+
+# עמודות שנוספו אחרי יצירת מאגרים קיימים: שם -> הגדרה ל-ALTER TABLE
+ADDED_USER_COLUMNS = {
+    'role': "TEXT NOT NULL DEFAULT ''",
+    'team': "TEXT NOT NULL DEFAULT ''",
+    'scope': "TEXT NOT NULL DEFAULT '{}'",
+}
+
+
+class SQLiteStorage(Storage):
+    """אחסון SQLite במצב WAL, משותף לכל ה-workers, עם חיבור נפרד לכל thread"""
+
+    def __init__(self, path: str = 'schedule.db', timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            existing = {row['name'] for row in conn.execute('PRAGMA table_info(users)')}
+            for column, definition in ADDED_USER_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE users ADD COLUMN {column} {definition}')
+
+    def _connection(self) -> sqlite3.Connection:
+        """חיבור ל-thread הנוכחי (נוצר בפעם הראשונה)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.data_version = None
+        return conn
+
+    def close(self):
+        """סגירת החיבור של ה-thread הנוכחי"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def is_empty(self) -> bool:
+        row = self._connection().execute('SELECT COUNT(*) FROM users').fetchone()
+        return row[0] == 0
+
+    def has_changed(self) -> bool:
+        # PRAGMA data_version משתנה רק כשחיבור אחר ביצע commit
+        conn = self._connection()
+        version = conn.execute('PRAGMA data_version').fetchone()[0]
+        changed = version != self._local.data_version
+        self._local.data_version = version
+        return changed
+
+    def apply(self, record: dict):
+        with self._connection() as conn:
+            self._apply(conn, record)
+
+    def _apply(self, conn: sqlite3.Connection, record: dict):
+        op = record.get('op')
+        if op in ('assign_shifts', 'remove_from_shifts'):
+            single_op = 'assign_shift' if op == 'assign_shifts' else 'remove_from_shift'
+            for item in record['items']:
+                self._apply(conn, {'op': single_op, **item})
+        elif op == 'add_user':
+            self._save_user(conn, record['user'])
+        elif op == 'set_password':
+            conn.execute('UPDATE users SET password = ? WHERE username = ?',
+                         (record['password'], record['username']))
+        elif op == 'update_user':
+            fields = [field for field in record['details'] if field in USER_FIELDS and field != 'username']
+            if fields:
+                conn.execute(f"UPDATE users SET {', '.join(f'{field} = ?' for field in fields)} WHERE username = ?",
+                             (*(record['details'][field] for field in fields), record['username']))
+        elif op == 'set_role':
+            conn.execute('UPDATE users SET role = ?, team = ?, scope = ? WHERE username = ?',
+                         (record['role'], record['team'], json.dumps(record['scope']), record['username']))
+        elif op == 'create_appeal':
+            # ערעורים חדשים נשמרים כבר ב-insert_appeal
+            self._save_appeal(conn, record['appeal'], replace=False)
+        elif op == 'handle_appeal':
+            conn.execute('UPDATE appeals SET status = ?, admin_response = ? WHERE id = ?',
+                         (record['status'], record['admin_response'], record['appeal_id']))
+        elif op == 'assign_shift':
+            conn.execute(
+                'INSERT OR IGNORE INTO shift_employees VALUES (?, ?, ?, '
+                '(SELECT COALESCE(MAX(position), -1) + 1 FROM shift_employees '
+                ' WHERE shift_date = ? AND shift_index = ?))',
+                (_day_to_iso(record['day']), record['shift_index'], record['employee'],
+                 _day_to_iso(record['day']), record['shift_index']))
+        elif op == 'remove_from_shift':
+            conn.execute('DELETE FROM shift_employees '
+                         'WHERE shift_date = ? AND shift_index = ? AND employee = ?',
+                         (_day_to_iso(record['day']), record['shift_index'], record['employee']))
+        elif op == 'set_shift_plan':
+            self._save_setting(conn, 'shift_plan', record['plan'])
+        elif op == 'update_shift_hours':
+            conn.execute('UPDATE shifts SET start_time = ?, end_time = ? '
+                         'WHERE shift_date = ? AND shift_index = ?',
+                         (record['start'], record['end'],
+                          _day_to_iso(record['day']), record['shift_index']))
+
+    def insert_appeal(self, appeal: ShiftAppeal) -> int:
+        data = appeal.to_dict()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO appeals '
+                '(employee, day, shift_index, reason, status, admin_response, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (data['employee'], data['day'], data['shift_index'], data['reason'],
+                 data['status'], data['admin_response'], data['created_at']))
+        return cursor.lastrowid
+
+    def import_state(self, system: ShiftManagementSystem):
+        with self._connection() as conn:
+            for user in system.users.values():
+                self._save_user(conn, user.to_dict())
+            for appeal in system.appeals:
+                self._save_appeal(conn, appeal.to_dict())
+            for shift_date, shifts in system.shifts_history.items():
+                self._save_shifts(conn, shift_date, shifts, replace=True)
+            for day, shifts in system.weekly_shifts.items():
+                self._save_shifts(conn, parse_day_key(day), shifts, replace=True)
+            self._save_setting(conn, 'shift_plan', system.shift_plan.to_dict())
+
+    def get_user(self, username: str) -> Optional[User]:
+        row = self._connection().execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
+        if row is None:
+            return None
+        return self._user_from_row(row)
+
+    def load_into(self, system: ShiftManagementSystem):
+        conn = self._connection()
+        system.users = {
+            row['username']: self._user_from_row(row)
+            for row in conn.execute('SELECT * FROM users')
+        }
+
+        appeals = AppealStore()
+        for row in conn.execute('SELECT * FROM appeals ORDER BY id'):
+            appeals.add(ShiftAppeal.from_dict(dict(row)))
+        system.appeals = appeals
+
+        row = conn.execute("SELECT value FROM settings WHERE key = 'shift_plan'").fetchone()
+        if row is not None:
+            system.shift_plan = ShiftPlan.from_dict(json.loads(row['value']))
+
+        days = {parse_day_key(day): day for day in system.weekly_shifts}
+        if days:
+            stored = self.shifts_between(min(days), max(days))
+            for shift_date, day in days.items():
+                shifts = []
+                for data in stored.get(shift_date, []):
+                    shifts.append(Shift.from_dict({'start': data['start_time'],
+                                                   'end': data['end_time'],
+                                                   'employees': data['employees']}))
+                system.weekly_shifts[day] = shifts
+
+    def ensure_shifts(self, day: str, shifts: List[Shift]):
+        with self._connection() as conn:
+            self._save_shifts(conn, parse_day_key(day), shifts, replace=False)
+
+    def shifts_between(self, start: date, end: date) -> Dict[date, List[dict]]:
+        rows = self._connection().execute(
+            'SELECT s.shift_date, s.shift_index, s.start_time, s.end_time, e.employee '
+            'FROM shifts s LEFT JOIN shift_employees e '
+            '  ON e.shift_date = s.shift_date AND e.shift_index = s.shift_index '
+            'WHERE s.shift_date BETWEEN ? AND ? '
+            'ORDER BY s.shift_date, s.shift_index, e.position',
+            (start.isoformat(), end.isoformat()))
+
+        result = {}
+        current_key = None
+        for shift_date, shift_index, start_time, end_time, employee in rows:
+            if (shift_date, shift_index) != current_key:
+                current_key = (shift_date, shift_index)
+                current = {'start_time': start_time, 'end_time': end_time, 'employees': []}
+                result.setdefault(date.fromisoformat(shift_date), []).append(current)
+            if employee is not None:
+                current['employees'].append(employee)
+        return result
+
+    def export_data(self, first_open_day: date) -> dict:
+        conn = self._connection()
+        # טרנזקציית קריאה אחת: תמונה עקבית של כל הטבלאות גם כשתהליכים אחרים כותבים
+        conn.execute('BEGIN')
+        try:
+            users = {row['username']: self._user_from_row(row).to_dict()
+                     for row in conn.execute('SELECT * FROM users')}
+            appeals = [ShiftAppeal.from_dict(dict(row)).to_dict()
+                       for row in conn.execute('SELECT * FROM appeals ORDER BY id')]
+            row = conn.execute("SELECT value FROM settings WHERE key = 'shift_plan'").fetchone()
+            shifts, history = {}, {}
+            for shift_date, stored in self.shifts_between(date.min, date.max).items():
+                data = [{'start': shift['start_time'], 'end': shift['end_time'], 'employees': shift['employees']}
+                        for shift in stored]
+                if shift_date >= first_open_day:
+                    shifts[format_day_label(shift_date)] = data
+                else:
+                    history[shift_date.isoformat()] = data
+        finally:
+            conn.commit()
+        return {
+            'users': users,
+            'shifts': shifts,
+            'history': history,
+            'appeals': appeals,
+            'shift_plan': json.loads(row['value']) if row is not None else ShiftPlan.default().to_dict(),
+            'journal_generation': 0,
+        }
+
+    @staticmethod
+    def _save_setting(conn: sqlite3.Connection, key: str, value):
+        conn.execute('INSERT OR REPLACE INTO settings VALUES (?, ?)',
+                     (key, json.dumps(value, ensure_ascii=False)))
+
+    @staticmethod
+    def _save_user(conn: sqlite3.Connection, data: dict):
+        conn.execute(
+            f"INSERT OR REPLACE INTO users ({', '.join(USER_FIELDS)}) "
+            f"VALUES ({', '.join('?' for _ in USER_FIELDS)})",
+            tuple(int(bool(data.get(field))) if field == 'is_admin'
+                  else json.dumps(data.get(field) or {}) if field == 'scope'
+                  else data.get(field, '') if field in ADDED_USER_COLUMNS
+                  else data.get(field)
+                  for field in USER_FIELDS))
+
+    @staticmethod
+    def _user_from_row(row: sqlite3.Row) -> User:
+        return User.from_dict({**dict(row), 'is_admin': bool(row['is_admin']),
+                               'scope': json.loads(row['scope'] or '{}')})
+
+    @staticmethod
+    def _save_appeal(conn: sqlite3.Connection, data: dict, replace: bool = True):
+        conn.execute(
+            f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO appeals "
+            '(id, employee, day, shift_index, reason, status, admin_response, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (data['id'], data['employee'], data['day'], data['shift_index'], data['reason'],
+             data['status'], data['admin_response'], data['created_at']))
+
+    @staticmethod
+    def _save_shifts(conn: sqlite3.Connection, day: date, shifts: List[Shift], replace: bool):
+        shift_date = day.isoformat()
+        if not replace:
+            row = conn.execute('SELECT 1 FROM shifts WHERE shift_date = ? LIMIT 1',
+                               (shift_date,)).fetchone()
+            if row is not None:
+                return
+        conn.execute('DELETE FROM shifts WHERE shift_date = ?', (shift_date,))
+        conn.execute('DELETE FROM shift_employees WHERE shift_date = ?', (shift_date,))
+        for index, shift in enumerate(shifts):
+            conn.execute('INSERT INTO shifts VALUES (?, ?, ?, ?)',
+                         (shift_date, index, format_minutes(shift.start_minutes),
+                          format_minutes(shift.end_minutes)))
+            conn.executemany('INSERT OR IGNORE INTO shift_employees VALUES (?, ?, ?, ?)',
+                             [(shift_date, index, employee, position)
+                              for position, employee in enumerate(shift.employees)])
+
+
+def _day_to_iso(day: str) -> str:
+    return parse_day_key(day).isoformat()
+
+
+def migrate_json(json_path: str, db_path: str) -> SQLiteStorage:
+    """העברת נתונים מקובץ schedule.json קיים למאגר SQLite"""
+    system = ShiftManagementSystem()
+    system.load_from_file(json_path)
+    storage = SQLiteStorage(db_path)
+    storage.import_state(system)
+    return storage
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 3:
+        print("שימוש: python storage.py schedule.json schedule.db")
+        sys.exit(1)
+    migrate_json(sys.argv[1], sys.argv[2])
+    print(f"הנתונים הועברו מ-{sys.argv[1]} אל {sys.argv[2]}")
@@ -0,0 +1,178 @@
+"""ריבוי אתרים (tenants) בפריסה אחת
+
+לכל אתר מאגר SQLite משלו בתיקיית האתרים (<id>.db), כך שהמשתמשים,
+המשמרות והערעורים של אתר אחד מבודדים לחלוטין משל האחרים. בקשה טוענת
+לזיכרון רק את מצב האתר שלה. מספר האתרים הטעונים בזיכרון חסום (LRU),
+ואתר שלא היה בשימוש זמן מה משוחרר - כל שינוי כבר נכתב למאגר שלו
+בזמן הביצוע, כך שהשחרור הוא רק הסרה מהזיכרון. מה שנשמר רק בזיכרון
+(התראות וזרם השינויים) לא נשמר אחרי שחרור.
+
+רשימת האתרים וכותרותיהם נשמרת ב-tenants.json באותה תיקייה:
+
+    python tenants.py add tel-aviv "Tel Aviv"
+    python tenants.py list
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time as timer
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from journal import atomic_write
+
+TENANT_ID_PATTERN = re.compile(r'^[a-z0-9][a-z0-9-]{0,62}$')
+CONFIG_FILE = 'tenants.json'
+
+
+class TenantRegistry:
+    """מאגר האתרים: טעינה לפי דרישה ושחרור לפי LRU או זמן חוסר פעילות
+
+    loader מקבל נתיב למאגר של האתר ומחזיר ShiftManagementSystem מחובר
+    אליו (ראו web_app.init_system).
+    """
+
+    def __init__(self, directory: str, loader: Callable, max_resident: int = 100,
+                 idle_timeout: float = 600.0, clock=timer.monotonic):
+        self.directory = directory
+        self.loader = loader
+        self.max_resident = max_resident
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.loads = 0
+        self.evictions = 0
+        self._resident = OrderedDict()  # tenant_id -> [system, last_used], מהישן לחדש
+        self._loading = {}  # tenant_id -> Lock, כדי שאתר ייטען פעם אחת גם בבקשות מקבילות
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._config_mtime = None
+        self.tenants = self._read_config()
+
+    def _config_path(self) -> str:
+        return os.path.join(self.directory, CONFIG_FILE)
+
+    def _read_config(self) -> Dict[str, dict]:
+        try:
+            self._config_mtime = os.stat(self._config_path()).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        with open(self._config_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _reload_if_changed(self) -> bool:
+        """קריאה מחדש של רשימת האתרים אם נוסף אתר מתהליך אחר (tenants.py add)"""
+        try:
+            mtime = os.stat(self._config_path()).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._config_mtime:
+            return False
+        self.tenants = self._read_config()
+        return True
+
+    def database_path(self, tenant_id: str) -> str:
+        return os.path.join(self.directory, f"{tenant_id}.db")
+
+    def add(self, tenant_id: str, title: str) -> bool:
+        """רישום אתר חדש (המאגר שלו נוצר בטעינה הראשונה)"""
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            return False
+        with self._lock:
+            self.tenants = self._read_config()
+            self.tenants[tenant_id] = {'title': title}
+            atomic_write(self._config_path(), json.dumps(self.tenants, ensure_ascii=False, indent=2))
+        return True
+
+    def exists(self, tenant_id: Optional[str]) -> bool:
+        return tenant_id is not None and tenant_id in self.tenants
+
+    def tenant_from_host(self, host: str, default: Optional[str] = None) -> Optional[str]:
+        """מזהה האתר לפי תת-הדומיין (tel-aviv.example.com), או default"""
+        label = host.split(':', 1)[0].split('.', 1)[0].lower()
+        if not self.exists(label) and TENANT_ID_PATTERN.match(label):
+            self._reload_if_changed()
+        return label if self.exists(label) else default if self.exists(default) else None
+
+    def get(self, tenant_id: str):
+        """המערכת של האתר, טעונה לזיכרון; None לאתר שאינו רשום"""
+        if not self.exists(tenant_id):
+            return None
+        with self._lock:
+            entry = self._resident.get(tenant_id)
+            if entry is not None:
+                entry[1] = self.clock()
+                self._resident.move_to_end(tenant_id)
+                return entry[0]
+            loading = self._loading.setdefault(tenant_id, threading.Lock())
+
+        with loading:
+            with self._lock:
+                entry = self._resident.get(tenant_id)
+                if entry is not None:
+                    return entry[0]
+            # הטעינה (קריאת SQLite) נעשית מחוץ לנעילה הכללית, כדי לא לעכב אתרים אחרים
+            system = self.loader(self.database_path(tenant_id))
+            system.tenant_id = tenant_id
+            system.site_title = self.tenants[tenant_id].get('title') or tenant_id
+            with self._lock:
+                self._resident[tenant_id] = [system, self.clock()]
+                self._loading.pop(tenant_id, None)
+                self.loads += 1
+                self._evict()
+        return system
+
+    def _evict(self):
+        """שחרור אתרים מעבר לגבול ואתרים שלא היו בשימוש (נקרא תחת הנעילה)"""
+        now = self.clock()
+        while self._resident:
+            tenant_id, (system, last_used) = next(iter(self._resident.items()))
+            if len(self._resident) <= self.max_resident and now - last_used < self.idle_timeout:
+                break
+            del self._resident[tenant_id]
+            self.evictions += 1
+
+    def evict_idle(self):
+        """שחרור אתרים שלא היו בשימוש מעבר ל-idle_timeout"""
+        with self._lock:
+            self._evict()
+
+    def is_resident(self, tenant_id: str) -> bool:
+        """האם האתר טעון (כלומר get לא יפנה למאגר)"""
+        return tenant_id in self._resident
+
+    def resident(self) -> List[str]:
+        with self._lock:
+            return list(self._resident)
+
+    def resident_systems(self) -> list:
+        """(מזהה, מערכת) לכל אתר טעון, בלי לעדכן את זמן השימוש (לתחזוקת רקע)"""
+        with self._lock:
+            return [(tenant_id, entry[0]) for tenant_id, entry in self._resident.items()]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'tenants': len(self.tenants), 'resident': len(self._resident),
+                    'loads': self.loads, 'evictions': self.evictions}
+
+
+def main(argv: List[str]) -> int:
+    directory = os.getenv('TENANTS_DIR')
+    if not directory or not argv or argv[0] not in ('add', 'list'):
+        print("שימוש: TENANTS_DIR=<תיקייה> python tenants.py add <id> <כותרת> | list")
+        return 1
+    registry = TenantRegistry(directory, loader=None)
+    if argv[0] == 'list':
+        for tenant_id, config in sorted(registry.tenants.items()):
+            print(f"{tenant_id}\t{config.get('title', '')}")
+        return 0
+    if len(argv) != 3 or not registry.add(argv[1], argv[2]):
+        print("מזהה אתר לא תקין (אותיות קטנות באנגלית, ספרות ומקף)")
+        return 1
+    print(f"האתר {argv[1]} נוסף")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
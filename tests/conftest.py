@@ -0,0 +1,7 @@
+"""הרצה מתיקיית השורש: python -m pytest tests"""
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.disable(logging.CRITICAL)
@@ -0,0 +1,109 @@
+"""במצב ASGI כל שינוי במערכת רץ ב-thread של Flask, אחד אחרי השני"""
+import asyncio
+import base64
+import threading
+import time as timer
+from datetime import datetime
+
+from asgiref.wsgi import WsgiToAsgi
+
+import asgi
+from auth import needs_rehash
+from maintenance import Maintenance
+from shift_management_system import ShiftManagementSystem, User
+
+
+def test_mutations_run_on_flask_thread_one_at_a_time():
+    threads, active, overlaps = set(), [0], []
+
+    def mutate():
+        threads.add(threading.get_ident())
+        active[0] += 1
+        overlaps.append(active[0])
+        timer.sleep(0.01)
+        active[0] -= 1
+        return threading.get_ident()
+
+    def wsgi_app(environ, start_response):
+        threads.add(threading.get_ident())
+        start_response('200 OK', [])
+        return [b'']
+
+    async def flask_request():
+        scope = {'type': 'http', 'method': 'GET', 'path': '/', 'query_string': b'', 'headers': [], 'http_version': '1.1',
+                 'server': ('test', 80)}
+        messages = iter([{'type': 'http.request', 'body': b'', 'more_body': False}])
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            pass
+
+        await WsgiToAsgi(wsgi_app)(scope, receive, send)
+
+    async def run():
+        results = await asyncio.gather(flask_request(), *(asgi.mutation_executor.run(mutate) for _ in range(5)))
+        return results[1]
+
+    mutation_thread = asyncio.run(run())
+    assert max(overlaps) == 1
+    assert threads == {mutation_thread}
+
+
+def test_basic_auth_rehash_runs_on_flask_thread():
+    system = ShiftManagementSystem()
+    system.users['emp'] = User('emp', password='legacy-secret')  # טקסט גלוי - מגובב בהתחברות
+    recorded = []
+    record = system._record
+    system._record = lambda op, **fields: (recorded.append((op, threading.get_ident())), record(op, **fields))
+
+    credentials = base64.b64encode(b'emp:legacy-secret')
+    request = asgi.Request({'path': '/api/appeals', 'method': 'GET', 'query_string': b'',
+                            'headers': [(b'authorization', b'Basic ' + credentials)], 'client': ('10.0.0.1', 1)})
+    request.system = system
+
+    async def run():
+        assert await asgi.basic_auth(request, None)
+        return await asgi.mutation_executor.run(threading.get_ident)
+
+    flask_thread = asyncio.run(run())
+    assert request.session['username'] == 'emp'
+    assert recorded == [('set_password', flask_thread)]
+    assert not needs_rehash(system.users['emp'].password)
+
+
+def test_maintenance_runs_on_flask_thread_with_requests(tmp_path):
+    system = ShiftManagementSystem()
+    now = [datetime(2026, 10, 17, 23, 0)]
+    system.clock = lambda: now[0]
+    system.initialize_shifts()
+    threads, active, overlaps = set(), [0], []
+
+    def exclusive(fn):
+        def wrapper(*args):
+            threads.add(threading.get_ident())
+            active[0] += 1
+            overlaps.append(active[0])
+            try:
+                timer.sleep(0.01)
+                return fn(*args)
+            finally:
+                active[0] -= 1
+        return wrapper
+
+    system.roll_over_week = exclusive(system.roll_over_week)
+    system.backup_data = exclusive(system.backup_data)
+    request = exclusive(lambda: system.get_weekly_schedule(0))
+    maintenance = Maintenance(lambda: [('', system)], backup_dir=str(tmp_path), dispatch=asgi.run_on_flask_thread)
+    now[0] = datetime(2026, 10, 18, 0, 1)  # ראשון - מעבר שבוע וגיבוי ראשון
+
+    async def run():
+        background = asyncio.get_running_loop().run_in_executor(None, maintenance.run_pending)
+        results = await asyncio.gather(background, *(asgi.mutation_executor.run(request) for _ in range(5)))
+        return results[0], await asgi.mutation_executor.run(threading.get_ident)
+
+    done, flask_thread = asyncio.run(run())
+    assert done['rolled_over'] == [''] and len(done['backups']) == 1
+    assert max(overlaps) == 1
+    assert threads == {flask_thread}
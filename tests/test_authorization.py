@@ -0,0 +1,75 @@
+"""מתודות שמשנות את המערכת בודקות את הרשאת המשתמש המבצע"""
+from datetime import timedelta
+
+import pytest
+
+from authorization import Permission
+from israel_calendar import day_label
+from shift_management_system import ShiftManagementSystem, User
+
+ADMIN = 'boss'
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    # בלי יומן ומאגר create_appeal שומר ל-schedule.json בתיקייה הנוכחית
+    monkeypatch.chdir(tmp_path)
+
+
+def make_system():
+    system = ShiftManagementSystem()
+    system.users[ADMIN] = User(ADMIN, role='admin')
+    system.users['lead'] = User('lead', role='manager')
+    system.users['emp'] = User('emp', team='bar')
+    system.users['other'] = User('other', team='kitchen')
+    return system
+
+
+def create_appeal(system, employee: str, day: str):
+    assert system.assign_shifts(ADMIN, [{'day': day, 'shift_index': 0, 'employee': employee}])[0]
+    assert system.create_appeal(employee, day, 0, "סיבה")[0]
+    return system.appeals.for_slot(employee, day, 0)[-1]
+
+
+def test_handle_appeal_requires_schedule_permission():
+    system = make_system()
+    appeal = create_appeal(system, 'emp', day_label(system.current_week))
+
+    assert not system.handle_appeal('emp', appeal.appeal_id, 'approved')
+    assert not system.handle_appeal('other', appeal.appeal_id, 'approved')
+    assert appeal.status == 'pending'
+    assert system.handle_appeal('lead', appeal.appeal_id, 'rejected', "לא")
+    assert appeal.status == 'rejected'
+    assert appeal.admin_response == "לא"
+
+
+def test_set_role_requires_admin():
+    system = make_system()
+    assert system.set_role('lead', 'emp', 'manager') == (False, "אין הרשאה")
+    assert system.users['emp'].role != 'manager'
+    assert system.set_role(ADMIN, 'emp', 'manager') == (True, "התפקיד עודכן")
+    assert system.grant('emp').has(Permission.EDIT_SCHEDULE)
+
+
+def test_handle_appeal_rejects_unknown_decision():
+    system = make_system()
+    appeal = create_appeal(system, 'emp', day_label(system.current_week))
+    assert not system.handle_appeal(ADMIN, appeal.appeal_id, 'maybe')
+    assert appeal.status == 'pending'
+    assert system.appeals.by_status('maybe') == []
+    assert not system.handle_appeal(ADMIN, appeal.appeal_id + 1, 'approved')
+
+
+def test_scoped_manager_handles_only_appeals_in_scope():
+    system = make_system()
+    assert system.set_role(ADMIN, 'lead', 'manager', scope={'days': [0], 'teams': ['kitchen']})[0]
+    sunday, monday = (day_label(system.current_week + timedelta(days=offset)) for offset in (0, 1))
+    other_team = create_appeal(system, 'emp', sunday)
+    other_day = create_appeal(system, 'other', monday)
+    in_scope = create_appeal(system, 'other', sunday)
+
+    assert not system.handle_appeal('lead', other_team.appeal_id, 'approved')
+    assert not system.handle_appeal('lead', other_day.appeal_id, 'approved')
+    assert other_team.status == other_day.status == 'pending'
+    assert system.handle_appeal('lead', in_scope.appeal_id, 'approved')
+    assert in_scope.status == 'approved'
@@ -0,0 +1,64 @@
+"""שיבוץ אוטומטי של השבוע מול המערכת: מאגר העובדים, משמרות סמוכות ותוצאת ההחלה"""
+from datetime import datetime
+
+from auto_scheduler import plan_week, schedule_week
+from israel_calendar import day_label
+from shift_management_system import ShiftManagementSystem, User
+
+ADMIN = 'boss'
+
+
+def make_system():
+    system = ShiftManagementSystem()
+    system.users[ADMIN] = User(ADMIN, role='admin')
+    for name in ('emp1', 'emp2', 'emp3'):
+        system.users[name] = User(name)
+    return system
+
+
+def assigned(system) -> int:
+    return sum(len(shift.employees) for shifts in system.week_shifts().values() for shift in shifts)
+
+
+def test_schedule_week_applies_and_reports_success():
+    system = make_system()
+    result, success, errors = schedule_week(system, ADMIN, {0: 1})
+    assert success, errors
+    assert errors == []
+    assert assigned(system) == sum(len(employees) for employees in result.assignments.values()) > 0
+
+
+def test_schedule_week_reports_failure_without_applying():
+    system = make_system()
+    result, success, errors = schedule_week(system, 'emp1', {0: 1})
+    assert result.assignments
+    assert not success
+    assert errors
+    assert assigned(system) == 0
+
+
+def test_pool_excludes_schedule_editors():
+    system = make_system()
+    system.users['lead'] = User('lead', role='manager')
+    system.users['legacy'] = User('legacy', is_admin=True)
+    scheduler, _ = plan_week(system, {0: 1})
+    assert scheduler.employees == ['emp1', 'emp2', 'emp3']
+
+
+def test_plan_respects_rest_after_previous_week():
+    system = make_system()
+    now = [datetime(2026, 10, 17, 12)]
+    system.clock = lambda: now[0]
+    system.initialize_shifts()
+    saturday = day_label(system.current_week.replace(day=17))
+    assert system.assign_shifts(ADMIN, [{'day': saturday, 'shift_index': 1, 'employee': 'emp1'}])[0]  # עד 23:00
+    now[0] = datetime(2026, 10, 18, 6)
+    assert system.roll_over_week()
+
+    system.min_rest_minutes = 10 * 60  # ראשון 08:00 - רק 9 שעות אחרי
+    scheduler, day_keys = plan_week(system, {0: 1}, ['emp1', 'emp2'])
+    assert scheduler.min_rest_minutes == 600
+    result, success, errors = schedule_week(system, ADMIN, {0: 1}, ['emp1', 'emp2'])
+    assert success, errors
+    sunday = min(day_keys)
+    assert result.assignments[(sunday, 0)] == ['emp2']
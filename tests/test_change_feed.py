@@ -0,0 +1,56 @@
+"""המשך זרם האירועים לפי Last-Event-ID, כולל מזהים מערוץ אחר"""
+import itertools
+
+import pytest
+
+import web_app
+from change_feed import ChangeFeed
+from shift_management_system import ShiftManagementSystem, User
+
+
+def test_resume_from_own_event_id():
+    feed = ChangeFeed()
+    first = feed.publish('schedule', {})
+    feed.publish('schedule', {'n': 2})
+    seq, missed = feed.resume(feed.event_id(first.seq))
+    assert (seq, missed) == (first.seq, False)
+    events, missed = feed.since(seq, 'emp')
+    assert [event.data for event in events] == [{'n': 2}]
+    assert not missed
+    assert feed.resume(None) == (feed.last_seq, False)
+
+
+def test_id_from_other_feed_or_future_is_missed():
+    old, feed = ChangeFeed(), ChangeFeed()  # למשל לפני ואחרי הפעלה מחדש
+    for _ in range(5):
+        old.publish('schedule', {})
+    feed.publish('schedule', {})
+    assert feed.resume(old.event_id(3)) == (feed.last_seq, True)
+    assert feed.resume(feed.event_id(feed.last_seq + 10)) == (feed.last_seq, True)
+    assert feed.resume('garbage') == (feed.last_seq, True)
+    # גם קריאה ישירה עם מספר שהערוץ עוד לא הגיע אליו לא ממתינה בשקט
+    assert feed.since(feed.last_seq + 10, 'emp') == ([], True)
+    events, seq, missed = feed.wait(feed.last_seq + 10, 'emp', timeout=5)
+    assert (events, seq, missed) == ([], feed.last_seq, True)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    system = ShiftManagementSystem()
+    system.users['emp'] = User('emp')
+    monkeypatch.setattr(web_app, 'system', system)
+    client = web_app.app.test_client()
+    with client.session_transaction() as session:
+        session['username'] = 'emp'
+    return client
+
+
+def test_events_stream_resets_client_from_other_feed(client):
+    other = ChangeFeed()
+    for _ in range(3):
+        other.publish('schedule', {})
+    feed = web_app.system.feed
+    response = client.get('/events', headers={'Last-Event-ID': other.event_id(3)})
+    chunks = list(itertools.islice(response.response, 2))
+    response.close()
+    assert chunks[1].decode() == f"id: {feed.event_id(feed.last_seq)}\nevent: reset\ndata: {{}}\n\n"
@@ -0,0 +1,131 @@
+"""התאוששות מקריסה במצב יומן: כל רשומה שנכתבה נשמרת, ואף רשומה לא מוחלת פעמיים"""
+import json
+import os
+
+import pytest
+
+import journal
+from journal import Journal
+from shift_management_system import ShiftManagementSystem, User
+
+ADMIN = 'boss'
+
+
+def new_system(path: str, compact_every: int = 1000) -> ShiftManagementSystem:
+    system = ShiftManagementSystem()
+    system.users[ADMIN] = User(ADMIN, role='admin')
+    system.users['emp'] = User('emp')
+    system.enable_journal(path, compact_every)
+    return system
+
+
+def restart(path: str) -> ShiftManagementSystem:
+    """תהליך חדש שטוען את תמונת המצב ואת זנב היומן"""
+    system = ShiftManagementSystem()
+    system.enable_journal(path)
+    return system
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'schedule.json')
+
+
+def first_day(system) -> str:
+    return next(iter(system.weekly_shifts))
+
+
+def test_mutations_are_replayed_after_restart(path):
+    system = new_system(path)
+    day = first_day(system)
+    assert system.add_user(ADMIN, 'newbie')
+    assert system.assign_shift(ADMIN, day, 0, 'emp')
+    assert system.create_appeal('emp', day, 0, 'סיבה')[0]
+
+    loaded = restart(path)
+    assert 'newbie' in loaded.users
+    assert 'emp' in loaded.weekly_shifts[day][0].employees
+    assert len(loaded.get_employee_appeals('emp')) == 1
+
+
+def test_truncated_last_record_is_skipped(path):
+    system = new_system(path)
+    day = first_day(system)
+    assert system.assign_shift(ADMIN, day, 0, 'emp')
+    with open(system.journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "add_user", "user": {"userna')  # קריסה באמצע כתיבה
+
+    loaded = restart(path)
+    assert 'emp' in loaded.weekly_shifts[day][0].employees
+    # רשומה אחרי השורה הקטועה לא נדבקת אליה
+    assert loaded.add_user(ADMIN, 'after')
+    assert 'after' in restart(path).users
+
+
+def test_crash_before_snapshot_rename_keeps_journal(path, monkeypatch):
+    system = new_system(path, compact_every=3)
+    assert system.add_user(ADMIN, 'a')
+    assert system.add_user(ADMIN, 'b')
+
+    def crash(target, content, fsync=False):
+        raise OSError('crash')
+    monkeypatch.setattr(journal, 'atomic_write', crash)
+    with pytest.raises(OSError):
+        system.add_user(ADMIN, 'c')  # הרשומה נכתבה, האיחוד קרס לפני החלפת תמונת המצב
+    monkeypatch.undo()
+
+    loaded = restart(path)
+    assert {'a', 'b', 'c'} <= set(loaded.users)
+
+
+def test_crash_between_snapshot_and_journal_header(path, monkeypatch):
+    system = new_system(path, compact_every=2)
+    assert system.add_user(ADMIN, 'a')
+
+    real_write = journal.atomic_write
+
+    def crash_on_journal(target, content, fsync=False):
+        if target.endswith('.journal'):
+            raise OSError('crash')
+        real_write(target, content, fsync)
+    monkeypatch.setattr(journal, 'atomic_write', crash_on_journal)
+    with pytest.raises(OSError):
+        system.add_user(ADMIN, 'b')  # תמונת המצב מהדור החדש כבר במקומה, הכותרת עוד מהדור הקודם
+    monkeypatch.undo()
+
+    # האתחול הראשון: הרשומות הישנות כבר בתמונת המצב ולא מוחלות שוב
+    loaded = restart(path)
+    assert {'a', 'b'} <= set(loaded.users)
+    assert Journal.read_generation(loaded.journal.path) == loaded.journal_generation
+    assert loaded.add_user(ADMIN, 'after_crash')
+
+    # האתחול השני: מה שנוסף אחרי הקריסה לא הולך לאיבוד
+    reloaded = restart(path)
+    assert {'a', 'b', 'after_crash'} <= set(reloaded.users)
+
+
+def test_missing_journal_is_recreated(path):
+    system = new_system(path)
+    assert system.add_user(ADMIN, 'a')
+    system.compact_journal()
+    os.remove(system.journal.path)
+
+    loaded = restart(path)
+    assert 'a' in loaded.users
+    assert loaded.add_user(ADMIN, 'b')
+    with open(loaded.journal.path, encoding='utf-8') as f:
+        assert json.loads(f.readline()) == {'op': 'header', 'generation': loaded.journal_generation}
+    assert {'a', 'b'} <= set(restart(path).users)
+
+
+def test_compaction_does_not_apply_records_twice(path):
+    system = new_system(path, compact_every=2)
+    day = first_day(system)
+    assert system.assign_shift(ADMIN, day, 0, 'emp')
+    assert system.create_appeal('emp', day, 0, 'סיבה')[0]  # איחוד
+    assert system.add_user(ADMIN, 'c')
+
+    loaded = restart(path)
+    assert loaded.weekly_shifts[day][0].employees.count('emp') == 1
+    assert len(loaded.get_employee_appeals('emp')) == 1
+    assert 'c' in loaded.users
@@ -0,0 +1,111 @@
+"""תחזוקת רקע עם שעון מזויף: מעבר שבוע, מרווחי גיבוי וסבב שמירת הגיבויים"""
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from israel_calendar import day_label
+from maintenance import Maintenance, RetentionPolicy, list_backups, prune_backups, read_backup, write_backup
+from shift_management_system import ShiftManagementSystem, User
+
+ADMIN = 'boss'
+SATURDAY = date(2026, 10, 17)
+SUNDAY = date(2026, 10, 18)
+
+
+class FakeClock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **delta):
+        self.now += timedelta(**delta)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(datetime(2026, 10, 17, 23, 30))
+
+
+@pytest.fixture
+def system(clock):
+    system = ShiftManagementSystem()
+    system.clock = clock
+    system.initialize_shifts()
+    system.users[ADMIN] = User(ADMIN, role='admin')
+    system.users['emp'] = User('emp')
+    return system
+
+
+def assign(system, day: date):
+    success, errors = system.assign_shifts(ADMIN, [{'day': day_label(day), 'shift_index': 0, 'employee': 'emp'}])
+    assert success, errors
+
+
+def test_week_rolls_over_at_sunday_midnight(system, clock):
+    maintenance = Maintenance(lambda: [('', system)])
+    assign(system, SATURDAY)
+    assert maintenance.run_pending()['rolled_over'] == []
+    clock.advance(minutes=26)
+    assert maintenance.seconds_until_due() == 4 * 60
+
+    clock.advance(minutes=4)
+    assert maintenance.run_pending()['rolled_over'] == ['']
+    assert system.current_week == SUNDAY
+    assert 'emp' in system.shifts_history[SATURDAY][0].employees
+    assert day_label(SATURDAY) not in system.weekly_shifts
+    assert day_label(SUNDAY) in system.weekly_shifts
+
+    clock.advance(hours=1)
+    assert maintenance.run_pending()['rolled_over'] == []
+
+
+def test_backups_follow_interval_and_skip_unchanged_state(system, clock, tmp_path):
+    directory = str(tmp_path)
+    maintenance = Maintenance(lambda: [('', system)], backup_dir=directory, backup_interval=3600)
+    assert len(maintenance.run_pending()['backups']) == 1  # אין גיבויים - מגבים מיד
+
+    clock.advance(minutes=30)
+    assign(system, SATURDAY)
+    assert maintenance.run_pending()['backups'] == []  # עוד לא עברה שעה
+
+    clock.advance(minutes=31)
+    assert len(maintenance.run_pending()['backups']) == 1
+
+    # הפעלה מחדש ממשיכה מהגיבוי האחרון בדיסק ולא מגבה מיד
+    restarted = Maintenance(lambda: [('', system)], backup_dir=directory, backup_interval=3600)
+    clock.advance(minutes=10)
+    assign(system, SUNDAY)
+    assert restarted.run_pending()['backups'] == []
+    clock.advance(minutes=50)
+    assert len(restarted.run_pending()['backups']) == 1
+
+    clock.advance(hours=1)
+    assert restarted.run_pending()['backups'] == []  # שום דבר לא השתנה
+    assert len(list_backups(directory)) == 3
+
+
+def test_retention_keeps_newest_per_hour_day_and_week(tmp_path):
+    stamps = [datetime(2026, 9, 20, 12), datetime(2026, 10, 1, 12),
+              datetime(2026, 10, 12, 9), datetime(2026, 10, 12, 10),
+              datetime(2026, 10, 13, 8), datetime(2026, 10, 13, 9),
+              datetime(2026, 10, 13, 9, 30), datetime(2026, 10, 13, 10)]
+    policy = RetentionPolicy(hourly=2, daily=2, weekly=2)
+    expected = {datetime(2026, 10, 13, 10), datetime(2026, 10, 13, 9, 30),  # שעתי
+                datetime(2026, 10, 12, 10),  # יומי
+                datetime(2026, 10, 1, 12)}  # שבועי
+    assert policy.keep(stamps) == expected
+
+    directory = str(tmp_path)
+    for number, stamp in enumerate(stamps):
+        write_backup(directory, {'value': number, 'history': {stamp.date().isoformat(): [number]}}, stamp)
+    assert prune_backups(directory, policy) == len(stamps) - len(expected)
+
+    backups = list_backups(directory)
+    assert {stamp for stamp, _ in backups} == expected
+    for stamp, path in backups:
+        assert read_backup(path)['value'] == stamps.index(stamp)
+    # קטעים שאף גיבוי שנשאר לא משתמש בהם נמחקו
+    assert len(os.listdir(tmp_path / 'chunks')) == 2 * len(expected)
@@ -0,0 +1,89 @@
+"""SQLiteStorage: מאגר משותף לכמה מערכות (workers) על אותו קובץ"""
+import pytest
+
+from israel_calendar import day_label
+from shift_management_system import Shift, ShiftManagementSystem, User
+from storage import SQLiteStorage
+
+ADMIN = 'boss'
+
+
+@pytest.fixture
+def database(tmp_path):
+    return str(tmp_path / 'schedule.db')
+
+
+def worker(database: str) -> ShiftManagementSystem:
+    """מערכת של worker: במאגר ריק המצב ההתחלתי נכתב אליו, אחרת נטען ממנו"""
+    system = ShiftManagementSystem()
+    system.users[ADMIN] = User(ADMIN, role='admin')
+    system.users['emp'] = User('emp', team='bar')
+    system.attach_storage(SQLiteStorage(database))
+    return system
+
+
+def test_other_worker_sees_changes_after_refresh(database):
+    first, second = worker(database), worker(database)
+    day = day_label(first.current_week)
+    assert not second.storage.has_changed()
+    version = second.version
+    second.refresh()
+    assert second.version == version  # אין שינוי - אין טעינה
+
+    assert first.assign_shifts(ADMIN, [{'day': day, 'shift_index': 0, 'employee': 'emp'}])[0]
+    assert second.weekly_shifts[day][0].employees == []
+    second.refresh()
+    assert second.weekly_shifts[day][0].employees == ['emp']
+    assert second.version > version
+    assert first.storage.shifts_between(first.current_week, first.current_week)[first.current_week][0][
+        'employees'] == ['emp']
+
+
+def test_ensure_shifts_is_idempotent(database):
+    system = worker(database)
+    day = day_label(system.current_week)
+    before = system.storage.shifts_between(system.current_week, system.current_week)
+    assert system.assign_shifts(ADMIN, [{'day': day, 'shift_index': 0, 'employee': 'emp'}])[0]
+
+    # יצירה חוזרת מהתבנית (למשל worker אחר שעלה) לא מוחקת שיבוצים ולא מכפילה משמרות
+    template = [Shift.from_minutes(shift.start_minutes, shift.end_minutes, []) for shift in system.weekly_shifts[day]]
+    system.storage.ensure_shifts(day, template)
+    system.storage.ensure_shifts(day, template)
+    after = system.storage.shifts_between(system.current_week, system.current_week)[system.current_week]
+    assert len(after) == len(before[system.current_week])
+    assert after[0]['employees'] == ['emp']
+
+
+def test_appeals_round_trip(database):
+    system = worker(database)
+    day = day_label(system.current_week)
+    assert system.assign_shifts(ADMIN, [{'day': day, 'shift_index': 0, 'employee': 'emp'}])[0]
+    assert system.create_appeal('emp', day, 0, "מחלה")[0]
+    appeal = system.appeals.for_slot('emp', day, 0)[-1]
+    assert system.handle_appeal(ADMIN, appeal.appeal_id, 'rejected', "אין מחליף")
+
+    loaded = worker(database).appeals.get(appeal.appeal_id)
+    assert loaded.to_dict() == appeal.to_dict()
+    assert (loaded.employee, loaded.day, loaded.reason, loaded.status, loaded.admin_response) == \
+        ('emp', day, "מחלה", 'rejected', "אין מחליף")
+
+    # מזהי ערעורים מוקצים במאגר, כך ש-worker אחר לא מקבל מזהה תפוס
+    other = worker(database)
+    assert other.create_appeal('emp', day, 0, "שוב")[0]
+    assert other.appeals.for_slot('emp', day, 0)[-1].appeal_id > appeal.appeal_id
+
+
+def test_add_user_and_set_password(database):
+    first, second = worker(database), worker(database)
+    assert first.add_user(ADMIN, 'newbie')
+    assert first.set_password(ADMIN, 'newbie', 'secret-1')[0]
+
+    stored = second.storage.get_user('newbie')
+    assert stored is not None and stored.password == first.users['newbie'].password
+    assert second.authenticate('newbie', 'secret-1') is not None  # נקרא מהמאגר בלי refresh
+    assert second.authenticate('newbie', 'wrong') is None
+
+    assert second.set_password('newbie', 'newbie', 'secret-2')[0]
+    first.refresh()
+    assert first.authenticate('newbie', 'secret-2') is not None
+    assert first.authenticate('newbie', 'secret-1') is None
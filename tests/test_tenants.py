@@ -0,0 +1,51 @@
+"""אתר ששוחרר מהזיכרון ונטען מחדש לא מקבל תשובות ישנות ממטמון התשובות"""
+import json
+
+from http_cache import VersionedResponseCache
+from shift_management_system import ShiftManagementSystem, User
+from storage import SQLiteStorage
+from tenants import TenantRegistry
+
+ADMIN = 'boss'
+
+
+def load_site(database_path: str) -> ShiftManagementSystem:
+    system = ShiftManagementSystem()
+    system.users[ADMIN] = User(ADMIN, role='admin')
+    system.users['emp'] = User('emp')
+    system.attach_storage(SQLiteStorage(database_path))
+    return system
+
+
+def test_versions_are_unique_across_instances():
+    first, second = ShiftManagementSystem(), ShiftManagementSystem()
+    assert first.version != second.version
+    before = first.version
+    first.archive_current_week()
+    assert first.version > before
+
+
+def test_reloaded_tenant_does_not_serve_stale_cached_response(tmp_path):
+    registry = TenantRegistry(str(tmp_path), load_site, max_resident=1)
+    registry.add('north', 'North')
+    registry.add('south', 'South')
+    cache = VersionedResponseCache()
+
+    def cached_week(system):
+        key = ('week', system.tenant_id)
+        return cache.get(key, system.version, lambda: system.get_weekly_schedule(0))
+
+    system = registry.get('north')
+    day = next(iter(system.weekly_shifts))
+    stale = cached_week(system)
+    success, errors = system.assign_shifts(ADMIN, [{'day': day, 'shift_index': 0, 'employee': 'emp'}])
+    assert success, errors
+
+    registry.get('south')  # max_resident=1 - north משתחרר
+    assert not registry.is_resident('north')
+    reloaded = registry.get('north')
+    assert reloaded is not system
+
+    fresh = cached_week(reloaded)
+    assert fresh.etag != stale.etag
+    assert 'emp' in json.loads(fresh.body)[day][0]['employees']
@@ -0,0 +1,44 @@
+"""תשובות ה-API לפי ההרשאה של המשתמש המחובר"""
+import json
+
+import pytest
+
+import web_app
+from israel_calendar import day_label
+from shift_management_system import ShiftManagementSystem, User
+
+ADMIN = 'boss'
+
+
+@pytest.fixture
+def system(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # create_appeal בלי יומן שומר ל-schedule.json
+    system = ShiftManagementSystem()
+    system.users[ADMIN] = User(ADMIN, role='admin')
+    system.users['lead'] = User('lead', role='manager', scope={'teams': ['kitchen']})
+    system.users['cook'] = User('cook', team='kitchen')
+    system.users['waiter'] = User('waiter', team='bar')
+    day = day_label(system.current_week)
+    for employee in ('cook', 'waiter'):
+        assert system.assign_shifts(ADMIN, [{'day': day, 'shift_index': 0, 'employee': employee}])[0]
+        assert system.create_appeal(employee, day, 0, "סיבה")[0]
+    monkeypatch.setattr(web_app, 'system', system)
+    return system
+
+
+def appeal_employees(entry) -> list:
+    return [appeal['employee'] for appeal in json.loads(entry.body)['appeals']]
+
+
+def test_scoped_manager_sees_only_appeals_in_scope(system):
+    assert appeal_employees(web_app.appeals_body(ADMIN, system.grant(ADMIN))) == ['cook', 'waiter']
+    scoped = web_app.appeals_body('lead', system.grant('lead'))
+    assert appeal_employees(scoped) == ['cook']
+    # המטמון לא מחזיר למנהל המוגבל את הרשימה המלאה ולהפך
+    assert appeal_employees(web_app.appeals_body(ADMIN, system.grant(ADMIN))) == ['cook', 'waiter']
+    assert web_app.appeals_body('lead', system.grant('lead')).etag == scoped.etag
+
+
+def test_employee_sees_own_appeals(system):
+    assert appeal_employees(web_app.appeals_body('waiter', system.grant('waiter'))) == ['waiter']
+    assert appeal_employees(web_app.appeals_body('waiter')) == ['waiter']
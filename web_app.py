@@ -1,16 +1,36 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session, flash
+from flask import (Flask, Response, render_template, request, redirect, url_for, jsonify, session,
+                   flash, send_file, g)
 from shift_management_system import ShiftManagementSystem, User
+from pdf_generator import render_schedule_pdf
+from storage import SQLiteStorage
+from http_cache import VersionedResponseCache
+from auto_scheduler import plan_week, apply_week
+from instrumentation import metrics, SamplingProfiler, start_queue_logging
+from tenants import TenantRegistry
+from reports import iter_csv
+from maintenance import Maintenance, RetentionPolicy
+from auth import LoginRateLimiter
+from authorization import NO_GRANT, Grant, Permission
+from employee_search import SORT_KEYS, paginate
+from contextvars import ContextVar
+from werkzeug.local import LocalProxy
+from datetime import date, timedelta
+from functools import wraps
+from typing import Optional
 import secrets
+import base64
+import binascii
+import hmac
+import math
 import os
 import json
 import logging
+import threading
+import time as timer
 import traceback
 
-# הגדרת לוגים מפורטים יותר
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# לוגים דרך תור: הכתיבה עצמה מתבצעת ב-thread נפרד ולא בזמן הבקשה
+log_listener = start_queue_logging(getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), logging.INFO))
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -20,53 +40,62 @@ app.secret_key = os.getenv('SECRET_KEY', secrets.token_hex(16))
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
 ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
 
-def init_system():
+# הגבלת ניסיונות התחברות: כישלונות לשם משתמש בחלון הזמן (לכתובת IP - פי 4)
+LOGIN_MAX_FAILURES = int(os.getenv('LOGIN_MAX_FAILURES', 5))
+LOGIN_FAILURE_WINDOW = float(os.getenv('LOGIN_FAILURE_WINDOW', 300))
+
+# כמה שבועות אחורה עובד יכול לדפדף בלוח האישי
+MAX_HISTORY_WEEKS = 52
+
+# פרופיל דגימה לבקשה בודדת (?profile=1, מנהל בלבד) - רק אם הופעל במפורש
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED') == '1'
+# אם מוגדר, /metrics דורש Authorization: Bearer <token>
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# נתיב למאגר SQLite משותף לכל ה-workers (אם לא מוגדר - מצב בזיכרון בלבד)
+DATABASE_PATH = os.getenv('DATABASE_PATH')
+
+# מצב ריבוי אתרים: תיקייה עם מאגר לכל אתר (ראו tenants.py); האתר נבחר לפי תת-הדומיין
+TENANTS_DIR = os.getenv('TENANTS_DIR')
+DEFAULT_TENANT = os.getenv('DEFAULT_TENANT')
+MAX_RESIDENT_TENANTS = int(os.getenv('MAX_RESIDENT_TENANTS', 100))
+TENANT_IDLE_TIMEOUT = float(os.getenv('TENANT_IDLE_TIMEOUT', 600))
+# שם האתר בכותרות כשאין לאתר שם משלו
+SITE_TITLE = os.getenv('SITE_TITLE', 'Shkedia')
+
+# תחזוקת רקע (ראו maintenance.py): מעבר שבוע תמיד; גיבויים רק אם BACKUP_DIR מוגדר
+MAINTENANCE_ENABLED = os.getenv('MAINTENANCE_ENABLED', '1') == '1'
+BACKUP_DIR = os.getenv('BACKUP_DIR')
+BACKUP_INTERVAL = float(os.getenv('BACKUP_INTERVAL', 3600))
+BACKUP_RETENTION = RetentionPolicy(int(os.getenv('BACKUP_KEEP_HOURLY', 24)),
+                                   int(os.getenv('BACKUP_KEEP_DAILY', 7)),
+                                   int(os.getenv('BACKUP_KEEP_WEEKLY', 8)))
+
+def init_system(database_path=DATABASE_PATH):
     """אתחול המערכת עם משתמש מנהל ומשמרות ברירת מחדל"""
     try:
         system = ShiftManagementSystem()
         
         # יצירת משתמש מנהל
+        # סיסמת המנהל נבדקת מול משתנה הסביבה ואינה נשמרת בנתונים
         admin_user = User(
             username=ADMIN_USERNAME,
-            password=ADMIN_PASSWORD,
+            password=None,
             first_name='מנהל',
             last_name='ראשי',
             is_admin=True
         )
         system.users[ADMIN_USERNAME] = admin_user
         
-        # יצירת לוח משמרות ברירת מחדל
-        system.weekly_shifts = {
-            'ראשון': [
-                {'start_time': '07:00', 'end_time': '15:00', 'employees': []},
-                {'start_time': '15:00', 'end_time': '23:00', 'employees': []}
-            ],
-            'שני': [
-                {'start_time': '07:00', 'end_time': '15:00', 'employees': []},
-                {'start_time': '15:00', 'end_time': '23:00', 'employees': []}
-            ],
-            'שלישי': [
-                {'start_time': '07:00', 'end_time': '15:00', 'employees': []},
-                {'start_time': '15:00', 'end_time': '23:00', 'employees': []}
-            ],
-            'רביעי': [
-                {'start_time': '07:00', 'end_time': '15:00', 'employees': []},
-                {'start_time': '15:00', 'end_time': '23:00', 'employees': []}
-            ],
-            'חמישי': [
-                {'start_time': '07:00', 'end_time': '15:00', 'employees': []},
-                {'start_time': '15:00', 'end_time': '23:00', 'employees': []}
-            ],
-            'שישי': [
-                {'start_time': '07:00', 'end_time': '15:00', 'employees': []},
-                {'start_time': '15:00', 'end_time': '23:00', 'employees': []}
-            ],
-            'שבת': [
-                {'start_time': '07:00', 'end_time': '15:00', 'employees': []},
-                {'start_time': '15:00', 'end_time': '23:00', 'employees': []}
-            ]
-        }
+        if database_path:
+            system.attach_storage(SQLiteStorage(database_path))
+            if ADMIN_USERNAME not in system.users:
+                system.users[ADMIN_USERNAME] = admin_user
+                system.storage.apply({'op': 'add_user', 'user': admin_user.to_dict()})
+            logger.info(f"System initialized with SQLite storage at {database_path}")
+            return system
         
+        # משמרות השבוע נוצרות מתוכנית המשמרות של המערכת (ראו shift_templates.py)
         logger.info("System initialized successfully")
         return system
     except Exception as e:
@@ -74,28 +103,236 @@ def init_system():
         logger.error(traceback.format_exc())
         raise
 
-# אתחול המערכת בתחילת הריצה
-try:
-    system = init_system()
-    logger.info("System initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize system: {str(e)}")
-    logger.error(traceback.format_exc())
-    system = None
+# המערכת של הבקשה הנוכחית במצב ריבוי אתרים (נקבעת ב-select_tenant או ב-asgi)
+current_system = ContextVar('current_system', default=None)
+
+if TENANTS_DIR:
+    tenants = TenantRegistry(TENANTS_DIR, init_system, MAX_RESIDENT_TENANTS, TENANT_IDLE_TIMEOUT)
+    system = LocalProxy(current_system)
+    logger.info(f"Multi-site mode: {len(tenants.tenants)} sites in {TENANTS_DIR}")
+else:
+    tenants = None
+    # אתחול המערכת בתחילת הריצה
+    try:
+        system = init_system()
+        logger.info("System initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize system: {str(e)}")
+        logger.error(traceback.format_exc())
+        system = None
+
+def maintained_systems() -> list:
+    """המערכות לתחזוקת הרקע: המערכת היחידה, או האתרים הטעונים כרגע"""
+    if tenants is not None:
+        return tenants.resident_systems()
+    return [('', system)] if system is not None else []
+
+maintenance = Maintenance(maintained_systems, BACKUP_DIR, BACKUP_INTERVAL, BACKUP_RETENTION)
+if MAINTENANCE_ENABLED:
+    maintenance.start()
+
+def system_for_host(host: str):
+    """המערכת שמשרתת את הבקשה לפי ה-Host (במצב אתר יחיד - המערכת היחידה)"""
+    if tenants is None:
+        return system
+    tenant_id = tenants.tenant_from_host(host, DEFAULT_TENANT)
+    return tenants.get(tenant_id) if tenant_id is not None else None
+
+def site_title() -> str:
+    return system.site_title or SITE_TITLE
+
+@app.before_request
+def start_request_timer():
+    g.request_start = timer.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """זמן הטיפול ומונה בקשות לפי נתיב; החלפת התשובה בפרופיל אם התבקש"""
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    start = g.get('request_start')
+    if start is not None:
+        metrics.observe('http_request_duration_seconds', timer.perf_counter() - start,
+                        route=route, method=request.method)
+    metrics.inc('http_requests_total', route=route, method=request.method, status=str(response.status_code))
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        response = Response(profiler.collapsed(), mimetype='text/plain')
+        response.headers['X-Profile-Samples'] = str(sum(profiler.samples.values()))
+        response.headers['X-Profile-Duration-Ms'] = f"{(timer.perf_counter() - g.profile_start) * 1000:.1f}"
+    return response
+
+def collect_system_metrics():
+    """מדדים שכבר נספרים במערכת, נאספים רק בזמן הייצוא"""
+    if tenants is not None:
+        # במצב ריבוי אתרים - מדדי הטעינה והשחרור ולא של אתר בודד
+        stats = tenants.stats()
+        yield 'tenants_registered', 'gauge', {}, stats['tenants']
+        yield 'tenants_resident', 'gauge', {}, stats['resident']
+        yield 'tenant_loads_total', 'counter', {}, stats['loads']
+        yield 'tenant_evictions_total', 'counter', {}, stats['evictions']
+        yield 'api_response_cache_hits_total', 'counter', {}, api_cache.hits
+        yield 'api_response_cache_misses_total', 'counter', {}, api_cache.misses
+        return
+    if system is None:
+        return
+    cache = system.view_cache.stats()
+    for name in ('hits', 'misses', 'evictions', 'invalidations'):
+        yield f'schedule_view_cache_{name}_total', 'counter', {}, cache[name]
+    yield 'schedule_view_cache_entries', 'gauge', {}, cache['size']
+    yield 'api_response_cache_hits_total', 'counter', {}, api_cache.hits
+    yield 'api_response_cache_misses_total', 'counter', {}, api_cache.misses
+    yield 'shift_system_state_version', 'gauge', {}, system.version
+    yield 'shift_system_users', 'gauge', {}, len(system.users)
+    yield 'shift_system_appeals', 'gauge', {}, len(system.appeals)
+    yield 'change_feed_last_seq', 'gauge', {}, system.feed.last_seq
+
+metrics.register_collector(collect_system_metrics)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """מדדים בפורמט Prometheus"""
+    if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return Response('unauthorized\n', status=401, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.before_request
+def select_tenant():
+    """בחירת האתר לפי תת-הדומיין; סשן של אתר אחר אינו תקף כאן"""
+    if tenants is None:
+        return
+    current_system.set(None)  # לא להשאיר את האתר של בקשה קודמת באותו thread
+    if request.path == '/metrics':
+        return
+    tenant_id = tenants.tenant_from_host(request.host, DEFAULT_TENANT)
+    if tenant_id is None:
+        return Response('unknown site\n', status=404, mimetype='text/plain')
+    if session.get('tenant', tenant_id) != tenant_id:
+        session.clear()
+    current_system.set(tenants.get(tenant_id))
+
+@app.before_request
+def refresh_system():
+    """סנכרון עם המאגר המשותף לפני כל בקשה"""
+    target = system if tenants is None else current_system.get()
+    if target is not None:
+        target.refresh()
+
+user_login_limiter = LoginRateLimiter(LOGIN_MAX_FAILURES, LOGIN_FAILURE_WINDOW)
+ip_login_limiter = LoginRateLimiter(LOGIN_MAX_FAILURES * 4, LOGIN_FAILURE_WINDOW)
+
+def check_credentials(target, username: str, password: str, client: str) -> tuple:
+    """אימות משתמש עם הגבלת ניסיונות: (פרטי סשן או None, שניות המתנה אם נחסם)
+
+    משותף לטופס ההתחברות, ל-HTTP Basic ולמצב ASGI. המנהל מ-ADMIN_USERNAME/
+    ADMIN_PASSWORD מתקבל תמיד (כניסה ראשונה למערכת חדשה); כל השאר נבדקים
+    מול הסיסמאות המגובבות במערכת.
+    """
+    user_key = f"{target.tenant_id or ''}:{username.lower()}"
+    wait = max(user_login_limiter.retry_after(user_key), ip_login_limiter.retry_after(client))
+    if wait:
+        return None, wait
+    if username == ADMIN_USERNAME and hmac.compare_digest(password.encode('utf-8'),
+                                                          ADMIN_PASSWORD.encode('utf-8')):
+        identity = {'username': ADMIN_USERNAME, 'is_admin': True}
+    else:
+        user = target.authenticate(username, password)
+        identity = {'username': user.username, 'is_admin': bool(user.is_admin)} if user is not None else None
+    if identity is None:
+        user_login_limiter.failure(user_key)
+        ip_login_limiter.failure(client)
+        return None, 0.0
+    user_login_limiter.success(user_key)
+    if target.tenant_id is not None:
+        identity['tenant'] = target.tenant_id
+    return identity, 0.0
+
+def basic_credentials(header: str) -> tuple:
+    """(משתמש, סיסמה) מכותרת Authorization: Basic, או (None, None)"""
+    scheme, _, value = (header or '').partition(' ')
+    if scheme.lower() != 'basic':
+        return None, None
+    try:
+        username, separator, password = base64.b64decode(value.strip()).decode('utf-8').partition(':')
+    except (binascii.Error, UnicodeDecodeError):
+        return None, None
+    return (username, password) if separator else (None, None)
+
+@app.before_request
+def basic_auth():
+    """לקוחות API בלי עוגייה: Authorization: Basic לכל בקשה, בלי ליצור סשן
+
+    בדיקת הגיבוב היקרה רצה רק פעם אחת; בקשות הבאות נענות ממטמון האימותים.
+    """
+    if 'username' in session or not system or 'Authorization' not in request.headers:
+        return
+    username, password = basic_credentials(request.headers['Authorization'])
+    if username is None:
+        return
+    identity, wait = check_credentials(system, username, password, request.remote_addr or '')
+    if wait:
+        return _api_error('יותר מדי ניסיונות התחברות', 429)
+    if identity is None:
+        response = jsonify({'error': 'שם משתמש או סיסמה שגויים'})
+        response.headers['WWW-Authenticate'] = 'Basic realm="shifts"'
+        return response, 401
+    session.update(identity)
+    session.modified = False  # הזהות תקפה לבקשה הזו בלבד - בלי עוגיית סשן בתשובה
+
+@app.before_request
+def start_profiler():
+    """פרופיל דגימה לבקשה (?profile=1) - אחרי בחירת האתר והאימות, כדי לבדוק הרשאה"""
+    if PROFILING_ENABLED and request.args.get('profile') == '1' and current_grant().has(Permission.ADMIN):
+        g.profile_start = g.request_start
+        g.profiler = SamplingProfiler(threading.get_ident()).start()
+
+def current_grant() -> Grant:
+    """ההרשאה של המשתמש המחובר, מחושבת פעם אחת לבקשה
+
+    נלקחת מהמערכת ולא מהסשן, כך ששינוי תפקיד או ביטול הרשאה חלים מיד
+    גם על סשנים פתוחים.
+    """
+    grant = g.get('grant')
+    if grant is None:
+        if 'username' not in session or not system:
+            return NO_GRANT
+        grant = g.grant = system.grant(session['username'])
+    return grant
+
+def permission_required(permission: int = Permission.VIEW_SCHEDULE):
+    """דקורטור לנתיבי API: 401 בלי התחברות, 500 בלי מערכת, 403 בלי ההרשאה"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if 'username' not in session:
+                return _api_error('נדרשת התחברות', 401)
+            if not system:
+                return _api_error('המערכת לא אותחלה', 500)
+            if not current_grant().has(permission):
+                return _api_error('אין הרשאה', 403)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     try:
         if request.method == 'POST':
-            username = request.form.get('username')
-            password = request.form.get('password')
+            username = (request.form.get('username') or '').strip()
+            password = request.form.get('password') or ''
             
             logger.info(f"Login attempt for user: {username}")
             
-            if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
-                session['username'] = username
-                session['is_admin'] = True
-                logger.info("Admin login successful")
+            identity, wait = check_credentials(system, username, password, request.remote_addr or '')
+            if wait:
+                logger.warning(f"Login rate limited for user: {username}")
+                flash(f'יותר מדי ניסיונות התחברות. נסו שוב בעוד {math.ceil(wait / 60)} דקות', 'error')
+                return render_template('login.html'), 429
+            if identity is not None:
+                session.clear()
+                session.update(identity)
+                logger.info(f"Login successful for user: {username}")
                 return redirect(url_for('index'))
             
             logger.warning(f"Failed login attempt for user: {username}")
@@ -112,7 +349,7 @@ def login():
 def index():
     try:
         if 'username' not in session:
-            logger.info("No user in session, redirecting to login")
+            logger.debug("No user in session, redirecting to login")
             return redirect(url_for('login'))
         
         if not system:
@@ -120,13 +357,10 @@ def index():
             flash('אירעה שגיאה במערכת', 'error')
             return redirect(url_for('login'))
         
-        username = session.get('username')
-        is_admin = session.get('is_admin', False)
-        
-        if username == ADMIN_USERNAME and is_admin:
+        if current_grant().has(Permission.EDIT_SCHEDULE):
             try:
                 schedule = system.weekly_shifts
-                logger.info("Successfully got weekly schedule")
+                logger.debug("Successfully got weekly schedule")
                 return render_template('index.html', 
                                     schedule=schedule,
                                     system=system)
@@ -146,6 +380,413 @@ def index():
         flash('אירעה שגיאה במערכת', 'error')
         return redirect(url_for('login'))
 
+def _batch_shifts(operation):
+    """הרצת פעולה מרוכזת על משמרות מבקשת JSON"""
+    if not system:
+        return jsonify({'success': False, 'errors': [{'index': None, 'error': 'המערכת לא אותחלה'}]}), 500
+    if not current_grant().has(Permission.EDIT_SCHEDULE):
+        return jsonify({'success': False, 'errors': [{'index': None, 'error': 'אין הרשאה'}]}), 403
+    
+    data = request.get_json(silent=True) or {}
+    items = data.get('assignments')
+    if not isinstance(items, list):
+        return jsonify({'success': False, 'errors': [{'index': None, 'error': 'חסרה רשימת assignments'}]}), 400
+    
+    success, errors = operation(session['username'], items)
+    logger.info(f"Batch {operation.__name__}: {len(items)} items, success={success}")
+    return jsonify({'success': success, 'errors': errors}), 200 if success else 400
+
+@app.route('/assign_shifts', methods=['POST'])
+def assign_shifts():
+    return _batch_shifts(system.assign_shifts)
+
+@app.route('/remove_from_shifts', methods=['POST'])
+def remove_from_shifts():
+    return _batch_shifts(system.remove_from_shifts)
+
+# אילוצים שניתן להעביר לשיבוץ האוטומטי מבקשת JSON
+AUTO_SCHEDULE_CONSTRAINTS = ('max_hours_per_week', 'min_rest_hours', 'time_limit')
+
+def plan_auto_schedule(data: dict):
+    """בניית בעיית השיבוץ האוטומטי מבקשת JSON: {"requirements": {"0": 2, ...}, ...}"""
+    requirements = {int(index): int(count) for index, count in (data.get('requirements') or {}).items()}
+    constraints = {name: float(data[name]) for name in AUTO_SCHEDULE_CONSTRAINTS if name in data}
+    constraints['time_limit'] = min(constraints.get('time_limit', 5.0), 30.0)
+    return plan_week(system, requirements, data.get('employees'), **constraints)
+
+def auto_schedule_payload(result, success: bool, errors: list) -> dict:
+    return {
+        'success': success,
+        'errors': errors,
+        'unfilled': [{'day': day.isoformat(), 'shift_index': index, 'missing': missing}
+                     for (day, index), missing in result.unfilled.items()],
+        'hours': result.hours,
+        'moves': result.moves,
+    }
+
+@app.route('/api/schedule/auto', methods=['POST'])
+@permission_required(Permission.EDIT_SCHEDULE)
+def auto_schedule():
+    """שיבוץ אוטומטי של השבוע הנוכחי (מנהל בלבד)"""
+    try:
+        scheduler, day_keys = plan_auto_schedule(request.get_json(silent=True) or {})
+    except (TypeError, ValueError, AttributeError):
+        return _api_error('בקשה לא תקינה', 400)
+    result = scheduler.solve()
+    success, errors = apply_week(system, session['username'], scheduler, day_keys, result)
+    logger.info(f"Auto schedule: success={success}, moves={result.moves}")
+    return jsonify(auto_schedule_payload(result, success, errors)), 200 if success else 409
+
+def user_schedule_for_pdf(username: str, view_type: str, week_offset: int) -> tuple:
+    """הלוח והכותרת עבור PDF אישי (שבועי או חודשי)"""
+    if view_type == 'month':
+        return (system.get_monthly_schedule(week_offset // 4, employee=username),
+                f"Monthly Schedule - {site_title()}")
+    return system.get_weekly_schedule(week_offset, employee=username), f"Weekly Schedule - {site_title()}"
+
+@app.route('/my_schedule')
+def user_schedule():
+    """לוח המשמרות האישי של העובד (שבועי או חודשי)"""
+    if 'username' not in session:
+        return redirect(url_for('login'))
+    if not system:
+        flash('אירעה שגיאה במערכת', 'error')
+        return redirect(url_for('login'))
+    view_type = 'month' if request.args.get('view') == 'month' else 'week'
+    week_offset = max(0, request.args.get('week_offset', 0, type=int))
+    username = session['username']
+    schedule, _ = user_schedule_for_pdf(username, view_type, week_offset)
+    now = system.get_israel_time()
+    return render_template('user_schedule.html', system=system, username=username,
+                           user_schedule=schedule, view_type=view_type,
+                           current_week_offset=week_offset, max_history_weeks=MAX_HISTORY_WEEKS,
+                           current_date=now.strftime('%d/%m/%Y'), current_time=now.strftime('%H:%M'))
+
+@app.route('/appeals', methods=['POST'])
+def create_appeal():
+    """הגשת ערעור על משמרת מהלוח האישי"""
+    if 'username' not in session:
+        return redirect(url_for('login'))
+    if not system:
+        flash('אירעה שגיאה במערכת', 'error')
+        return redirect(url_for('login'))
+    success, message = system.create_appeal(session['username'], request.form.get('day', ''),
+                                            request.form.get('shift_index', -1, type=int),
+                                            request.form.get('reason', ''))
+    flash(message, 'success' if success else 'error')
+    return redirect(request.referrer or url_for('user_schedule'))
+
+@app.route('/download_user_schedule')
+def download_user_schedule():
+    """הורדת לוח המשמרות האישי כ-PDF, ישירות מהזיכרון"""
+    try:
+        if 'username' not in session:
+            return redirect(url_for('login'))
+        if not system:
+            flash('אירעה שגיאה במערכת', 'error')
+            return redirect(url_for('login'))
+        
+        username = session['username']
+        schedule, title = user_schedule_for_pdf(username, request.args.get('view', 'week'),
+                                                request.args.get('week_offset', 0, type=int))
+        pdf = render_schedule_pdf(schedule, title=title, employee=username)
+        return send_file(pdf, mimetype='application/pdf', as_attachment=True,
+                         download_name=f"schedule_{username}.pdf")
+    except Exception as e:
+        logger.error(f"Error generating PDF: {str(e)}")
+        logger.error(traceback.format_exc())
+        flash('אירעה שגיאה ביצירת הקובץ', 'error')
+        return redirect(url_for('index'))
+
+# ---- JSON API ----
+
+API_VERSION = 1
+api_cache = VersionedResponseCache()
+
+def _api_error(message, status):
+    return jsonify({'error': message}), status
+
+def cached_api_body(key, build):
+    """גוף תשובה מהמטמון לפי גרסת המצב (משותף למצב WSGI ולמצב ASGI)"""
+    # גם היום הנוכחי הוא חלק מהמפתח, כי ההיסט (offset) יחסי לתאריך; האתר מפריד בין מערכות
+    key = key + (system.get_israel_time().date(), system.tenant_id)
+    return api_cache.get(key, system.version, build)
+
+def api_headers(entry) -> dict:
+    return {
+        'ETag': f'"{entry.etag}"',
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding, Cookie',
+        'X-API-Version': str(API_VERSION),
+        'X-State-Version': str(system.version),
+    }
+
+def schedule_body(period: str, offset: int, employee=None):
+    """לוח שבועי/חודשי (לכולם או לעובד אחד) כתשובת JSON מוכנה"""
+    if period == 'week':
+        build = lambda: _schedule_payload(period, offset, system.get_weekly_schedule(offset, employee))
+    else:
+        build = lambda: _schedule_payload(period, offset, system.get_monthly_schedule(offset, employee))
+    return cached_api_body(('schedule', period, offset, employee), build)
+
+def appeals_body(username: str, grant: Optional[Grant] = None, status: str = 'pending'):
+    """מי שעורך את הלוח (grant): ערעורים לפי סטטוס. אחרת: הערעורים של username
+
+    מנהל משמרות מוגבל מקבל רק ערעורים של עובדים מהצוותים שבתחומו, במטמון נפרד לפי התחום.
+    """
+    if grant is not None and grant.has(Permission.EDIT_SCHEDULE):
+        if not grant.scoped:
+            build = lambda: {'appeals': [appeal.to_dict() for appeal in system.appeals.by_status(status)]}
+            return cached_api_body(('appeals', None, status), build)
+
+        def build():
+            return {'appeals': [appeal.to_dict() for appeal in system.appeals.by_status(status)
+                                if system.can_view_employee(grant.username, appeal.employee)]}
+        return cached_api_body(('appeals', grant.username, status, grant.teams), build)
+    build = lambda: {'appeals': [appeal.to_dict() for appeal in system.get_employee_appeals(username)]}
+    return cached_api_body(('appeals', username), build)
+
+def _api_response(entry):
+    """תשובת JSON עם ETag חזק, 304 לבקשה מותנית ו-gzip לתשובות גדולות"""
+    headers = api_headers(entry)
+    if request.if_none_match.contains(entry.etag):
+        return Response(status=304, headers=headers)
+    if entry.gzipped is not None and 'gzip' in request.accept_encodings:
+        response = Response(entry.gzipped, mimetype='application/json', headers=headers)
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+    return Response(entry.body, mimetype='application/json', headers=headers)
+
+def _schedule_payload(period, offset, schedule):
+    return {
+        'period': period,
+        'offset': offset,
+        'days': [{'day': day, 'shifts': shifts} for day, shifts in schedule.items()],
+    }
+
+@permission_required()
+def _schedule_api(period, employee=None):
+    if employee is not None and not system.can_view_employee(session['username'], employee):
+        return _api_error('אין הרשאה', 403)
+    
+    offset = request.args.get('offset', 0, type=int)
+    return _api_response(schedule_body(period, offset, employee))
+
+@app.route('/api/schedule/week')
+def api_weekly_schedule():
+    return _schedule_api('week')
+
+@app.route('/api/schedule/month')
+def api_monthly_schedule():
+    return _schedule_api('month')
+
+@app.route('/api/employees/<username>/schedule/week')
+def api_employee_weekly_schedule(username):
+    return _schedule_api('week', username)
+
+@app.route('/api/employees/<username>/schedule/month')
+def api_employee_monthly_schedule(username):
+    return _schedule_api('month', username)
+
+@app.route('/api/appeals')
+@permission_required()
+def api_appeals():
+    """מנהל: ערעורים לפי סטטוס (ברירת מחדל - ממתינים). עובד: הערעורים שלו"""
+    return _api_response(appeals_body(session['username'], current_grant(), request.args.get('status', 'pending')))
+
+@app.route('/api/employees/<username>/appeals')
+@permission_required()
+def api_employee_appeals(username):
+    if not system.can_view_employee(session['username'], username):
+        return _api_error('אין הרשאה', 403)
+    return _api_response(appeals_body(username))
+
+@app.route('/api/shift-plan', methods=['GET', 'PUT'])
+@permission_required(Permission.ADMIN)
+def api_shift_plan():
+    """מנהל: תבניות המשמרות וכללי החזרה (ראו shift_templates.py)"""
+    if request.method == 'PUT':
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return _api_error('בקשה לא תקינה', 400)
+        success, message = system.set_shift_plan(session['username'], payload)
+        if not success:
+            return _api_error(message, 400)
+    return jsonify(system.shift_plan.to_dict())
+
+@app.route('/api/employees/<username>/password', methods=['PUT'])
+@permission_required()
+def api_set_password(username):
+    """קביעת סיסמה: מנהל לכל עובד; עובד לעצמו, בצירוף הסיסמה הנוכחית"""
+    payload = request.get_json(silent=True) or {}
+    if not current_grant().has(Permission.MANAGE_EMPLOYEES):
+        if username != session['username']:
+            return _api_error('אין הרשאה', 403)
+        identity, wait = check_credentials(system, username, str(payload.get('current_password', '')),
+                                           request.remote_addr or '')
+        if wait:
+            return _api_error('יותר מדי ניסיונות התחברות', 429)
+        if identity is None:
+            return _api_error('הסיסמה הנוכחית שגויה', 403)
+    success, message = system.set_password(session['username'], username, str(payload.get('password', '')))
+    if not success:
+        return _api_error(message, 404 if message == "המשתמש אינו קיים" else 400)
+    return jsonify({'success': True, 'message': message})
+
+@app.route('/api/employees/<username>/role', methods=['PUT'])
+@permission_required(Permission.ADMIN)
+def api_set_role(username):
+    """מנהל: תפקיד (viewer/manager/admin), צוות ותחום - {"days": [...], "teams": [...]}"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return _api_error('בקשה לא תקינה', 400)
+    success, message = system.set_role(session['username'], username, str(payload.get('role') or ''),
+                                       str(payload.get('team') or ''), payload.get('scope'))
+    if not success:
+        return _api_error(message, 404 if message == "המשתמש אינו קיים" else 400)
+    user = system.users[username]
+    return jsonify({'success': True, 'message': message, 'role': user.role, 'team': user.team,
+                    'scope': user.scope})
+
+@app.route('/api/employees')
+@permission_required(Permission.EDIT_SCHEDULE)
+def api_employees():
+    """חיפוש עובדים: q (שם, שם משתמש, מספר עובד; למנהל עובדים גם ת"ז, אימייל וטלפון),
+    team, role, sort (name/username/employee_number), order (asc/desc), page, per_page"""
+    sort = request.args.get('sort', 'name')
+    if sort not in SORT_KEYS:
+        return _api_error('מיון לא מוכר', 400)
+    usernames = system.search_employees(session['username'], request.args.get('q', ''), sort,
+                                        request.args.get('order') == 'desc', request.args.get('team'),
+                                        request.args.get('role'))
+    result = paginate(usernames, request.args.get('page', 1, type=int), request.args.get('per_page', 50, type=int))
+    private = current_grant().has(Permission.MANAGE_EMPLOYEES)
+    result['items'] = [system.employee_summary(system.users[username], private) for username in result['items']]
+    return jsonify(result)
+
+@app.route('/api/employees/<username>', methods=['PUT'])
+@permission_required(Permission.MANAGE_EMPLOYEES)
+def api_update_employee(username):
+    """מנהל: עדכון פרטי עובד - first_name, last_name, email, phone, id_number, employee_number"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return _api_error('בקשה לא תקינה', 400)
+    success, message = system.update_employee(session['username'], username, payload)
+    if not success:
+        return _api_error(message, 404 if message == "המשתמש אינו קיים" else 400)
+    return jsonify({'success': True, 'message': message,
+                    'employee': system.employee_summary(system.users[username], True)})
+
+def _report_range():
+    """טווח הדוח מ-start/end (YYYY-MM-DD); ברירת המחדל - החודש הנוכחי"""
+    today = system.get_israel_time().date()
+    start = request.args.get('start')
+    end = request.args.get('end')
+    start = date.fromisoformat(start) if start else today.replace(day=1)
+    end = date.fromisoformat(end) if end else (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    if end < start:
+        raise ValueError('end before start')
+    return start, end
+
+@app.route('/api/reports/hours')
+@permission_required(Permission.MANAGE_EMPLOYEES)
+def api_hours_report():
+    """מנהל: שעות, שעות לילה/סוף שבוע/חג ושעות נוספות לכל עובד בטווח"""
+    try:
+        start, end = _report_range()
+    except ValueError:
+        return _api_error('טווח תאריכים לא תקין', 400)
+    return jsonify({'start': start.isoformat(), 'end': end.isoformat(),
+                    'employees': list(system.hours_report(start, end))})
+
+@app.route('/api/employees/<username>/hours')
+@permission_required()
+def api_employee_hours(username):
+    if username != session['username'] and not current_grant().has(Permission.MANAGE_EMPLOYEES):
+        return _api_error('אין הרשאה', 403)
+    try:
+        start, end = _report_range()
+    except ValueError:
+        return _api_error('טווח תאריכים לא תקין', 400)
+    row = next(system.hours_report(start, end, [username]))
+    return jsonify({'start': start.isoformat(), 'end': end.isoformat(), **row})
+
+@app.route('/reports/hours.csv')
+@permission_required(Permission.MANAGE_EMPLOYEES)
+def hours_report_csv():
+    """מנהל: דוח השעות כקובץ CSV (נפתח ישירות ב-Excel), בהזרמה"""
+    try:
+        start, end = _report_range()
+    except ValueError:
+        return _api_error('טווח תאריכים לא תקין', 400)
+    rows = system.hours_report(start, end)
+    return Response(iter_csv(rows), mimetype='text/csv; charset=utf-8', headers={
+        'Content-Disposition': f'attachment; filename=hours_{start.isoformat()}_{end.isoformat()}.csv',
+    })
+
+# ---- דחיפת שינויים (Server-Sent Events) ----
+
+# שניות בין הודעות keepalive בחיבור פתוח ללא אירועים
+EVENTS_KEEPALIVE = 15
+
+def format_event(feed, event) -> str:
+    data = json.dumps(event.data, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {feed.event_id(event.seq)}\nevent: {event.type}\ndata: {data}\n\n"
+
+@app.route('/events')
+@permission_required()
+def events():
+    """זרם אירועים למשתמש המחובר: שינויים בלוח, ערעורים והתראות אישיות
+
+    לקוח שמתחבר מחדש שולח Last-Event-ID ומקבל את מה שפספס; אם זה כבר
+    לא נשמר, או שהמזהה מערוץ אחר (ראו change_feed) - נשלח אירוע reset.
+    """
+    username = session['username']
+    is_admin = current_grant().has(Permission.EDIT_SCHEDULE)
+    feed = system.feed
+    seq, missed = feed.resume(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+
+    def stream():
+        nonlocal seq, missed
+        yield "retry: 5000\n\n"
+        while True:
+            if missed:
+                yield f"id: {feed.event_id(seq)}\nevent: reset\ndata: {{}}\n\n"
+            pending, seq, missed = feed.wait(seq, username, is_admin, timeout=EVENTS_KEEPALIVE)
+            if missed:
+                continue
+            if not pending:
+                yield ": keepalive\n\n"
+                continue
+            for event in pending:
+                yield format_event(feed, event)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/notifications')
+def api_notifications():
+    if 'username' not in session:
+        return _api_error('נדרשת התחברות', 401)
+    if not system:
+        return _api_error('המערכת לא אותחלה', 500)
+    notifications = system.get_user_notifications(session['username'])
+    return jsonify({'notifications': [
+        dict(notification, timestamp=notification['timestamp'].isoformat())
+        for notification in notifications
+    ]})
+
+@app.route('/api/notifications/read', methods=['POST'])
+def api_mark_notifications_read():
+    """סימון התראות כנקראו: {"ids": [...]} או גוף ריק לסימון כולן"""
+    if 'username' not in session:
+        return _api_error('נדרשת התחברות', 401)
+    if not system:
+        return _api_error('המערכת לא אותחלה', 500)
+    payload = request.get_json(silent=True) or {}
+    marked = system.mark_notifications_read(session['username'], payload.get('ids'))
+    return jsonify({'marked': marked})
+
 @app.route('/logout')
 def logout():
     session.clear()